@@ -1,31 +1,19 @@
-"""NutraFuel AI Agents"""
+"""NutraFuel AI Agents
 
-# Frontend Agents (Customer-facing)
-from . import intelligent_search
-from . import customer_service
-from . import rachel_nutrition
-from . import ramy_lifestyle
+Agent modules are imported on first attribute access (``agents.rachel_nutrition``)
+rather than with the package, since each one builds its corpus when imported.
+The agents themselves are listed in ``agents.registry``.
+"""
 
-# Backend Agents (Admin/Internal)
-from . import client_acquisition
-from . import marketing_analytics
-from . import campaign_optimizer
-from . import review_synthesis
-from . import financial_reports
-from . import landing_page_generator
+import importlib
 
-__all__ = [
-    # Frontend Agents
-    'intelligent_search',
-    'customer_service', 
-    'rachel_nutrition',
-    'ramy_lifestyle',
-    
-    # Backend Agents
-    'client_acquisition',
-    'marketing_analytics',
-    'campaign_optimizer',
-    'review_synthesis',
-    'financial_reports',
-    'landing_page_generator'
-] 
\ No newline at end of file
+from .registry import AGENT_SPECS
+
+# Agent modules, in registry order
+__all__ = list(dict.fromkeys(spec.module for spec in AGENT_SPECS))
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
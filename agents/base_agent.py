@@ -1,67 +1,467 @@
 """Base RAG Agent with Mock Implementation for Demo"""
 
-from typing import Dict, Any, List, Tuple
+from typing import Callable, Dict, Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from array import array
+import itertools
 import os
+import sys
+import threading
 from dotenv import load_dotenv
 
+from . import corpus_file, faiss_index
+from .lexical_index import LexicalIndex
+from .document_store import DocumentStore, DocumentStoreBuilder
+from .query_cache import DEFAULT_CACHE_SIZE, DEFAULT_CACHE_TTL, QueryCache, estimate_result_bytes, normalize_query
+from .segments import CorpusSnapshot, LiveDocuments, Segment, chain_fingerprint, tombstone
+from .source_fragments import SourceFragments
+from .vector_index import DenseVectorIndex, HashingEmbedder
+
 # Load environment variables
 load_dotenv()
 
+# Supported values for BaseRAGAgent(retrieval_mode=...)
+RETRIEVAL_MODES = ("lexical", "dense", "faiss", "hybrid")
+
+# Hybrid mode asks each retriever for max(k * factor, minimum) candidates
+# before fusing, which bounds the fusion work independently of corpus size
+HYBRID_CANDIDATE_FACTOR = 4
+HYBRID_MIN_CANDIDATES = 20
+
+# Upserts add delta segments; once there are more than this many, or more
+# than this share of documents is tombstoned, a background merge folds the
+# corpus back into a single segment
+MAX_DELTA_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.2
+
+# Approximate cost of one doc id -> (segment uid, position) entry beyond the
+# dict's own table: the tuple plus the id and position ints
+LOCATION_ENTRY_BYTES = 56 + 2 * 32
+
 class BaseRAGAgent:
     """Base class for RAG agents with mock implementation"""
     
-    def __init__(self, name: str, system_prompt: str):
+    def __init__(self, name: str, system_prompt: str, retrieval_mode: str = "lexical", embedder=None,
+                 index_params: Optional[Dict[str, Any]] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 cache_ttl: Optional[float] = DEFAULT_CACHE_TTL):
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}', expected one of {RETRIEVAL_MODES}")
         self.name = name
         self.system_prompt = system_prompt
-        self.documents = []
-        self.doc_metadata = []  # Store metadata for references
-        
-    def add_documents(self, documents: List[str]):
-        """Add documents to the agent's knowledge base"""
-        self.documents = documents  # Replace instead of extend to ensure fresh data
-        
-        # Create metadata for each document
-        metadatas = []
-        for i, doc in enumerate(documents):
-            # Extract a title from the first part of the document
-            title = doc.split(':')[0].strip() if ':' in doc else f"Document {i+1}"
-            metadatas.append({
-                "source": f"{self.name}_doc_{i+1}",
-                "title": title,
-                "index": i
-            })
-        
-        self.doc_metadata = metadatas
+        self.retrieval_mode = retrieval_mode
+        self.embedder = embedder or HashingEmbedder()
+        self.index_params = dict(index_params or {})  # FAISS build/search parameters
+        
+        # Readers take self._snapshot once; writers replace it under the lock
+        self._snapshot = CorpusSnapshot()
+        self._write_lock = threading.Lock()
+        self._locations: Dict[int, Tuple[int, int]] = {}  # doc id -> (segment uid, local position)
+        self._segment_uids = itertools.count(1)
+        self._merge_thread: Optional[threading.Thread] = None
+        
+        # Results are keyed on (agent, normalised query, k) and tagged with the
+        # corpus generation, so any write makes older entries unservable
+        self.cache = QueryCache(cache_size, cache_ttl)
+    
+    @property
+    def generation(self) -> int:
+        """Incremented by every change to the corpus"""
+        return self._snapshot.generation
+    
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the corpus content, the same in every process that loaded it"""
+        return self._snapshot.fingerprint
+    
+    @property
+    def documents(self) -> LiveDocuments:
+        """Live document texts in corpus order, decoded from the store on access"""
+        return self._snapshot.documents
+    
+    @property
+    def doc_metadata(self) -> List[Dict]:
+        """Metadata for live documents, aligned with ``documents``"""
+        snapshot = self._snapshot
+        return [snapshot.metadata(self.name, position) for position in snapshot.live_positions()]
+    
+    def snapshot(self) -> CorpusSnapshot:
+        """Current immutable view of the corpus"""
+        return self._snapshot
+    
+    def add_documents(self, documents: List[str], ids: Optional[Iterable[int]] = None):
+        """Replace the agent's knowledge base; ids default to 1..n"""
+        documents = list(documents)
+        doc_ids = list(ids) if ids is not None else list(range(1, len(documents) + 1))
+        if len(doc_ids) != len(documents):
+            raise ValueError(f"Got {len(doc_ids)} ids for {len(documents)} documents")
+        if len(set(doc_ids)) != len(doc_ids):
+            raise ValueError("Document ids must be unique")
+        
+        segment = self._build_segment(doc_ids, documents, base=True)
+        fingerprint = chain_fingerprint(store=segment.store)
+        with self._write_lock:
+            self._locations = {doc_id: (segment.uid, local) for local, doc_id in enumerate(doc_ids)}
+            self._snapshot = CorpusSnapshot((segment,), {}, self._snapshot.generation + 1, fingerprint)
+        # Nothing cached against the old corpus can be served again; free it now
+        self.cache.invalidate()
+    
+    def load_corpus_file(self, path: str):
+        """Replace the knowledge base with a memory-mapped corpus file
+        
+        Document text stays in the mapping and is decoded only for hits, so
+        workers that open the same file share its pages. Indexes are still
+        built per process (FAISS ones are themselves mapped from disk).
+        """
+        store = corpus_file.open_corpus(path)
+        if len(set(store.doc_ids)) != len(store):
+            raise ValueError(f"{path} contains duplicate document ids")
+        segment = self._index_store(store, base=True)
+        fingerprint = chain_fingerprint(store=store)
+        with self._write_lock:
+            self._locations = {doc_id: (segment.uid, local) for local, doc_id in enumerate(store.doc_ids)}
+            self._snapshot = CorpusSnapshot((segment,), {}, self._snapshot.generation + 1, fingerprint)
+        self.cache.invalidate()
+    
+    def save_corpus_file(self, path: str) -> int:
+        """Write the live documents to a corpus file that load_corpus_file can map"""
+        snapshot = self._snapshot
+        return corpus_file.write_corpus(path, ((snapshot.doc_id(position), snapshot.document(position))
+                                               for position in snapshot.live_positions()))
+    
+    def upsert(self, documents: Union[Mapping[int, str], Iterable[Tuple[int, str]]]) -> int:
+        """Insert or replace documents by id; costs about the size of the batch, not the corpus"""
+        items = documents.items() if isinstance(documents, Mapping) else documents
+        batch = dict(items)  # Last write wins within a batch
+        if not batch:
+            return 0
+        
+        # Indexes for the delta are built outside the lock; only the swap is serialised
+        segment = self._build_segment(list(batch.keys()), list(batch.values()), base=False)
+        with self._write_lock:
+            current = self._snapshot
+            superseded = [self._locations[doc_id] for doc_id in batch if doc_id in self._locations]
+            for local, doc_id in enumerate(segment.doc_ids):
+                self._locations[doc_id] = (segment.uid, local)
+            self._snapshot = CorpusSnapshot(
+                current.segments + (segment,), tombstone(current.deleted, superseded), current.generation + 1,
+                chain_fingerprint(current.fingerprint, segment.store)
+            )
+        self._maybe_merge()
+        return len(batch)
+    
+    def load_batches(self, batches: Iterable[Iterable[Tuple[int, str]]],
+                     on_batch: Optional[Callable[[int], None]] = None) -> int:
+        """Replace the knowledge base from a stream of (id, text) batches
+        
+        Every batch is appended to one base segment under construction (store,
+        BM25 postings, vectors) and then dropped, so only the current batch is
+        ever held as Python strings. Readers keep seeing the old corpus until
+        the last batch is in. Later copies of an id win.
+        
+        A persisted FAISS index is reused when it was built from the same
+        texts, which is only known once every batch is in; its vectors are
+        then embedded (if at all) from the finished store, batch by batch.
+        """
+        uid = next(self._segment_uids)
+        store = DocumentStoreBuilder()
+        lexical_index = LexicalIndex() if self.retrieval_mode in ("lexical", "hybrid") else None
+        vector_index = self._create_vector_index() if self.retrieval_mode != "lexical" else None
+        persisted = getattr(vector_index, "index_path", None) is not None
+        batch_size = 1
+        locations: Dict[int, Tuple[int, int]] = {}
+        superseded: List[Tuple[int, int]] = []
+        for batch in batches:
+            batch = dict(batch)  # Last write wins within a batch
+            if not batch:
+                continue
+            for local, doc_id in enumerate(batch, len(store)):
+                if doc_id in locations:
+                    superseded.append(locations[doc_id])
+                locations[doc_id] = (uid, local)
+            texts = list(batch.values())
+            store.extend(batch.keys(), texts)
+            batch_size = max(batch_size, len(texts))
+            if lexical_index is not None:
+                lexical_index.add(texts)
+            if vector_index is not None and not persisted:
+                vector_index.add(texts)
+            if on_batch is not None:
+                on_batch(len(batch))
+        if lexical_index is not None:
+            lexical_index.freeze()
+        
+        store = store.build()
+        if persisted:
+            vector_index.build(store, batch_size)
+        elif vector_index is not None:
+            vector_index.finalize()
+        segment = Segment(uid, store, lexical_index, vector_index, SourceFragments.build(self.name, store))
+        fingerprint = chain_fingerprint(store=store)
+        with self._write_lock:
+            self._locations = locations
+            self._snapshot = CorpusSnapshot((segment,), tombstone({}, superseded), self._snapshot.generation + 1,
+                                            fingerprint)
+        self.cache.invalidate()
+        self._maybe_merge()
+        return len(locations)
+    
+    def delete(self, ids: Iterable[int]) -> int:
+        """Delete documents by id, returning how many existed"""
+        with self._write_lock:
+            current = self._snapshot
+            removed_ids = [doc_id for doc_id in set(ids) if doc_id in self._locations]
+            if not removed_ids:
+                return 0
+            removed = [self._locations.pop(doc_id) for doc_id in removed_ids]
+            self._snapshot = CorpusSnapshot(current.segments, tombstone(current.deleted, removed), current.generation + 1,
+                                            chain_fingerprint(current.fingerprint, deleted_ids=removed_ids))
+        self._maybe_merge()
+        return len(removed)
+    
+    def _build_segment(self, doc_ids: Sequence[int], documents: Iterable[str], base: bool) -> Segment:
+        """Build the indexes for the configured mode over one batch of documents
+        
+        documents is consumed once, into the compact store; the indexes are
+        then built by decoding from the store, so callers can stream texts
+        instead of materialising them as a list.
+        """
+        return self._index_store(DocumentStore.from_documents(doc_ids, documents), base)
+    
+    def _index_store(self, store: DocumentStore, base: bool) -> Segment:
+        """Build the configured indexes over an existing store and wrap both in a segment"""
+        lexical_index = None
+        vector_index = None
+        if self.retrieval_mode in ("lexical", "hybrid"):
+            lexical_index = LexicalIndex()
+            lexical_index.build(store)
+            lexical_index.freeze()  # Segments are immutable; keep no per-term objects around
+        if self.retrieval_mode != "lexical":
+            # Small delta segments are searched exactly; only the base gets FAISS
+            vector_index = self._create_vector_index() if base else DenseVectorIndex(self.embedder)
+            vector_index.build(store)
+        return Segment(next(self._segment_uids), store, lexical_index, vector_index,
+                       SourceFragments.build(self.name, store))
+    
+    def _uses_faiss(self) -> bool:
+        # Hybrid agents use FAISS for their vector side only when configured to
+        return self.retrieval_mode == "faiss" or (self.retrieval_mode == "hybrid" and bool(self.index_params))
+    
+    def _create_vector_index(self):
+        """Create an empty vector index for the configured mode"""
+        if self._uses_faiss():
+            if faiss_index.faiss is None:
+                print(f"faiss-cpu is not installed; {self.name} falls back to exact dense search")
+                return DenseVectorIndex(self.embedder)
+            params = dict(self.index_params)
+            index_type = params.setdefault("index_type", "hnsw")
+            params.setdefault("index_path", os.path.join(faiss_index.DEFAULT_INDEX_DIR, f"{self.name}.{index_type}.faiss"))
+            return faiss_index.FaissVectorIndex(self.embedder, **params)
+        return DenseVectorIndex(self.embedder)
+    
+    @staticmethod
+    def _needs_merge(snapshot: CorpusSnapshot) -> bool:
+        if len(snapshot.segments) <= 1:
+            return False
+        too_many_deltas = len(snapshot.segments) - 1 > MAX_DELTA_SEGMENTS
+        too_many_deleted = snapshot.size - snapshot.live_count > MAX_DELETED_RATIO * snapshot.size
+        return too_many_deltas or too_many_deleted
+    
+    def _maybe_merge(self):
+        """Start a background merge when deltas or tombstones have piled up"""
+        if not self._needs_merge(self._snapshot):
+            return
+        with self._write_lock:
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            self._merge_thread = threading.Thread(target=self._background_merge, name=f"{self.name}-merge", daemon=True)
+            self._merge_thread.start()
+    
+    def _background_merge(self):
+        # Keep merging while writes that landed during the last merge still
+        # leave the corpus over the thresholds
+        while self._needs_merge(self._snapshot):
+            if not self.merge_segments():
+                break
+    
+    def merge_segments(self) -> bool:
+        """Fold all current segments into one, dropping tombstoned documents
+        
+        The merged segment is built without holding the write lock, so
+        upserts and deletes keep landing meanwhile; they are reconciled when
+        the merged segment is swapped in. Returns False if a full reload
+        replaced the corpus during the merge.
+        """
+        base = self._snapshot
+        if len(base.segments) <= 1 and not base.deleted:
+            return True
+        live = array('q', base.live_positions())
+        doc_ids = array('q', (base.doc_id(position) for position in live))
+        # Texts stream from the old segments' stores into the merged one
+        merged = self._build_segment(doc_ids, (base.document(position) for position in live), base=True)
+        
+        with self._write_lock:
+            current = self._snapshot
+            merged_count = len(base.segments)
+            if current.segments[:merged_count] != base.segments:
+                return False  # add_documents replaced everything; the merge is stale
+            merged_uids = {segment.uid for segment in base.segments}
+            
+            # Documents changed after the merge started no longer live in the
+            # merged segments; tombstone their copies in the new segment
+            stale = []
+            for local, doc_id in enumerate(doc_ids):
+                location = self._locations.get(doc_id)
+                if location is not None and location[0] in merged_uids:
+                    self._locations[doc_id] = (merged.uid, local)
+                else:
+                    stale.append((merged.uid, local))
+            
+            later = current.segments[merged_count:]
+            deleted = {segment.uid: current.deleted[segment.uid] for segment in later if segment.uid in current.deleted}
+            # A merge moves documents between segments without changing them
+            self._snapshot = CorpusSnapshot((merged,) + later, tombstone(deleted, stale), current.generation + 1,
+                                            current.fingerprint)
+        return True
+    
+    def search(self, query: str, k: int = 3, snapshot: Optional[CorpusSnapshot] = None) -> List[Tuple[int, float]]:
+        """Rank documents for a query, returning (snapshot position, score) pairs"""
+        return self.search_many([query], k, snapshot)[0]
+    
+    def search_many(self, queries: List[str], k: int = 3,
+                    snapshot: Optional[CorpusSnapshot] = None) -> List[List[Tuple[int, float]]]:
+        """Rank documents for a batch of queries against one snapshot"""
+        snapshot = snapshot or self._snapshot
+        if self.retrieval_mode == "lexical":
+            return snapshot.lexical_search_many(queries, k)
+        if self.retrieval_mode == "hybrid":
+            # Exact-term matches ("1439221", "pre-workout") come from BM25,
+            # paraphrased goals from the vectors; RRF merges the two rankings
+            return snapshot.hybrid_search_many(queries, k, max(k * HYBRID_CANDIDATE_FACTOR, HYBRID_MIN_CANDIDATES))
+        return snapshot.vector_search_many(queries, k)
     
     def retrieve_context_with_sources(self, query: str, k: int = 3) -> Tuple[str, List[Dict]]:
-        """Retrieve relevant context with source references using mock similarity"""
-        if not self.documents:
-            return "", []
+        """Retrieve relevant context with source references, served from the cache when possible
         
-        # Simple mock similarity - return first k documents
-        selected_docs = self.documents[:min(k, len(self.documents))]
+        The returned sources may be shared with other callers; treat them as read-only.
+        """
+        return self.retrieve_many([query], k)[0]
+    
+    def retrieve_many(self, queries: List[str], k: int = 3) -> List[Tuple[str, List[Dict]]]:
+        """Batched retrieve_context_with_sources: cache misses are scored together in one pass
         
+        Each result is identical to what retrieve_context_with_sources returns
+        for that query on its own.
+        """
+        return self._retrieve_cached(queries, k, "result", ("", []), self._build_result, estimate_result_bytes)
+    
+    def retrieve_sources_json(self, query: str, k: int = 3) -> bytes:
+        """The sources of retrieve_context_with_sources as a ready-to-send JSON array"""
+        return self.retrieve_sources_json_many([query], k)[0]
+    
+    def retrieve_sources_json_many(self, queries: List[str], k: int = 3) -> List[bytes]:
+        """Batched retrieve_sources_json; only hits are touched, via their pre-encoded fragments"""
+        return self._retrieve_cached(queries, k, "sources_json", b"[]",
+                                     lambda snapshot, hits: snapshot.sources_json(hits), len)
+    
+    def _retrieve_cached(self, queries: List[str], k: int, kind: str, empty: Any,
+                         build: Callable[[CorpusSnapshot, List[Tuple[int, float]]], Any],
+                         size: Callable[[Any], int]) -> List[Any]:
+        """Serve each query from the cache or score the misses together and cache what build makes of them"""
+        snapshot = self._snapshot
+        if not snapshot.live_count:
+            return [empty for _ in queries]
+        
+        results: List[Any] = []
+        misses: Dict[Tuple[str, str, str, int], List[int]] = {}  # Duplicate queries are scored once
+        for i, query in enumerate(queries):
+            key = (self.name, kind, normalize_query(query), k)
+            result = self.cache.get(key, snapshot.generation)
+            results.append(result)
+            if result is None:
+                misses.setdefault(key, []).append(i)
+        
+        if misses:
+            pending = list(misses.items())
+            batch_hits = self.search_many([queries[slots[0]] for _, slots in pending], k, snapshot)
+            for (key, slots), hits in zip(pending, batch_hits):
+                result = build(snapshot, hits)
+                self.cache.put(key, snapshot.generation, result, size(result))
+                for i in slots:
+                    results[i] = result
+        return results
+    
+    def _build_result(self, snapshot: CorpusSnapshot, hits: List[Tuple[int, float]]) -> Tuple[str, List[Dict]]:
+        """Turn ranked hits into (context, sources)"""
         context_parts = []
         sources = []
         
-        for i, doc in enumerate(selected_docs):
-            context_parts.append(doc)
+        for position, score in hits:
+            # Hits are decoded straight from the store's buffer; nothing else is copied
+            context_parts.append(snapshot.document(position))
             
             # Create source reference
             source = {
-                "content": doc[:100] + "..." if len(doc) > 100 else doc,
-                "metadata": self.doc_metadata[i] if i < len(self.doc_metadata) else {
-                    "source": f"{self.name}_doc_{i+1}",
-                    "title": f"Document {i+1}",
-                    "index": i
-                },
-                "relevance_score": 0.95 - (i * 0.1)  # Mock decreasing relevance
+                "content": snapshot.preview(position),
+                "metadata": snapshot.metadata(self.name, position),
+                "relevance_score": round(score, 4)
             }
             sources.append(source)
         
         context = "\n\n".join(context_parts)
         return context, sources
     
+    def retrieval_report(self, queries: List[str], k: int = 10) -> Dict[str, Any]:
+        """Report recall@k and latency of this agent's vector retrieval against exact search"""
+        if self.retrieval_mode == "lexical":
+            raise ValueError(f"{self.name} uses lexical retrieval and has no vector index")
+        snapshot = self._snapshot
+        live = list(snapshot.live_positions())
+        exact_index = DenseVectorIndex(self.embedder)
+        exact_index.build([snapshot.document(position) for position in live])
+        
+        def approx_search(query, k):
+            return [(snapshot.doc_id(position), score) for position, score in snapshot.vector_search(query, k)]
+        
+        def exact_search(query, k):
+            return [(snapshot.doc_id(live[local]), score) for local, score in exact_index.search(query, k)]
+        
+        report = faiss_index.compare_with_exact(approx_search, exact_search, queries, k)
+        report.update(agent=self.name, retrieval_mode=self.retrieval_mode, num_docs=len(live))
+        return report
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held by this agent's corpus, indexes and cache, by kind
+        
+        Computed from sizes the structures already track, in time linear in
+        the number of segments, never by walking the heap. mapped_bytes is
+        the part backed by files (mapped corpus files, FAISS indexes loaded
+        from disk), which is shared page cache rather than private memory.
+        """
+        snapshot = self._snapshot
+        usage = dict.fromkeys(("text_bytes", "metadata_bytes", "source_fragments_bytes", "lexical_index_bytes",
+                               "vector_index_bytes"), 0)
+        mapped = 0
+        for segment in snapshot.segments:
+            store = segment.store
+            usage["text_bytes"] += store.text_nbytes
+            usage["metadata_bytes"] += store.nbytes - store.text_nbytes
+            if store.mapped:
+                mapped += store.nbytes
+            if segment.fragments is not None:
+                usage["source_fragments_bytes"] += segment.fragments.nbytes
+            if segment.lexical_index is not None and segment.lexical_index.frozen:
+                usage["lexical_index_bytes"] += segment.lexical_index.nbytes
+            if segment.vector_index is not None:
+                usage["vector_index_bytes"] += segment.vector_index.nbytes
+                mapped += getattr(segment.vector_index, "mapped_nbytes", 0)
+        usage["id_map_bytes"] = sys.getsizeof(self._locations) + len(self._locations) * LOCATION_ENTRY_BYTES
+        cache = self.cache.stats()
+        usage["cache_bytes"] = cache["bytes"]
+        usage["total_bytes"] = sum(usage.values()) - mapped
+        usage["mapped_bytes"] = mapped
+        usage.update(documents=snapshot.live_count, segments=len(snapshot.segments), cache_entries=cache["size"],
+                     embedder_cached_terms=getattr(self.embedder, "cached_terms", 0))
+        return usage
+    
     def retrieve_context(self, query: str, k: int = 3) -> str:
         """Retrieve relevant context from knowledge base (backward compatibility)"""
         context, _ = self.retrieve_context_with_sources(query, k)
@@ -1,6 +1,7 @@
 """NutraFuel Sales Optimizer AI Agent"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 SALES_OPTIMIZER_PROMPT = """You are an AI consultant for sales optimization at NutraFuel.
 
@@ -62,7 +63,7 @@ agent = BaseRAGAgent(
 )
 
 # Load data into vector store
-agent.add_documents(PRICING_STRATEGY_DATA + BUNDLE_OPTIMIZATION_DATA + SUBSCRIPTION_OPTIMIZATION_DATA + CUSTOMER_OPTIMIZATION_DATA)
+load_corpus(agent, PRICING_STRATEGY_DATA + BUNDLE_OPTIMIZATION_DATA + SUBSCRIPTION_OPTIMIZATION_DATA + CUSTOMER_OPTIMIZATION_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
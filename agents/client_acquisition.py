@@ -1,6 +1,7 @@
 """NutraFuel Customer Experience AI Agent"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 CUSTOMER_EXPERIENCE_PROMPT = """You are APEX's Customer Experience Analytics AI! 📊
 
@@ -28,7 +29,7 @@ agent = BaseRAGAgent(
 )
 
 # Load minimal data for maximum speed
-agent.add_documents(ESSENTIAL_COHORT_DATA)
+load_corpus(agent, ESSENTIAL_COHORT_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""Binary on-disk corpus format, opened with mmap
+
+Layout (little-endian, sections 8-byte aligned)::
+
+    header      magic, version, counts and the (offset, length) of each section
+    text        UTF-8 document texts, back to back
+    offsets     (n + 1) uint64 byte offsets into the text section
+    doc_ids     n int64 document ids
+    title_ids   n uint32 indexes into the title table (NO_TITLE for none)
+    titles      (t + 1) uint64 offsets, then t UTF-8 titles back to back
+
+The text section comes first so a writer can stream documents straight to
+disk and append the fixed-width tables once it knows their contents. Opening
+a file maps it read-only: every worker process shares the same page-cache
+pages, and a document is decoded only when a hit on it is returned.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Tuple
+
+from .document_store import NO_TITLE, DocumentStore, split_title
+
+MAGIC = b"APEXCORP"
+VERSION = 1
+CORPUS_EXTENSION = ".corpus"
+
+# magic, version, reserved, num_docs, num_titles, then (offset, length) for
+# the text, offsets, doc_ids, title_ids and titles sections
+HEADER = struct.Struct("<8sIIQQ10Q")
+SECTIONS = ("text", "offsets", "doc_ids", "title_ids", "titles")
+
+ALIGNMENT = 8
+
+
+def _pad(f) -> int:
+    """Pad the file to the next ALIGNMENT boundary and return the position"""
+    position = f.tell()
+    padding = -position % ALIGNMENT
+    if padding:
+        f.write(b"\0" * padding)
+    return position + padding
+
+
+def _le_bytes(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le(view: memoryview, typecode: str):
+    if sys.byteorder == "big":
+        column = array(typecode, view.tobytes())
+        column.byteswap()
+        return column
+    return view.cast(typecode)
+
+
+class CorpusWriter:
+    """Streams (id, text) documents into a corpus file
+
+    Texts go to disk as they are added; only the fixed-width columns (20
+    bytes per document) and the unique titles are kept in memory. The file
+    is written under a temporary name and renamed into place on close, so
+    readers never map a half-written corpus.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\0" * HEADER.size)
+        self._text_start = _pad(self._file)
+        self._text_length = 0
+        self.offsets = array('Q', [0])
+        self.doc_ids = array('q')
+        self.title_ids = array('I')
+        self._titles = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def add(self, doc_id: int, doc: str):
+        data = doc.encode("utf-8")
+        self._file.write(data)
+        self._text_length += len(data)
+        self.offsets.append(self._text_length)
+        self.doc_ids.append(doc_id)
+        title = split_title(doc)
+        self.title_ids.append(self._titles.setdefault(title, len(self._titles)) if title else NO_TITLE)
+
+    def extend(self, records: Iterable[Tuple[int, str]]):
+        for doc_id, doc in records:
+            self.add(doc_id, doc)
+
+    def close(self):
+        f = self._file
+        sections = {"text": (self._text_start, self._text_length)}
+        for name, column in (("offsets", self.offsets), ("doc_ids", self.doc_ids), ("title_ids", self.title_ids)):
+            start = _pad(f)
+            data = _le_bytes(column)
+            f.write(data)
+            sections[name] = (start, len(data))
+
+        encoded = [title.encode("utf-8") for title in self._titles]  # dicts keep insertion order
+        title_offsets = array('Q', [0])
+        for data in encoded:
+            title_offsets.append(title_offsets[-1] + len(data))
+        start = _pad(f)
+        f.write(_le_bytes(title_offsets))
+        f.write(b"".join(encoded))
+        sections["titles"] = (start, f.tell() - start)
+
+        fields = [value for name in SECTIONS for value in sections[name]]
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.doc_ids), len(encoded), *fields))
+        f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_corpus(path: str, records: Iterable[Tuple[int, str]]) -> int:
+    """Write (id, text) records to a corpus file, returning the document count"""
+    with CorpusWriter(path) as writer:
+        writer.extend(records)
+    return len(writer)
+
+
+def open_corpus(path: str) -> DocumentStore:
+    """Map a corpus file read-only and return a DocumentStore over it
+
+    The columns are views into the mapping; nothing but the (usually few)
+    unique titles is decoded up front.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"{path} is not a corpus file (too short)")
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+
+    magic, version, _, num_docs, num_titles, *fields = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a corpus file (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"{path} has corpus format version {version}, expected {VERSION}")
+    sections = {}
+    for i, name in enumerate(SECTIONS):
+        start, length = fields[2 * i], fields[2 * i + 1]
+        if start + length > size:
+            raise ValueError(f"{path} is truncated ({name} section runs past the end)")
+        sections[name] = view[start:start + length]
+
+    offsets = _from_le(sections["offsets"], 'Q')
+    doc_ids = _from_le(sections["doc_ids"], 'q')
+    title_ids = _from_le(sections["title_ids"], 'I')
+    if len(offsets) != num_docs + 1 or len(doc_ids) != num_docs or len(title_ids) != num_docs:
+        raise ValueError(f"{path} is corrupt (column lengths do not match {num_docs} documents)")
+
+    title_table = sections["titles"]
+    table_bytes = 8 * (num_titles + 1)
+    title_offsets = _from_le(title_table[:table_bytes], 'Q')
+    blob = title_table[table_bytes:]
+    titles = [str(blob[title_offsets[i]:title_offsets[i + 1]], "utf-8") for i in range(num_titles)]
+    return DocumentStore(sections["text"], offsets, doc_ids, title_ids, titles)
@@ -1,6 +1,7 @@
 """NutraFuel Customer Service AI Agent - Frontend"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 CUSTOMER_SERVICE_PROMPT = """You are NutraFuel's Customer Service AI! 🎧
 
@@ -50,11 +51,12 @@ TROUBLESHOOTING_DATA = [
 # Create agent instance
 agent = BaseRAGAgent(
     name="customer_service",
-    system_prompt=CUSTOMER_SERVICE_PROMPT
+    system_prompt=CUSTOMER_SERVICE_PROMPT,
+    retrieval_mode="hybrid"  # Exact product/order terms plus goal-style questions
 )
 
 # Load data into vector store
-agent.add_documents(CUSTOMER_SERVICE_DATA + TROUBLESHOOTING_DATA)
+load_corpus(agent, CUSTOMER_SERVICE_DATA + TROUBLESHOOTING_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
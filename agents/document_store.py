@@ -0,0 +1,143 @@
+"""Compact columnar storage for agent documents"""
+
+import mmap
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+# title_ids entry for documents without a "Title: ..." prefix; their title is
+# derived from the document id on demand
+NO_TITLE = 0xFFFFFFFF
+
+# A preview of at most this many characters never needs more than 4 bytes each
+PREVIEW_CHARS = 100
+
+
+def split_title(doc: str) -> str:
+    """Return the text before the first colon, or '' when there is none"""
+    return doc.split(':')[0].strip() if ':' in doc else ""
+
+
+class DocumentStore:
+    """Immutable column store: one UTF-8 buffer plus offsets, ids and interned titles
+
+    A list of Python strings plus a metadata dict per document costs a few
+    hundred bytes of object overhead each; here a document costs its UTF-8
+    bytes plus 8 (offset) + 8 (id) + 4 (title id) bytes. Columns can be any
+    indexable buffer, so the same class serves in-memory arrays and
+    memory-mapped files.
+    """
+
+    def __init__(self, buffer, offsets: Sequence[int], doc_ids: Sequence[int], title_ids: Sequence[int],
+                 titles: List[str]):
+        self._view = memoryview(buffer)
+        self.offsets = offsets  # n + 1 byte offsets into the buffer
+        self.doc_ids = doc_ids
+        self.title_ids = title_ids
+        self.titles = titles  # Unique titles, shared by every document that uses them
+
+    @classmethod
+    def from_documents(cls, doc_ids: Sequence[int], documents: Iterable[str]) -> "DocumentStore":
+        builder = DocumentStoreBuilder()
+        builder.extend(doc_ids, documents)
+        if len(builder) != len(doc_ids):
+            raise ValueError(f"Got {len(doc_ids)} ids for {len(builder)} documents")
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def text_view(self, i: int) -> memoryview:
+        """Zero-copy view of document i's UTF-8 bytes"""
+        return self._view[self.offsets[i]:self.offsets[i + 1]]
+
+    def text(self, i: int) -> str:
+        return str(self.text_view(i), "utf-8")
+
+    def preview(self, i: int, chars: int = PREVIEW_CHARS) -> str:
+        """First ``chars`` characters of document i, with '...' when truncated
+
+        Decodes at most 4 * chars bytes rather than the whole document.
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        head = str(self._view[start:min(end, start + 4 * chars)], "utf-8", "ignore")
+        if len(head) > chars or end - start > 4 * chars:
+            return head[:chars] + "..."
+        return head
+
+    def doc_id(self, i: int) -> int:
+        return self.doc_ids[i]
+
+    def title(self, i: int) -> str:
+        title_id = self.title_ids[i]
+        return self.titles[title_id] if title_id != NO_TITLE else f"Document {self.doc_ids[i]}"
+
+    def source(self, agent_name: str, i: int) -> str:
+        return f"{agent_name}_doc_{self.doc_ids[i]}"
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def update_digest(self, digest):
+        """Feed the ids, offsets and text of every document into a hashlib digest
+
+        Three buffer updates, whatever the corpus size; nothing is decoded.
+        """
+        digest.update(memoryview(self.doc_ids).cast('B'))
+        digest.update(memoryview(self.offsets).cast('B'))
+        digest.update(self._view[:self.text_nbytes])
+
+    @property
+    def text_nbytes(self) -> int:
+        return self.offsets[len(self)] if len(self) else 0
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the columns live in a memory-mapped corpus file rather than process memory"""
+        return isinstance(self._view.obj, mmap.mmap)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (text, offsets, ids, title ids, unique titles)"""
+        columns = (self.offsets, self.doc_ids, self.title_ids)
+        column_bytes = sum(memoryview(column).nbytes for column in columns)
+        return self.text_nbytes + column_bytes + sum(len(title.encode("utf-8")) for title in self.titles)
+
+
+class DocumentStoreBuilder:
+    """Appends documents to growing columns; ``build`` freezes them into a DocumentStore"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array('Q', [0])
+        self.doc_ids = array('q')
+        self.title_ids = array('I')
+        self.titles: List[str] = []
+        self._interned: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.title_ids)
+
+    def add(self, doc_id: int, doc: str):
+        self.buffer += doc.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+        self.doc_ids.append(doc_id)
+        title = split_title(doc)
+        if not title:
+            self.title_ids.append(NO_TITLE)
+            return
+        title_id = self._interned.get(title)
+        if title_id is None:
+            title_id = self._interned[title] = len(self.titles)
+            self.titles.append(title)
+        self.title_ids.append(title_id)
+
+    def extend(self, doc_ids: Iterable[int], documents: Iterable[str]):
+        for doc_id, doc in zip(doc_ids, documents):
+            self.add(doc_id, doc)
+
+    def build(self) -> DocumentStore:
+        # The store takes over the buffer rather than copying it; the builder is spent
+        store = DocumentStore(self.buffer, self.offsets, self.doc_ids, self.title_ids, self.titles)
+        self.__init__()
+        return store
@@ -0,0 +1,331 @@
+"""Approximate dense retrieval backed by FAISS IVF-Flat or HNSW indexes"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .vector_index import HashingEmbedder, embed_documents, l2_normalize, stack_rows
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu is optional; BaseRAGAgent falls back to exact search
+    faiss = None
+
+FAISS_INDEX_TYPES = ("ivf_flat", "hnsw")
+
+# FAISS switches its flat (IVF quantizer) search to BLAS from 20 queries up,
+# which changes rounding; batches are searched in chunks below that so a
+# query gets the same answer alone or in a batch
+BATCH_CHUNK = 16
+
+# k-means wants about this many training points per IVF list
+IVF_POINTS_PER_LIST = 39
+
+# Indexes persist here unless an explicit index_path is given; a user cache
+# directory rather than the package, which may be installed read-only
+DEFAULT_INDEX_DIR = os.getenv("APEX_INDEX_DIR") or os.path.join(
+    os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "apex", "indexes")
+
+
+class FaissVectorIndex:
+    """Cosine-similarity search over an IVF-Flat or HNSW FAISS index
+
+    When ``index_path`` is set the built index is written to disk together
+    with a fingerprint of the corpus and build parameters. Later builds over
+    the same corpus (a restart, another worker process) skip embedding and
+    training and memory-map the file instead, so the vectors live once in the
+    page cache rather than once per process.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[HashingEmbedder] = None,
+        index_type: str = "hnsw",
+        nlist: int = 100,
+        nprobe: int = 8,
+        m: int = 32,
+        ef_construction: int = 80,
+        ef_search: int = 64,
+        index_path: Optional[str] = None,
+    ):
+        if faiss is None:
+            raise ImportError("FaissVectorIndex requires the faiss-cpu package")
+        if index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {FAISS_INDEX_TYPES}")
+        self.embedder = embedder or HashingEmbedder()
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index_path = index_path
+        self.index = None
+        self.loaded_from_disk = False
+        # Incremental build state between the first add() and finalize()
+        self._digest = None
+        self._pending: List[np.ndarray] = []
+
+    @property
+    def num_docs(self) -> int:
+        return self.index.ntotal if self.index is not None else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the vectors and search structures, from the index's own counts"""
+        index = self.index
+        if index is None:
+            return 0
+        if self.index_type == "ivf_flat":
+            # Vector codes and ids in the inverted lists, plus the centroids
+            return index.ntotal * (index.code_size + 8) + index.nlist * index.d * 4
+        hnsw = index.hnsw
+        return (index.ntotal * index.d * 4 + hnsw.neighbors.size() * 4 + hnsw.offsets.size() * 8 +
+                hnsw.levels.size() * 4)
+
+    @property
+    def mapped_nbytes(self) -> int:
+        """The part of nbytes served from the mapped file: the flat vector storage only
+
+        HNSW graph arrays and IVF centroids are read into process memory even
+        when the index is loaded from disk.
+        """
+        if self.index is None or not self.loaded_from_disk:
+            return 0
+        return self.index.ntotal * self.index.d * 4
+
+    @property
+    def params(self) -> Dict:
+        if self.index_type == "ivf_flat":
+            return {"index_type": self.index_type, "nlist": self.nlist, "nprobe": self.nprobe}
+        return {"index_type": self.index_type, "m": self.m,
+                "ef_construction": self.ef_construction, "ef_search": self.ef_search}
+
+    def _new_digest(self):
+        digest = hashlib.sha256()
+        build_params = dict(self.params, dim=self.embedder.dim, embedder=type(self.embedder).__name__)
+        # Search-time knobs do not invalidate a persisted index
+        build_params.pop("nprobe", None)
+        build_params.pop("ef_search", None)
+        digest.update(json.dumps(build_params, sort_keys=True).encode("utf-8"))
+        return digest
+
+    @staticmethod
+    def _update_digest(digest, documents: Iterable[str]):
+        for doc in documents:
+            digest.update(doc.encode("utf-8"))
+            digest.update(b"\0")
+
+    def _fingerprint(self, documents: Iterable[str]) -> str:
+        digest = self._new_digest()
+        self._update_digest(digest, documents)
+        return digest.hexdigest()
+
+    def _meta_path(self) -> str:
+        return self.index_path + ".meta.json"
+
+    def _create(self, vectors: np.ndarray):
+        n, dim = vectors.shape
+        if self.index_type == "ivf_flat":
+            # Keep enough training points per centroid for k-means to be meaningful
+            nlist = max(1, min(self.nlist, n // IVF_POINTS_PER_LIST))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(dim, self.m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+        index.add(vectors)
+        return index
+
+    def _configure(self, index):
+        if self.index_type == "ivf_flat":
+            index.nprobe = self.nprobe
+        else:
+            index.hnsw.efSearch = self.ef_search
+        return index
+
+    def _read_mmap(self):
+        # IVF inverted lists and HNSW flat storage are mapped, not copied
+        flags = faiss.IO_FLAG_MMAP if self.index_type == "ivf_flat" else faiss.IO_FLAG_MMAP_IFC
+        return faiss.read_index(self.index_path, flags)
+
+    def _load_if_current(self, fingerprint: str) -> bool:
+        if not (os.path.exists(self.index_path) and os.path.exists(self._meta_path())):
+            return False
+        try:
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") != fingerprint:
+                return False
+            self.index = self._configure(self._read_mmap())
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"Ignoring unreadable FAISS index {self.index_path}: {e}")
+            return False
+        self.loaded_from_disk = True
+        return True
+
+    def build(self, documents: Iterable[str], batch_size: Optional[int] = None):
+        """Build the index, or map a persisted one built from the same corpus
+
+        With an index_path, documents is iterated twice (fingerprint, then
+        embedding), so pass a sequence or a re-iterable store, not a generator.
+        With a batch_size the vectors are embedded and added batch by batch
+        through add() and finalize(), so they are never all held at once.
+        """
+        fingerprint = self._fingerprint(documents) if self.index_path else None
+        if self.index_path and self._load_if_current(fingerprint):
+            return
+
+        self.loaded_from_disk = False
+        if batch_size:
+            iterator = iter(documents)
+            while True:
+                batch = list(itertools.islice(iterator, batch_size))
+                if not batch:
+                    break
+                self.add(batch)
+            self.finalize()
+            return
+        vectors = embed_documents(self.embedder, documents)
+        index = self._create(vectors)
+        del vectors  # FAISS holds its own copy
+        self._install(index, fingerprint)
+
+    def add(self, documents: List[str]):
+        """Add a batch to an index under construction; it becomes searchable at finalize()
+
+        HNSW takes every batch as it comes. IVF buffers vectors only until it
+        has enough to train its lists, so memory stays bounded either way.
+        """
+        if self._digest is None:
+            self._digest = self._new_digest()
+            self._pending = []
+            self.index = None
+            self.loaded_from_disk = False
+        if self.index_path:
+            self._update_digest(self._digest, documents)
+        vectors = embed_documents(self.embedder, documents)
+        if self.index is not None:
+            self.index.add(vectors)
+            return
+        self._pending.append(vectors)
+        buffered = sum(len(chunk) for chunk in self._pending)
+        if self.index_type == "hnsw" or buffered >= self.nlist * IVF_POINTS_PER_LIST:
+            self.index = self._create(stack_rows(self._pending, self.embedder.dim))
+
+    def finalize(self):
+        """Finish an incremental build: train on what is buffered if needed, then persist"""
+        if self._digest is None:
+            return
+        fingerprint = self._digest.hexdigest()
+        self._digest = None
+        index = self.index
+        if index is None and self._pending:
+            index = self._create(stack_rows(self._pending, self.embedder.dim))
+        self.index = None
+        if index is not None:
+            self._install(index, fingerprint)
+
+    def _install(self, index, fingerprint: str):
+        if not self.index_path:
+            self.index = self._configure(index)
+            return
+
+        # Write both files to temp names and rename so concurrent workers never
+        # map a half-written index or read half-written meta. The old meta goes
+        # first: between the two renames a reader finds no meta and rebuilds
+        # rather than trusting an old fingerprint for the new index
+        meta_path = self._meta_path()
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        tmp_meta_path = f"{meta_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            faiss.write_index(index, tmp_path)
+            with open(tmp_meta_path, "w") as f:
+                json.dump(dict(self.params, fingerprint=fingerprint, num_docs=index.ntotal), f)
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            os.replace(tmp_path, self.index_path)
+            os.replace(tmp_meta_path, meta_path)
+            mapped = self._read_mmap()
+        except (OSError, RuntimeError) as e:
+            # A read-only deploy still serves from the index built in memory
+            print(f"Not persisting FAISS index {self.index_path}: {e}")
+            for path in (tmp_path, tmp_meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.index = self._configure(index)
+            return
+        # Drop the built copy in favour of the mapping
+        del index
+        self.index = self._configure(mapped)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return l2_normalize(self.embedder.embed(queries))
+
+    def search_vectors(self, vectors: np.ndarray, k: int,
+                       exclude: Collection[int] = ()) -> List[List[Tuple[int, float]]]:
+        """Approximate top-k for each row of normalised query vectors, skipping excluded positions"""
+        if self.num_docs == 0 or k <= 0:
+            return [[] for _ in range(len(vectors))]
+        # Over-fetch by the number of exclusions so filtering cannot starve the result
+        fetch = min(k + len(exclude), self.num_docs)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        results = []
+        for start in range(0, len(vectors), BATCH_CHUNK):
+            scores, ids = self.index.search(vectors[start:start + BATCH_CHUNK], fetch)
+            for row_ids, row_scores in zip(ids, scores):
+                hits = [(int(i), float(s)) for i, s in zip(row_ids, row_scores)
+                        if i >= 0 and s > 0.0 and int(i) not in exclude]
+                results.append(hits[:k])
+        return results
+
+    def search_vector(self, vector: np.ndarray, k: int, exclude: Collection[int] = ()) -> List[Tuple[int, float]]:
+        """Approximate top-k for one normalised query vector, skipping excluded positions"""
+        return self.search_vectors(vector[None, :], k, exclude)[0]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return the approximate top-k (doc position, cosine similarity) pairs"""
+        return self.search_vector(self.embed_query(query), k)
+
+
+def compare_with_exact(approx_search: Callable, exact_search: Callable, queries: List[str], k: int = 10) -> Dict:
+    """Measure recall@k and per-query latency of an approximate search against exact search
+
+    Both callables take (query, k) and return ranked (key, score) pairs; keys
+    must identify the same document on both sides.
+    """
+    recalls = []
+    approx_ms = []
+    exact_ms = []
+    for query in queries:
+        start = time.perf_counter()
+        approx = approx_search(query, k)
+        approx_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        exact = exact_search(query, k)
+        exact_ms.append((time.perf_counter() - start) * 1000)
+
+        if exact:
+            expected = {key for key, _ in exact}
+            recalls.append(len(expected & {key for key, _ in approx}) / len(expected))
+
+    return {
+        "queries": len(queries),
+        "k": k,
+        f"recall_at_{k}": float(np.mean(recalls)) if recalls else None,
+        "approx_latency_ms": {"p50": float(np.percentile(approx_ms, 50)), "p95": float(np.percentile(approx_ms, 95))} if approx_ms else None,
+        "exact_latency_ms": {"p50": float(np.percentile(exact_ms, 50)), "p95": float(np.percentile(exact_ms, 95))} if exact_ms else None,
+    }
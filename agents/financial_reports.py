@@ -1,6 +1,7 @@
 """NutraFuel Financial Report Generator - Backend Admin"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 FINANCIAL_REPORTS_PROMPT = """You are APEX's Financial Report Generator AI.
 
@@ -64,7 +65,7 @@ agent = BaseRAGAgent(
 
 # Load essential data to prevent timeouts - focus on key financial metrics
 essential_financial_data = FINANCIAL_PERFORMANCE_DATA + QUARTERLY_COMPARISON_DATA  # Core financial data most commonly requested
-agent.add_documents(essential_financial_data)
+load_corpus(agent, essential_financial_data)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""Rank fusion for combining lexical and vector retrieval results"""
+
+import heapq
+from typing import Dict, List, Sequence, Tuple
+
+# Standard RRF damping constant (Cormack et al.); larger values flatten the
+# advantage of the very top ranks
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Tuple[int, float]]], k: int = 3,
+                           rrf_k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuse ranked (doc position, score) lists into one top-k list
+
+    Each document scores sum(1 / (rrf_k + rank)) over the lists it appears
+    in; the raw scores are ignored, so BM25 and cosine values never need to
+    be calibrated against each other. Scores are divided by the best possible
+    sum, first place in every list, so they fall in (0, 1] like the other
+    retrieval modes' relevance scores instead of around 0.03. The work is
+    linear in the total number of candidates plus a k-sized heap selection.
+    """
+    fused: Dict[int, float] = {}
+    scale = (rrf_k + 1) / max(len(rankings), 1)
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking, 1):
+            fused[doc] = fused.get(doc, 0.0) + scale / (rrf_k + rank)
+    # Ties go to the earlier document so results are deterministic
+    return heapq.nlargest(k, fused.items(), key=lambda item: (item[1], -item[0]))
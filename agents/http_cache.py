@@ -0,0 +1,58 @@
+"""Strong ETags and conditional-request checks for HTTP caching"""
+
+import hashlib
+from typing import Iterable, Union
+
+# Cache-Control for each kind of route. Listings only change on deploy;
+# query answers change when an agent's corpus is reloaded, so they are kept
+# briefly and then revalidated with their ETag (a 304 costs no retrieval)
+CACHE_CONTROL_STATIC = "public, max-age=300"
+CACHE_CONTROL_QUERY = "public, max-age=60"
+CACHE_CONTROL_LIVE = "no-store"
+
+
+def _part_bytes(part: Union[str, bytes, int]) -> bytes:
+    if isinstance(part, bytes):
+        return part
+    return str(part).encode("utf-8")
+
+
+def make_etag(*parts: Union[str, bytes, int]) -> str:
+    """Strong ETag over the given parts, quoted as sent in the header
+
+    Parts are length-prefixed before hashing, so ("ab", "c") and ("a", "bc")
+    get different tags.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        data = _part_bytes(part)
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return f'"{digest.hexdigest()}"'
+
+
+def content_version(*parts: Union[str, bytes, int]) -> str:
+    """Digest of everything that shapes response bodies besides the request itself
+
+    Mixed into every query ETag, so tags change when a deploy changes the
+    agents, their canned answers or the response format.
+    """
+    return make_etag(*parts).strip('"')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match: a W/
+    prefix on either side is ignored.
+    """
+    if not if_none_match:
+        return False
+    candidates: Iterable[str] = (candidate.strip() for candidate in if_none_match.split(","))
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in candidates:
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
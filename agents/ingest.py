@@ -0,0 +1,213 @@
+"""Streaming corpus ingestion from JSONL and CSV exports
+
+Records are read one at a time through generators and handed to the agent
+in fixed-size batches, each of which is appended to the compact store and
+indexes straight away. Peak memory is therefore the finished indexes plus one
+batch, not the size of the export.
+"""
+
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .corpus_file import CORPUS_EXTENSION, write_corpus
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+DEFAULT_BATCH_SIZE = int(os.getenv("APEX_INGEST_BATCH_SIZE", "2000"))
+
+# Seconds between progress lines while an ingest is running
+PROGRESS_INTERVAL = 5.0
+
+# Review exports can carry very long free-text fields
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def record_text(record: Dict, text_field: str = "text", title_field: Optional[str] = "title") -> str:
+    """Document text for a record, as "Title: text" when the record has a title
+
+    The title prefix is what the document store picks up as the source title.
+    """
+    text = str(record.get(text_field) or "").strip()
+    title = str(record.get(title_field) or "").strip() if title_field else ""
+    return f"{title}: {text}" if title and text else text
+
+
+def _records(path: str, rows: Iterable[Tuple[int, Dict]], text_field: str, id_field: str,
+             title_field: Optional[str]) -> Iterator[Tuple[int, str]]:
+    # Records without an id are numbered by their line in the file. Those
+    # numbers would collide with explicit ids, so a file must use one or the
+    # other throughout; its first record decides which
+    numbered = None
+    for number, row in rows:
+        text = record_text(row, text_field, title_field)
+        if not text:
+            continue
+        raw_id = row.get(id_field)
+        missing = raw_id in (None, "")
+        if numbered is None:
+            numbered = missing
+        elif missing != numbered:
+            which = "has no" if missing else "has an"
+            raise ValueError(f"{path}:{number}: record {which} {id_field!r} unlike the first record; "
+                             f"give every record an id or none")
+        if missing:
+            yield number, text
+            continue
+        try:
+            doc_id = int(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}:{number}: id must be an integer, got {raw_id!r}") from None
+        yield doc_id, text
+
+
+def read_jsonl(path: str, text_field: str = "text", id_field: str = "id",
+               title_field: Optional[str] = "title") -> Iterator[Tuple[int, str]]:
+    """Yield (id, text) pairs from a JSON Lines file, one line at a time"""
+    def rows():
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON ({e})") from None
+    return _records(path, rows(), text_field, id_field, title_field)
+
+
+def read_csv(path: str, text_field: str = "text", id_field: str = "id",
+             title_field: Optional[str] = "title") -> Iterator[Tuple[int, str]]:
+    """Yield (id, text) pairs from a CSV file with a header row, one row at a time"""
+    def rows():
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            # line_num counts physical lines read so far, header and quoted
+            # newlines included, so it is the line on which the row ends
+            for row in reader:
+                yield reader.line_num, row
+    return _records(path, rows(), text_field, id_field, title_field)
+
+
+def read_records(path: str, **fields) -> Iterator[Tuple[int, str]]:
+    """Pick the reader from the file extension (.jsonl/.ndjson or .csv)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return read_jsonl(path, **fields)
+    if extension == ".csv":
+        return read_csv(path, **fields)
+    raise ValueError(f"Unsupported corpus format '{extension}', expected .jsonl, .ndjson or .csv")
+
+
+def batched(records: Iterable[Tuple[int, str]], batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Group records into lists of at most batch_size"""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    iterator = iter(records)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class IngestProgress:
+    """Counts ingested documents and prints throughput every PROGRESS_INTERVAL seconds"""
+
+    def __init__(self, label: str, interval: float = PROGRESS_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self.documents = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __call__(self, batch_documents: int):
+        self.documents += batch_documents
+        self.batches += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            print(f"[ingest] {self.label}: {self.documents:,} docs in {self.elapsed:.1f}s "
+                  f"({self.docs_per_second:,.0f} docs/s)")
+
+
+def ingest(agent, records: Iterable[Tuple[int, str]], batch_size: int = DEFAULT_BATCH_SIZE,
+           label: Optional[str] = None) -> Dict:
+    """Replace an agent's corpus from a stream of (id, text) records
+
+    Readers keep using the previous corpus until the whole stream is in.
+    Returns counts, timings and throughput.
+    """
+    progress = IngestProgress(label or agent.name)
+    loaded = agent.load_batches(batched(records, batch_size), on_batch=progress)
+    total_seconds = progress.elapsed
+
+    stats = {
+        "agent": agent.name,
+        "documents": loaded,
+        "records": progress.documents,
+        "batches": progress.batches,
+        "batch_size": batch_size,
+        "total_seconds": round(total_seconds, 3),
+        "docs_per_second": round(progress.documents / total_seconds, 1) if total_seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    print(f"[ingest] {stats['agent']}: {loaded:,} docs from {progress.batches} batches in "
+          f"{total_seconds:.1f}s ({stats['docs_per_second'] or 0:,.0f} docs/s)")
+    return stats
+
+
+def ingest_file(agent, path: str, batch_size: int = DEFAULT_BATCH_SIZE, **fields) -> Dict:
+    """Stream a JSONL or CSV export into an agent; field names are passed to the reader"""
+    stats = ingest(agent, read_records(path, **fields), batch_size, label=f"{agent.name} <- {path}")
+    stats["path"] = path
+    return stats
+
+
+def corpus_path_env(agent_name: str) -> str:
+    """Environment variable that points an agent at an external corpus file"""
+    return f"{agent_name.upper()}_CORPUS_PATH"
+
+
+def convert_to_corpus_file(path: str, corpus_path: str, **fields) -> int:
+    """Stream a JSONL or CSV export into a memory-mappable corpus file"""
+    return write_corpus(corpus_path, read_records(path, **fields))
+
+
+def load_corpus(agent, default_documents: List[str]):
+    """Load the agent's corpus from its *_CORPUS_PATH file if set, else the built-in documents
+
+    A .corpus file is memory-mapped; JSONL and CSV exports are streamed in.
+    """
+    path = os.getenv(corpus_path_env(agent.name))
+    if path and path.endswith(CORPUS_EXTENSION):
+        agent.load_corpus_file(path)
+    elif path:
+        ingest_file(agent, path)
+    else:
+        agent.add_documents(default_documents)
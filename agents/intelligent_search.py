@@ -1,6 +1,7 @@
 """NutraFuel Intelligent Search AI Agent - Frontend"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 INTELLIGENT_SEARCH_PROMPT = """You are NutraFuel's Intelligent Product Search AI! 🔍
 
@@ -57,11 +58,12 @@ STACK_RECOMMENDATIONS_DATA = [
 # Create agent instance
 agent = BaseRAGAgent(
     name="intelligent_search",
-    system_prompt=INTELLIGENT_SEARCH_PROMPT
+    system_prompt=INTELLIGENT_SEARCH_PROMPT,
+    retrieval_mode="hybrid"  # Exact product/order terms plus goal-style questions
 )
 
 # Load data into vector store
-agent.add_documents(PRODUCT_SEARCH_DATA + STACK_RECOMMENDATIONS_DATA)
+load_corpus(agent, PRODUCT_SEARCH_DATA + STACK_RECOMMENDATIONS_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
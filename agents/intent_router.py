@@ -0,0 +1,109 @@
+"""Keyword intent routing compiled into a single matching automaton"""
+
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+
+class Intent(NamedTuple):
+    """An intent fires when any of its keywords occurs in the lowercased query"""
+    name: str
+    keywords: Tuple[str, ...]
+    response: str
+
+
+class AgentIntents(NamedTuple):
+    """An agent's intents in priority order, plus the response when none fires"""
+    intents: Sequence[Intent]
+    default: str
+
+
+class KeywordAutomaton:
+    """Finds every occurrence of a fixed set of keywords in one pass
+
+    The keywords are compiled into a trie and the trie into a single regex
+    (``fa(?:st|t)|...``), so each step of the scan follows one trie branch
+    in C instead of testing keywords one by one, and adding keywords does
+    not add a pass over the text. A lookahead reports the longest keyword
+    starting at each position; every shorter keyword starting there is a
+    prefix of it, so those are filled in from a precomputed table.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        if not all(self.keywords):
+            raise ValueError("Keywords must be non-empty")
+        self._index = index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        # keyword index -> indexes of itself and every keyword that is a prefix of it
+        self._prefixes: List[Tuple[int, ...]] = [
+            tuple(index[keyword[:end]] for end in range(1, len(keyword) + 1) if keyword[:end] in index)
+            for keyword in self.keywords
+        ]
+        trie: Dict = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self._pattern = re.compile(f"(?=({self._trie_regex(trie)}))") if self.keywords else None
+
+    @classmethod
+    def _trie_regex(cls, node: Dict) -> str:
+        branches = [re.escape(char) + cls._trie_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Longer matches first: a keyword that ends here is only the fallback
+        return f"(?:{body})?" if "" in node else body
+
+    def find(self, text: str) -> Set[int]:
+        """Indexes (into ``keywords``) of every keyword that occurs in text"""
+        found: Set[int] = set()
+        if self._pattern is None:
+            return found
+        index, prefixes = self._index, self._prefixes
+        for keyword in set(self._pattern.findall(text)):
+            found.update(prefixes[index[keyword]])
+        return found
+
+
+class IntentRouter:
+    """Routes (agent, query) to a response using every agent's intent table at once
+
+    All keywords of all agents are compiled into one automaton at
+    construction; a query is scanned once and the first of the agent's
+    intents (in declaration order) with a matching keyword wins.
+    """
+
+    def __init__(self, agent_intents: Mapping[str, AgentIntents]):
+        self.agent_intents = dict(agent_intents)
+        # keyword -> [(agent, intent priority)], the same keyword may serve several intents
+        targets: Dict[str, List[Tuple[str, int]]] = {}
+        for agent_name, table in self.agent_intents.items():
+            for priority, intent in enumerate(table.intents):
+                for keyword in intent.keywords:
+                    targets.setdefault(keyword.lower(), []).append((agent_name, priority))
+        self.automaton = KeywordAutomaton(targets)
+        self._targets = [targets[keyword] for keyword in self.automaton.keywords]
+
+    def __contains__(self, agent_name: str) -> bool:
+        return agent_name in self.agent_intents
+
+    def match(self, agent_name: str, query: str) -> Optional[Intent]:
+        """The agent's highest-priority intent triggered by query, or None"""
+        table = self.agent_intents.get(agent_name)
+        if table is None or not table.intents:
+            return None
+        best = None
+        for keyword_index in self.automaton.find(query.lower()):
+            for target_agent, priority in self._targets[keyword_index]:
+                if target_agent == agent_name and (best is None or priority < best):
+                    best = priority
+        return table.intents[best] if best is not None else None
+
+    def respond(self, agent_name: str, query: str) -> Optional[str]:
+        """The canned response for query, or None for agents without an intent table"""
+        table = self.agent_intents.get(agent_name)
+        if table is None:
+            return None
+        intent = self.match(agent_name, query)
+        return intent.response if intent is not None else table.default
@@ -1,6 +1,7 @@
 """NutraFuel Dynamic Landing Page Generator - Backend Admin"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 LANDING_PAGE_GENERATOR_PROMPT = """You are APEX's Dynamic Landing Page Generator AI.
 
@@ -80,7 +81,7 @@ agent = BaseRAGAgent(
 
 # Load only essential data to prevent timeouts - reduced document set
 essential_data = LANDING_PAGE_TEMPLATES_DATA + PREMIUM_WEIGHT_LOSS_LANDING_PAGE  # Focus on core templates and premium content
-agent.add_documents(essential_data)
+load_corpus(agent, essential_data)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Lexical retrieval: tokenizer, inverted index and BM25 scoring"""
+
+import bisect
+import heapq
+import math
+import re
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Alphanumeric runs, keeping hyphenated compounds ("pre-workout") and
+# decimals ("4.7") together so exact product terms survive tokenization
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'.][a-z0-9]+)*")
+
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "vs",
+    "was", "with", "what", "how", "i", "me", "my", "you", "your", "we", "do"
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into index terms"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if '-' in token:
+            # Index the parts and the joined form so "workout" and
+            # "preworkout" both reach a "pre-workout" document
+            tokens.extend(part for part in token.split('-') if part not in STOPWORDS)
+            tokens.append(token.replace('-', ''))
+    return tokens
+
+
+def query_terms(query: str) -> List[Tuple[str, int]]:
+    """Unique query terms with their frequencies, in a canonical (sorted) order"""
+    return sorted(Counter(tokenize(query)).items())
+
+
+def bm25_idf(num_docs: int, df: int) -> float:
+    """Non-negative BM25 inverse document frequency"""
+    return math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+
+
+class LexicalIndex:
+    """Inverted index over a fixed list of documents, scored with BM25
+
+    Corpus statistics (document count, average length, document
+    frequencies) can be supplied by the caller, so several indexes over
+    disjoint slices of one corpus produce directly comparable scores.
+
+    Postings are collected in a dict of arrays while documents are added.
+    ``freeze()`` then packs them into a handful of flat arrays with a
+    hash-sorted term table, so a finished index holds no per-term Python
+    objects: nothing the garbage collector scans or a lookup increfs, and
+    pages inherited by forked workers stay shared.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> (doc positions, term frequencies), doc positions ascending; None once frozen
+        self.postings: Optional[Dict[str, Tuple[array, array]]] = {}
+        self.doc_lengths = array('I')
+        self.total_length = 0
+        # Frozen layout: term i is term_blob[term_offsets[i]:term_offsets[i + 1]] (UTF-8),
+        # terms sorted by term_hashes; its postings are [posting_offsets[i], posting_offsets[i + 1])
+        self.term_hashes = array('I')
+        self.term_offsets = array('Q', [0])
+        self.term_blob = b""
+        self.posting_offsets = array('Q', [0])
+        self.posting_docs = np.zeros(0, dtype=np.uint32)
+        self.posting_tfs = np.zeros(0, dtype=np.uint32)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_length / self.num_docs if self.num_docs else 0.0
+
+    @property
+    def frozen(self) -> bool:
+        return self.postings is None
+
+    @property
+    def num_terms(self) -> int:
+        return len(self.term_hashes) if self.frozen else len(self.postings)
+
+    def document_frequency(self, term: str) -> int:
+        return self.document_frequencies([term])[0]
+
+    def build(self, documents: Iterable[str]):
+        """Index documents in order; position i in the iterable becomes doc i"""
+        self.postings = {}
+        self.doc_lengths = array('I')
+        self.total_length = 0
+        self.add(documents)
+
+    def add(self, documents: Iterable[str]):
+        """Append documents after the ones already indexed, so a corpus can be indexed batch by batch"""
+        if self.frozen:
+            raise ValueError("Cannot add documents to a frozen lexical index")
+        postings = self.postings
+        doc_lengths = self.doc_lengths
+        for position, doc in enumerate(documents, len(doc_lengths)):
+            counts = Counter(tokenize(doc))
+            length = sum(counts.values())
+            doc_lengths.append(length)
+            self.total_length += length
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array('I'), array('I'))
+                entry[0].append(position)
+                entry[1].append(tf)
+
+    def freeze(self):
+        """Pack the postings into flat arrays; the index is read-only afterwards"""
+        if self.frozen:
+            return
+        encoded = sorted((zlib.crc32(data), data, term) for term, data in
+                         ((term, term.encode("utf-8")) for term in self.postings))
+        self.term_hashes = array('I', (term_hash for term_hash, _, _ in encoded))
+        self.term_offsets = array('Q', [0])
+        self.posting_offsets = array('Q', [0])
+        for _, data, term in encoded:
+            self.term_offsets.append(self.term_offsets[-1] + len(data))
+            self.posting_offsets.append(self.posting_offsets[-1] + len(self.postings[term][0]))
+        self.term_blob = b"".join(data for _, data, _ in encoded)
+        self.posting_docs = np.empty(self.posting_offsets[-1], dtype=np.uint32)
+        self.posting_tfs = np.empty(self.posting_offsets[-1], dtype=np.uint32)
+        for i, (_, _, term) in enumerate(encoded):
+            docs, tfs = self.postings[term]
+            start, end = self.posting_offsets[i], self.posting_offsets[i + 1]
+            self.posting_docs[start:end] = np.frombuffer(docs, dtype='I')
+            self.posting_tfs[start:end] = np.frombuffer(tfs, dtype='I')
+        self.postings = None
+
+    def term_slot(self, term: str) -> int:
+        """Row of term in the frozen term table, or -1 when it is not indexed"""
+        data = term.encode("utf-8")
+        term_hash = zlib.crc32(data)
+        hashes, offsets = self.term_hashes, self.term_offsets
+        slot = bisect.bisect_left(hashes, term_hash)
+        # Equal hashes sit next to each other; the stored bytes tell them apart
+        while slot < len(hashes) and hashes[slot] == term_hash:
+            if self.term_blob[offsets[slot]:offsets[slot + 1]] == data:
+                return slot
+            slot += 1
+        return -1
+
+    def postings_many(self, terms: List[str]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(doc positions, term frequencies) per term as uint32 arrays, empty for absent terms"""
+        none = (self.posting_docs[:0], self.posting_tfs[:0])
+        if not self.frozen:
+            entries = [self.postings.get(term) for term in terms]
+            return [(np.frombuffer(entry[0], dtype='I'), np.frombuffer(entry[1], dtype='I'))
+                    if entry is not None else none for entry in entries]
+        result = []
+        for term in terms:
+            slot = self.term_slot(term)
+            if slot < 0:
+                result.append(none)
+                continue
+            start, end = self.posting_offsets[slot], self.posting_offsets[slot + 1]
+            result.append((self.posting_docs[start:end], self.posting_tfs[start:end]))
+        return result
+
+    def document_frequencies(self, terms: List[str]) -> List[int]:
+        if not self.frozen:
+            return [len(self.postings[term][0]) if term in self.postings else 0 for term in terms]
+        offsets = self.posting_offsets
+        return [offsets[slot + 1] - offsets[slot] if slot >= 0 else 0 for slot in map(self.term_slot, terms)]
+
+    @property
+    def nbytes(self) -> int:
+        tables = (self.term_hashes, self.term_offsets, self.posting_offsets, self.doc_lengths)
+        return (sum(memoryview(table).nbytes for table in tables) + len(self.term_blob) +
+                self.posting_docs.nbytes + self.posting_tfs.nbytes)
+
+    def weighted_terms(self, query: str) -> List[Tuple[str, float]]:
+        """Query terms weighted by idf * query frequency using this index's own statistics"""
+        n = self.num_docs
+        weighted = []
+        for term, qtf in query_terms(query):
+            df = self.document_frequency(term)
+            if df:
+                weighted.append((term, bm25_idf(n, df) * qtf))
+        return weighted
+
+    def accumulate_many(self, batch_terms: List[Tuple[str, List[Tuple[int, float]]]], avgdl: float,
+                        num_queries: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Score a batch of queries over the postings of their terms only
+
+        batch_terms lists (term, [(query number, weight), ...]) in canonical
+        term order. Each term's postings are read and turned into BM25 gains
+        once, however many queries use the term. Returns, per query, the
+        matched doc positions (ascending) and their scores. Contributions are
+        summed in term order, so a query scores identically alone or in a batch.
+        """
+        empty = (np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float64))
+        if not self.num_terms:
+            return [empty] * num_queries
+        k1_plus_1 = self.k1 + 1.0
+        # Length normalisation k1 * (1 - b + b * dl / avgdl) split into constants
+        norm_base = self.k1 * (1.0 - self.b)
+        norm_scale = self.k1 * self.b / (avgdl or 1.0)
+        lengths = np.frombuffer(self.doc_lengths, dtype='I')
+
+        doc_parts: List[List[np.ndarray]] = [[] for _ in range(num_queries)]
+        score_parts: List[List[np.ndarray]] = [[] for _ in range(num_queries)]
+        for (term, users), (docs, tf) in zip(batch_terms, self.postings_many([term for term, _ in batch_terms])):
+            if not len(docs):
+                continue
+            tf = tf.astype(np.float64)
+            gain = tf * k1_plus_1 / (tf + norm_base + norm_scale * lengths[docs])
+            for query_number, weight in users:
+                doc_parts[query_number].append(docs)
+                score_parts[query_number].append(weight * gain)
+
+        results = []
+        for docs_list, scores_list in zip(doc_parts, score_parts):
+            if not docs_list:
+                results.append(empty)
+                continue
+            # bincount adds in order of appearance, i.e. term by term
+            unique, inverse = np.unique(np.concatenate(docs_list), return_inverse=True)
+            results.append((unique, np.bincount(inverse, weights=np.concatenate(scores_list))))
+        return results
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return the top-k (doc position, BM25 score) pairs, best first
+
+        Only the postings of the query terms are visited, so the cost tracks
+        the number of matching postings rather than the corpus size.
+        """
+        if k <= 0 or not self.num_terms:
+            return []
+        batch_terms = [(term, [(0, weight)]) for term, weight in self.weighted_terms(query)]
+        docs, scores = self.accumulate_many(batch_terms, self.avgdl, 1)[0]
+        return top_k_arrays(docs, scores, k)
+
+
+def top_scores(items: Iterable[Tuple[int, float]], k: int) -> List[Tuple[int, float]]:
+    """Heap-select the k best (position, score) pairs; ties go to the earlier position"""
+    return heapq.nlargest(k, items, key=lambda item: (item[1], -item[0]))
+
+
+def top_k_arrays(positions: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Select the k best (position, score) pairs from parallel arrays; ties go to the earlier position"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return []
+    if k < n:
+        # Keep everything tied with the k-th score so the tie-break stays exact
+        kth = np.partition(scores, n - k)[n - k]
+        keep = scores >= kth
+        positions, scores = positions[keep], scores[keep]
+    order = np.lexsort((positions, -scores))[:k]
+    return [(int(positions[i]), float(scores[i])) for i in order]
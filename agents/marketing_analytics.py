@@ -1,6 +1,7 @@
 """NutraFuel Product Analytics AI Agent"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 PRODUCT_ANALYTICS_PROMPT = """You are a professional nutrition and supplement analytics AI providing insights for NutraFuel.
 
@@ -63,7 +64,7 @@ agent = BaseRAGAgent(
 
 # Load essential data to prevent timeouts - focus on performance and customer data
 essential_analytics_data = PRODUCT_PERFORMANCE_DATA + CUSTOMER_PERFORMANCE_DATA  # Core metrics most commonly requested
-agent.add_documents(essential_analytics_data)
+load_corpus(agent, essential_analytics_data)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""Per-request stage timing and Prometheus metrics with preallocated histograms
+
+A request's stages are recorded on a RequestTimer held in a context
+variable, so code anywhere under the request (handlers, helpers awaited by
+them) can mark a stage without the timer being passed around. Code running
+on the executor sees no timer, so its work is timed as a whole by the
+stage its caller marks after awaiting it. The timer
+becomes the request's ``Server-Timing`` header, and its stages feed
+histograms whose bucket arrays are allocated up front: recording is a
+bisect and two in-place array updates, a few microseconds per request.
+"""
+
+import bisect
+import time
+from array import array
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds; retrieval and response assembly usually finish
+# well under a millisecond, streamed and overloaded requests take seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages of a query request, in the order they happen
+STAGES = ("routing", "intent", "retrieval", "generation", "serialization")
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; counts are per bucket, cumulated only on export"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = array('Q', bytes(8 * (len(self.bounds) + 1)))  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class RequestTimer:
+    """Stage durations of one request, in the order they were recorded"""
+
+    __slots__ = ("start", "last", "stages", "agent")
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.agent = ""
+
+    def mark(self, stage: str):
+        """Close stage at the current time; it covers everything since the previous mark"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def server_timing(self) -> bytes:
+        """``Server-Timing`` header value, durations in milliseconds"""
+        parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.3f}")
+        return ", ".join(parts).encode("latin-1")
+
+
+CURRENT_TIMER: ContextVar[Optional[RequestTimer]] = ContextVar("apex_request_timer", default=None)
+
+
+def mark(stage: str):
+    """Close stage on the current request's timer, if there is one"""
+    timer = CURRENT_TIMER.get()
+    if timer is not None:
+        timer.mark(stage)
+
+
+def set_agent(agent_name: str):
+    """Label the current request's metrics with the agent it was routed to"""
+    timer = CURRENT_TIMER.get()
+    if timer is not None:
+        timer.agent = agent_name
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Request counters and latency histograms for the agents known at startup
+
+    Histograms for every (agent, stage) pair are created in the constructor,
+    so recording never allocates one. Requests for unknown agents or
+    without an agent are recorded under agent "".
+    """
+
+    def __init__(self, agents: Iterable[str], stages: Sequence[str] = STAGES):
+        self.started = time.time()
+        self.agents = ("",) + tuple(agents)
+        self.stages = tuple(stages)
+        self.request_seconds: Dict[str, Histogram] = {agent: Histogram() for agent in self.agents}
+        self.stage_seconds: Dict[Tuple[str, str], Histogram] = {
+            (agent, name): Histogram() for agent in self.agents for name in self.stages
+        }
+        # (route, method, status) -> count; the label sets are few and fixed by the app's routes
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.errors: Dict[str, int] = dict.fromkeys(self.agents, 0)
+
+    def record_request(self, route: str, method: str, status: int, seconds: float, timer: RequestTimer):
+        agent = timer.agent if timer.agent in self.request_seconds else ""
+        key = (route, method, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.request_seconds[agent].observe(seconds)
+        for name, duration in timer.stages:
+            histogram = self.stage_seconds.get((agent, name))
+            if histogram is not None:
+                histogram.observe(duration)
+        if status >= 500:
+            self.errors[agent] += 1
+
+    def record_error(self, agent_name: str):
+        """Count a failure that was answered with a fallback instead of an error status"""
+        self.errors[agent_name if agent_name in self.errors else ""] += 1
+
+    @staticmethod
+    def _histogram_lines(name: str, histogram: Histogram, **labels: str) -> List[str]:
+        lines = []
+        cumulative = histogram.cumulative()
+        for bound, count in zip(histogram.bounds, cumulative):
+            lines.append(f"{name}_bucket{_labels(**labels, le=repr(bound))} {count}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {cumulative[-1]}")
+        lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum!r}")
+        lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+        return lines
+
+    def render(self, samples: Iterable[Tuple[str, str, str, Dict[str, str], float]] = ()) -> bytes:
+        """Prometheus text exposition of these metrics plus samples
+
+        samples are (name, type, help, labels, value) tuples collected from
+        other components (caches, limiters) at scrape time.
+        """
+        lines = [
+            "# HELP apex_uptime_seconds Seconds since this worker started recording",
+            "# TYPE apex_uptime_seconds gauge",
+            f"apex_uptime_seconds {time.time() - self.started:.3f}",
+            "# HELP apex_requests_total HTTP requests by route, method and status",
+            "# TYPE apex_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(self.requests.items()):
+            lines.append(f"apex_requests_total{_labels(route=route, method=method, status=str(status))} {count}")
+
+        lines += ["# HELP apex_agent_errors_total Failed agent requests (5xx or fallback answers)",
+                  "# TYPE apex_agent_errors_total counter"]
+        for agent, count in self.errors.items():
+            if count:
+                lines.append(f"apex_agent_errors_total{_labels(agent=agent)} {count}")
+
+        lines += ["# HELP apex_request_duration_seconds End-to-end request latency by agent",
+                  "# TYPE apex_request_duration_seconds histogram"]
+        for agent, histogram in self.request_seconds.items():
+            if histogram.count:
+                lines += self._histogram_lines("apex_request_duration_seconds", histogram, agent=agent)
+
+        lines += ["# HELP apex_stage_duration_seconds Latency of each request stage by agent",
+                  "# TYPE apex_stage_duration_seconds histogram"]
+        for (agent, name), histogram in self.stage_seconds.items():
+            if histogram.count:
+                lines += self._histogram_lines("apex_stage_duration_seconds", histogram, agent=agent, stage=name)
+
+        # A family's series must be contiguous, whatever order they were collected in
+        families: Dict[str, List[str]] = {}
+        for name, kind, help_text, labels, value in samples:
+            family = families.get(name)
+            if family is None:
+                family = families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            family.append(f"{name}{_labels(**labels) if labels else ''} {value!r}")
+        for family in families.values():
+            lines += family
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class TimingMiddleware:
+    """ASGI middleware that times every HTTP request and adds its Server-Timing header
+
+    Written against raw ASGI rather than BaseHTTPMiddleware, which would
+    wrap every request and response body in extra tasks and queues. The
+    header goes out with the response start, so a streamed response
+    reports the stages that ran before its first byte.
+    """
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = RequestTimer()
+        token = CURRENT_TIMER.set(timer)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", timer.server_timing()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            CURRENT_TIMER.reset(token)
+            # The router records the matched route in the scope; unmatched
+            # paths share one label so they cannot blow up the series count
+            route = scope.get("route")
+            self.metrics.record_request(getattr(route, "path", "unmatched"), scope["method"], status,
+                                        time.perf_counter() - timer.start, timer)
@@ -0,0 +1,139 @@
+"""Pre-forking multi-worker server that shares preloaded agents copy-on-write
+
+``uvicorn --workers`` spawns fresh interpreters, so every worker imports the
+app and builds every agent's corpus and indexes again. Here the parent
+builds them once, freezes the heap, and forks the workers from it. The
+index data lives in a few large buffers (arrays, NumPy matrices, mmapped
+files), so workers keep reading the parent's pages instead of copying them.
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+
+from .process_memory import format_report, memory_report
+
+# A worker that dies sooner than this after starting is not restarted, so
+# a crash at startup cannot turn into a fork loop
+MIN_WORKER_UPTIME = 5.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket created in the parent and inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Preload in the parent, gc.freeze, then fork and supervise workers
+
+    Following the gc module's advice for fork without exec: collection is
+    disabled while the shared state is built (so no freed holes are left
+    between live objects), everything is moved to the permanent generation
+    just before forking (so a worker's collections never write to the
+    shared objects' GC headers), and collection is re-enabled in each worker.
+
+    Send the parent SIGUSR1 to print the workers' shared and private memory.
+    """
+
+    def __init__(self, app: Any, host: str, port: int, workers: int,
+                 preload: Optional[Callable[[], Dict]] = None, log_level: str = "info"):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.log_level = log_level
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+
+    def run(self):
+        gc.disable()
+        if self.preload is not None:
+            start = time.perf_counter()
+            loaded = self.preload()
+            print(f"[prefork] preloaded {len(loaded)} agents in {time.perf_counter() - start:.2f}s")
+        gc.freeze()
+        print(f"[prefork] {gc.get_freeze_count():,} objects frozen before fork")
+
+        sock = bind_socket(self.host, self.port)
+        for _ in range(self.workers):
+            self._spawn(sock)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGUSR1, self._report_memory)
+        try:
+            self._supervise(sock)
+        finally:
+            sock.close()
+
+    def _spawn(self, sock: socket.socket):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+        # Worker: restore default signal handling (uvicorn installs its own)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+        gc.enable()
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level=self.log_level)
+        code = 0
+        try:
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            # Never fall back into the parent's supervision loop
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _supervise(self, sock: socket.socket):
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            uptime = time.monotonic() - started
+            print(f"[prefork] worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if uptime >= MIN_WORKER_UPTIME:
+                self._spawn(sock)
+            else:
+                print(f"[prefork] worker {pid} failed {uptime:.1f}s after starting; not restarting it")
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _report_memory(self, signum, frame):
+        print(format_report(memory_report(self.children, parent=os.getpid())), flush=True)
+
+
+def serve_prefork(app: Any, host: str, port: int, workers: int,
+                  preload: Optional[Callable[[], Dict]] = None, log_level: str = "info"):
+    PreforkServer(app, host, port, workers, preload, log_level).run()
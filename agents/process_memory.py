@@ -0,0 +1,93 @@
+"""Shared versus private memory of server processes, read from /proc
+
+RSS counts every resident page, including pages a forked worker still
+shares with its parent, so summing RSS over workers overstates what they
+cost. ``/proc/<pid>/smaps_rollup`` splits a process's pages into shared and
+private ones, and PSS charges each shared page to the processes mapping it
+in equal parts, so PSS sums to the real total.
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+# smaps_rollup fields reported, in kB in the file and MB here
+ROLLUP_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def smaps_rollup(pid="self") -> Optional[Dict[str, float]]:
+    """Memory of one process in MB, or None where /proc/<pid>/smaps_rollup is unavailable"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.readlines()
+    except OSError:  # Not Linux, kernel < 4.14, or the process has exited
+        return None
+    values = {}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        if name in ROLLUP_FIELDS:
+            values[name] = int(rest.split()[0]) / 1024
+    return {
+        "rss_mb": round(values.get("Rss", 0.0), 1),
+        "pss_mb": round(values.get("Pss", 0.0), 1),
+        "shared_mb": round(values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0), 1),
+        "swap_mb": round(values.get("Swap", 0.0), 1)
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process, found through the parent pid in /proc/*/stat"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:  # Exited while we were scanning
+            continue
+        # The command name may contain spaces; fields after it are fixed: state, ppid, ...
+        if int(stat.rpartition(")")[2].split()[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def memory_report(pids: Iterable[int], parent: Optional[int] = None) -> Dict:
+    """Per-process memory plus totals for a parent and its workers
+
+    ``total_rss_mb`` is what naive per-process accounting adds up to;
+    ``total_pss_mb`` is the memory the group actually occupies.
+    """
+    processes = {}
+    for pid in ([parent] if parent is not None else []) + list(pids):
+        usage = smaps_rollup(pid)
+        if usage is not None:
+            processes[pid] = dict(usage, role="parent" if pid == parent else "worker")
+    workers = [usage for usage in processes.values() if usage["role"] == "worker"]
+    return {
+        "processes": processes,
+        "workers": len(workers),
+        "total_rss_mb": round(sum(usage["rss_mb"] for usage in processes.values()), 1),
+        "total_pss_mb": round(sum(usage["pss_mb"] for usage in processes.values()), 1),
+        "worker_private_mb": round(sum(usage["private_mb"] for usage in workers), 1),
+        "worker_shared_mb": round(sum(usage["shared_mb"] for usage in workers), 1)
+    }
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{'pid':>8} {'role':<7} {'rss':>9} {'pss':>9} {'shared':>9} {'private':>9}"]
+    for pid, usage in report["processes"].items():
+        lines.append(f"{pid:>8} {usage['role']:<7} {usage['rss_mb']:>9.1f} {usage['pss_mb']:>9.1f} "
+                     f"{usage['shared_mb']:>9.1f} {usage['private_mb']:>9.1f}")
+    lines.append(f"{report['workers']} workers: RSS sum {report['total_rss_mb']:.1f} MB, "
+                 f"PSS sum {report['total_pss_mb']:.1f} MB (MB throughout)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m agents.process_memory <server pid>: the server and all of its workers
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m agents.process_memory <parent pid>")
+    parent_pid = int(sys.argv[1])
+    print(format_report(memory_report(child_pids(parent_pid), parent=parent_pid)))
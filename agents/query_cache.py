@@ -0,0 +1,117 @@
+"""Bounded per-agent cache for retrieval results"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = int(os.getenv("APEX_QUERY_CACHE_SIZE", "256"))
+DEFAULT_CACHE_TTL = float(os.getenv("APEX_QUERY_CACHE_TTL", "0")) or None  # seconds; unset/0 disables expiry
+
+# Rough per-source overhead (dicts, metadata strings) on top of the text itself
+SOURCE_OVERHEAD_BYTES = 600
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used in cache keys"""
+    return " ".join(query.lower().split())
+
+
+def estimate_result_bytes(result: Tuple[str, list]) -> int:
+    """Approximate memory held by a (context, sources) retrieval result"""
+    context, sources = result
+    return sys.getsizeof(context) + sum(
+        sys.getsizeof(source.get("content", "")) + SOURCE_OVERHEAD_BYTES for source in sources
+    )
+
+
+class QueryCache:
+    """LRU cache with optional TTL whose entries die when the corpus generation changes
+
+    Every entry records the corpus generation it was computed against; a
+    lookup under a newer generation drops the entry instead of serving it.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: Optional[float] = DEFAULT_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (generation, stored_at, nbytes, value)
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Hashable):
+        _, _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_generation, stored_at, _, value = entry
+            if entry_generation != generation:
+                self._drop(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, generation: int, value: Any, nbytes: int = 0):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (generation, self._clock(), nbytes, value)
+            self._bytes += nbytes
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a full corpus reload"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "bytes": self._bytes
+        }
@@ -1,6 +1,7 @@
 """Rachel - NutraFuel Nutrition & Meal Planning AI Coach"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 RACHEL_PROMPT = """Hi! I'm Rachel, your personal nutrition and meal planning coach! 🍎
 
@@ -59,11 +60,12 @@ RECIPE_IDEAS_DATA = [
 # Create agent instance
 agent = BaseRAGAgent(
     name="rachel_nutrition",
-    system_prompt=RACHEL_PROMPT
+    system_prompt=RACHEL_PROMPT,
+    retrieval_mode="dense"  # Goal-style questions ("meals to build muscle") match better semantically
 )
 
 # Load data into vector store
-agent.add_documents(MEAL_PLANNING_DATA + NUTRITION_TIMING_DATA + RECIPE_IDEAS_DATA)
+load_corpus(agent, MEAL_PLANNING_DATA + NUTRITION_TIMING_DATA + RECIPE_IDEAS_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
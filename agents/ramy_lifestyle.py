@@ -1,6 +1,7 @@
 """Ramy - NutraFuel Style & Lifestyle AI Coach"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 RAMY_PROMPT = """Hey there! I'm Ramy, your personal style and lifestyle coach! 👔
 
@@ -60,11 +61,12 @@ FITNESS_LIFESTYLE_DATA = [
 # Create agent instance
 agent = BaseRAGAgent(
     name="ramy_lifestyle",
-    system_prompt=RAMY_PROMPT
+    system_prompt=RAMY_PROMPT,
+    retrieval_mode="dense"  # Lifestyle questions rarely reuse the documents' exact wording
 )
 
 # Load data into vector store
-agent.add_documents(STYLE_ADVICE_DATA + LIFESTYLE_OPTIMIZATION_DATA + FITNESS_LIFESTYLE_DATA)
+load_corpus(agent, STYLE_ADVICE_DATA + LIFESTYLE_OPTIMIZATION_DATA + FITNESS_LIFESTYLE_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""Declarative agent registry with import-on-first-use
+
+Every agent is described here once: its public id, the module that builds
+it, its tier and its listing text. Nothing is imported until an agent is
+first asked for, because importing an agent module loads and indexes its
+corpus. The API listings, routing and the LangGraph config are all derived
+from this table.
+"""
+
+import importlib
+import json
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+TIERS = ("frontend", "backend")
+
+
+class AgentSpec(NamedTuple):
+    """Where an agent lives and how it is listed"""
+    id: str
+    module: str
+    tier: str
+    name: str
+    description: str
+
+    @property
+    def import_path(self) -> str:
+        return f"agents.{self.module}"
+
+
+AGENT_SPECS = (
+    # Frontend Agents (Customer-facing)
+    AgentSpec("intelligent_search", "intelligent_search", "frontend",
+              "Intelligent Search", "AI-powered product search and recommendations"),
+    AgentSpec("customer_service", "customer_service", "frontend",
+              "Customer Service", "Order tracking, returns, and customer support"),
+    AgentSpec("rachel_nutrition", "rachel_nutrition", "frontend",
+              "Rachel - Nutrition Coach", "Meal planning and nutrition guidance"),
+    AgentSpec("ramy_lifestyle", "ramy_lifestyle", "frontend",
+              "Ramy - Lifestyle Coach", "Style and lifestyle advice"),
+
+    # Backend Agents (Admin/Internal)
+    AgentSpec("customer_experience", "client_acquisition", "backend",
+              "Customer Experience Agent", "Advanced customer analytics and optimization"),
+    AgentSpec("product_analytics", "marketing_analytics", "backend",
+              "Product Analytics Agent", "Deep product performance and market insights"),
+    AgentSpec("sales_optimizer", "campaign_optimizer", "backend",
+              "Sales Optimizer Agent", "Revenue optimization and pricing strategies"),
+    AgentSpec("review_synthesis", "review_synthesis", "backend",
+              "Review Synthesis Engine", "Customer review analysis and insights"),
+    AgentSpec("financial_reports", "financial_reports", "backend",
+              "Financial Report Generator", "Financial analysis and reporting"),
+    AgentSpec("landing_page_generator", "landing_page_generator", "backend",
+              "Landing Page Generator", "Dynamic marketing page creation"),
+)
+
+
+class AgentRegistry:
+    """Loads agents on first use and records how long each took
+
+    Lookups by id are safe from several threads at once: an agent that is
+    being loaded by one thread is waited for, not built twice.
+    """
+
+    def __init__(self, specs: Iterable[AgentSpec]):
+        self.specs: Dict[str, AgentSpec] = {}
+        for spec in specs:
+            if spec.tier not in TIERS:
+                raise ValueError(f"Agent '{spec.id}' has unknown tier '{spec.tier}', expected one of {TIERS}")
+            if spec.id in self.specs:
+                raise ValueError(f"Agent '{spec.id}' is registered twice")
+            self.specs[spec.id] = spec
+        self._agents: Dict[str, object] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._locks = {agent_id: threading.Lock() for agent_id in self.specs}
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self.specs
+
+    def ids(self, tier: Optional[str] = None) -> List[str]:
+        return [spec.id for spec in self.specs.values() if tier is None or spec.tier == tier]
+
+    def tier(self, agent_id: str) -> str:
+        return self.specs[agent_id].tier
+
+    def is_loaded(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def get(self, agent_id: str):
+        """The agent instance, importing its module (and building its corpus) on first use"""
+        agent = self._agents.get(agent_id)
+        if agent is not None:
+            return agent
+        spec = self.specs[agent_id]
+        with self._locks[agent_id]:
+            agent = self._agents.get(agent_id)
+            if agent is None:
+                start = time.perf_counter()
+                agent = importlib.import_module(spec.import_path).agent
+                self._load_seconds[agent_id] = time.perf_counter() - start
+                self._agents[agent_id] = agent
+        return agent
+
+    def load(self, agent_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Load the given agents (all by default) and report each one's load time
+
+        ``already_loaded`` marks agents that were in memory before the call; their
+        ``load_seconds`` is from the original load. The first agent loaded
+        also pays for importing the shared retrieval modules.
+        """
+        report = {}
+        for agent_id in (self.ids() if agent_ids is None else agent_ids):
+            already_loaded = self.is_loaded(agent_id)
+            self.get(agent_id)
+            report[agent_id] = {
+                "already_loaded": already_loaded,
+                "load_seconds": round(self._load_seconds[agent_id], 4)
+            }
+        return report
+
+    def loaded(self, tier: Optional[str] = None) -> Dict[str, object]:
+        """The agents already in memory, without loading any others"""
+        return {agent_id: self._agents[agent_id] for agent_id in self.ids(tier) if agent_id in self._agents}
+
+    def load_times(self) -> Dict[str, float]:
+        return {agent_id: round(seconds, 4) for agent_id, seconds in self._load_seconds.items()}
+
+    def listing(self, tier: str) -> List[Dict[str, str]]:
+        return [{"id": spec.id, "name": spec.name, "description": spec.description}
+                for spec in self.specs.values() if spec.tier == tier]
+
+    def tier_view(self, tier: str) -> "TierAgents":
+        return TierAgents(self, tier)
+
+    def langgraph_graphs(self) -> Dict[str, str]:
+        """LangGraph ``graphs`` entries: agent id -> ``module:graph``"""
+        return {spec.id: f"{spec.import_path}:graph" for spec in self.specs.values()}
+
+
+class TierAgents(Mapping):
+    """Read-only ``{agent_id: agent}`` view of one tier
+
+    Membership, length and keys come from the registry table; an agent is
+    only loaded when its value is read.
+    """
+
+    def __init__(self, registry: AgentRegistry, tier: str):
+        self.registry = registry
+        self.tier = tier
+
+    def __getitem__(self, agent_id: str):
+        if agent_id not in self.registry or self.registry.tier(agent_id) != self.tier:
+            raise KeyError(agent_id)
+        return self.registry.get(agent_id)
+
+    def __contains__(self, agent_id) -> bool:
+        return agent_id in self.registry and self.registry.tier(agent_id) == self.tier
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.registry.ids(self.tier))
+
+    def __len__(self) -> int:
+        return len(self.registry.ids(self.tier))
+
+
+REGISTRY = AgentRegistry(AGENT_SPECS)
+
+
+def write_langgraph_config(path: str = "langgraph.json"):
+    """Point langgraph.json's graphs at the registered agent modules, keeping its other settings"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    config["graphs"] = REGISTRY.langgraph_graphs()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    # python -m agents.registry [path]: regenerate langgraph.json from the registry
+    write_langgraph_config(*sys.argv[1:2])
@@ -1,6 +1,7 @@
 """NutraFuel Review Synthesis Engine - Backend Admin"""
 
 from .base_agent import BaseRAGAgent
+from .ingest import load_corpus
 
 REVIEW_SYNTHESIS_PROMPT = """You are APEX's Review Synthesis Engine AI.
 
@@ -63,11 +64,14 @@ PRODUCT_INSIGHTS_DATA = [
 # Create agent instance
 agent = BaseRAGAgent(
     name="review_synthesis",
-    system_prompt=REVIEW_SYNTHESIS_PROMPT
+    system_prompt=REVIEW_SYNTHESIS_PROMPT,
+    # Review volume grows fastest, so serve it from a persisted, memory-mapped HNSW index
+    retrieval_mode="faiss",
+    index_params={"index_type": "hnsw", "m": 32, "ef_construction": 80, "ef_search": 64}
 )
 
-# Load data into vector store
-agent.add_documents(REVIEW_SYNTHESIS_DATA + TIME_RELEVANT_REVIEW_DATA + SENTIMENT_ANALYSIS_DATA + PRODUCT_INSIGHTS_DATA)
+# Load data into vector store; REVIEW_SYNTHESIS_CORPUS_PATH can point at a full JSONL/CSV review export instead
+load_corpus(agent, REVIEW_SYNTHESIS_DATA + TIME_RELEVANT_REVIEW_DATA + SENTIMENT_ANALYSIS_DATA + PRODUCT_INSIGHTS_DATA)
 
 # Create and export the graph
 graph = agent.build_graph() 
\ No newline at end of file
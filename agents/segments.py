@@ -0,0 +1,238 @@
+"""Segmented corpus storage: immutable segments plus copy-on-write snapshots
+
+An agent's corpus is a sequence of immutable segments. A full load produces
+one base segment; each upsert appends a small delta segment and tombstones
+the superseded copies, and deletes only add tombstones. Readers grab the
+current ``CorpusSnapshot`` once and work against it, so a query never sees a
+half-applied update. Background merges fold the segments back into one.
+"""
+
+import bisect
+import hashlib
+from array import array
+from collections import abc
+from typing import Collection, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .document_store import DocumentStore
+from .fusion import reciprocal_rank_fusion
+from .lexical_index import bm25_idf, query_terms, top_k_arrays, top_scores
+from .source_fragments import SourceFragments
+
+EMPTY: FrozenSet[int] = frozenset()
+
+
+class Segment:
+    """An immutable batch of documents and the indexes built over it"""
+
+    def __init__(self, uid: int, store: DocumentStore, lexical_index=None, vector_index=None,
+                 fragments: Optional[SourceFragments] = None):
+        self.uid = uid
+        self.store = store
+        self.lexical_index = lexical_index
+        self.vector_index = vector_index
+        self.fragments = fragments
+
+    @property
+    def doc_ids(self) -> Sequence[int]:
+        return self.store.doc_ids
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+
+def chain_fingerprint(previous: str = "", store: Optional[DocumentStore] = None,
+                      deleted_ids: Collection[int] = ()) -> str:
+    """Corpus fingerprint after a write: the previous one folded with the written store or deleted ids
+
+    Unlike the generation it depends only on the content written, not on how
+    many writes or merges a process went through, so every process that
+    loads the same corpus agrees on it and a deploy with other documents
+    changes it. Full loads start from an empty previous fingerprint.
+    """
+    digest = hashlib.blake2b(previous.encode("ascii"), digest_size=16)
+    if store is not None:
+        store.update_digest(digest)
+    if deleted_ids:
+        digest.update(array('q', sorted(deleted_ids)))
+    return digest.hexdigest()
+
+
+class LiveDocuments(abc.Sequence):
+    """Read-only sequence of a snapshot's live document texts, decoded on access"""
+
+    def __init__(self, snapshot: "CorpusSnapshot"):
+        self._snapshot = snapshot
+        # Without tombstones live index i is snapshot position i
+        self._positions = array('q', snapshot.live_positions()) if snapshot.deleted else None
+
+    def __len__(self) -> int:
+        return self._snapshot.live_count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("document index out of range")
+        position = self._positions[i] if self._positions is not None else i
+        return self._snapshot.document(position)
+
+
+class CorpusSnapshot:
+    """A consistent, read-only view over a list of segments and their tombstones
+
+    Hits are reported as snapshot positions: the segment's offset plus the
+    document's position inside it. Positions of tombstoned documents are
+    never returned.
+    """
+
+    def __init__(self, segments: Sequence[Segment] = (), deleted: Optional[Dict[int, FrozenSet[int]]] = None,
+                 generation: int = 0, fingerprint: str = ""):
+        self.segments = tuple(segments)
+        self.deleted = deleted or {}  # segment uid -> tombstoned local positions
+        self.generation = generation  # Counts writes in this process; tags cached results
+        self.fingerprint = fingerprint  # Identifies the content across processes and deploys
+        self.offsets = []
+        total = 0
+        for segment in self.segments:
+            self.offsets.append(total)
+            total += len(segment)
+        self.size = total
+        self.live_count = total - sum(len(positions) for positions in self.deleted.values())
+        self._documents = None
+
+    def locate(self, position: int) -> Tuple[Segment, int]:
+        """Map a snapshot position to (segment, local position)"""
+        i = bisect.bisect_right(self.offsets, position) - 1
+        return self.segments[i], position - self.offsets[i]
+
+    def live_positions(self):
+        """Yield the snapshot positions of live documents, in order"""
+        for offset, segment in zip(self.offsets, self.segments):
+            deleted = self.deleted.get(segment.uid, EMPTY)
+            for local in range(len(segment)):
+                if local not in deleted:
+                    yield offset + local
+
+    def document(self, position: int) -> str:
+        segment, local = self.locate(position)
+        return segment.store.text(local)
+
+    def preview(self, position: int) -> str:
+        segment, local = self.locate(position)
+        return segment.store.preview(local)
+
+    def doc_id(self, position: int) -> int:
+        segment, local = self.locate(position)
+        return segment.store.doc_id(local)
+
+    def metadata(self, agent_name: str, position: int) -> Dict:
+        segment, local = self.locate(position)
+        store = segment.store
+        return {
+            "source": store.source(agent_name, local),
+            "title": store.title(local),
+            "index": position,
+            "id": store.doc_id(local)
+        }
+
+    def sources_json(self, hits: Sequence[Tuple[int, float]]) -> bytes:
+        """JSON array of source entries for ranked hits, from the segments' pre-encoded fragments"""
+        entries = []
+        for position, score in hits:
+            segment, local = self.locate(position)
+            entries.append(segment.fragments.encode(local, position, segment.store.doc_id(local), score))
+        return b"[" + b",".join(entries) + b"]"
+
+    @property
+    def documents(self) -> LiveDocuments:
+        """Live document texts in snapshot order, decoded lazily"""
+        if self._documents is None:
+            self._documents = LiveDocuments(self)
+        return self._documents
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the segments' document stores"""
+        return sum(segment.store.nbytes for segment in self.segments)
+
+    def lexical_search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """BM25 over all segments using corpus-wide statistics"""
+        return self.lexical_search_many([query], k)[0]
+
+    def lexical_search_many(self, queries: List[str], k: int) -> List[List[Tuple[int, float]]]:
+        """BM25 for a batch of queries; postings of shared terms are walked once
+
+        Like most segmented engines, tombstoned documents still count towards
+        document frequencies until the next merge.
+        """
+        indexes = [segment.lexical_index for segment in self.segments]
+        num_docs = sum(index.num_docs for index in indexes)
+        if k <= 0 or num_docs == 0:
+            return [[] for _ in queries]
+        avgdl = sum(index.total_length for index in indexes) / num_docs
+
+        batch_query_terms = [query_terms(query) for query in queries]
+        terms = list(dict.fromkeys(term for weighted in batch_query_terms for term, _ in weighted))
+        dfs = [sum(column) for column in zip(*(index.document_frequencies(terms) for index in indexes))]
+        idf = {term: bm25_idf(num_docs, df) if df else 0.0 for term, df in zip(terms, dfs)}
+
+        # term -> [(query number, idf * qtf)], built in canonical term order
+        users: Dict[str, List[Tuple[int, float]]] = {}
+        for query_number, weighted in enumerate(batch_query_terms):
+            for term, qtf in weighted:
+                if idf[term]:
+                    users.setdefault(term, []).append((query_number, idf[term] * qtf))
+        batch_terms = sorted(users.items())
+
+        per_query: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        for offset, segment in zip(self.offsets, self.segments):
+            deleted = self.deleted.get(segment.uid, EMPTY)
+            deleted_positions = np.fromiter(deleted, dtype=np.int64, count=len(deleted))
+            batch_scores = segment.lexical_index.accumulate_many(batch_terms, avgdl, len(queries))
+            for query_number, (docs, scores) in enumerate(batch_scores):
+                if deleted:
+                    live = ~np.isin(docs, deleted_positions)
+                    docs, scores = docs[live], scores[live]
+                per_query[query_number].extend(top_k_arrays(docs.astype(np.int64) + offset, scores, k))
+        return [top_scores(hits, k) for hits in per_query]
+
+    def vector_search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Cosine similarity over all segments' vector indexes"""
+        return self.vector_search_many([query], k)[0]
+
+    def vector_search_many(self, queries: List[str], k: int) -> List[List[Tuple[int, float]]]:
+        """Cosine similarity for a batch of queries with one matrix product per segment"""
+        if k <= 0 or not self.segments or not queries:
+            return [[] for _ in queries]
+        vectors = self.segments[0].vector_index.embed_queries(queries)
+        per_query: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        for offset, segment in zip(self.offsets, self.segments):
+            batch_hits = segment.vector_index.search_vectors(vectors, k, self.deleted.get(segment.uid, EMPTY))
+            for query_number, hits in enumerate(batch_hits):
+                per_query[query_number].extend((offset + local, score) for local, score in hits)
+        return [top_scores(hits, k) for hits in per_query]
+
+    def hybrid_search(self, query: str, k: int, candidates: int) -> List[Tuple[int, float]]:
+        """Fuse capped lexical and vector rankings with reciprocal-rank fusion"""
+        return self.hybrid_search_many([query], k, candidates)[0]
+
+    def hybrid_search_many(self, queries: List[str], k: int, candidates: int) -> List[List[Tuple[int, float]]]:
+        lexical = self.lexical_search_many(queries, candidates)
+        vector = self.vector_search_many(queries, candidates)
+        return [reciprocal_rank_fusion([lexical_hits, vector_hits], k)
+                for lexical_hits, vector_hits in zip(lexical, vector)]
+
+
+def tombstone(deleted: Dict[int, FrozenSet[int]], locations: Sequence[Tuple[int, int]]) -> Dict[int, FrozenSet[int]]:
+    """Return a copy of deleted with the given (segment uid, local) locations added"""
+    grouped: Dict[int, List[int]] = {}
+    for uid, local in locations:
+        grouped.setdefault(uid, []).append(local)
+    updated = dict(deleted)
+    for uid, locals_ in grouped.items():
+        updated[uid] = updated.get(uid, EMPTY).union(locals_)
+    return updated
@@ -0,0 +1,51 @@
+"""JSON encoding for API payloads, using orjson when it is installed"""
+
+import json
+from typing import Any, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder gives the same JSON
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, matching what FastAPI's JSONResponse would send"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_object(fields: List[Tuple[str, bytes]]) -> bytes:
+    """Assemble a JSON object from already-encoded field values, in the given order"""
+    return b"{" + b",".join(dumps(name) + b":" + encoded for name, encoded in fields) + b"}"
+
+
+# Server-sent event chunks of long responses stay under this many characters
+STREAM_CHUNK_CHARS = 240
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """One server-sent event frame; data must be single-line (e.g. compact JSON)"""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+def split_chunks(text: str, size: int = STREAM_CHUNK_CHARS) -> List[str]:
+    """Split text into pieces of at most size characters, preferring line and word boundaries
+
+    The pieces concatenate back to exactly the original text.
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > size:
+        window = text[start:start + size]
+        cut = window.rfind("\n") + 1 or window.rfind(" ") + 1 or size
+        chunks.append(text[start:start + cut])
+        start += cut
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
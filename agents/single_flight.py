@@ -0,0 +1,64 @@
+"""Single-flight coalescing of identical in-flight async computations"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and shares its result with concurrent callers
+
+    The first caller for a key (the leader) starts the computation as a
+    task of its own; callers arriving while it runs (followers) await the
+    same task instead of starting another. Every caller awaits through
+    ``asyncio.shield``, so a caller that is cancelled (its client went away)
+    only stops waiting: the computation carries on for the others. The key
+    is released as soon as the computation finishes, so results are never
+    served after the fact; caching is the retrieval cache's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled_waiters = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                self.cancelled_waiters += 1
+            raise
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the outcome here so a failure nobody is waiting for any
+        # more is counted rather than logged as "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "requests": requests,
+            "computations": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / requests, 4) if requests else 0.0,
+            "cancelled_waiters": self.cancelled_waiters,
+            "failures": self.failures
+        }
@@ -0,0 +1,44 @@
+"""Pre-encoded JSON for the source entries returned with retrieval results"""
+
+from array import array
+
+from .document_store import DocumentStore
+from .serialization import dumps
+
+
+class SourceFragments:
+    """Per-document JSON prefix of a source entry, encoded once when a segment is built
+
+    A source entry is ``{"content", "metadata": {"source", "title", "index",
+    "id"}, "relevance_score"}``. Everything up to the snapshot position is
+    fixed per document, so it is encoded at ingest into one immutable
+    buffer; a hit only appends its position, id and score.
+    """
+
+    def __init__(self, buffer: bytes, offsets: array):
+        self._view = memoryview(buffer)
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, agent_name: str, store: DocumentStore) -> "SourceFragments":
+        buffer = bytearray()
+        offsets = array('Q', [0])
+        for i in range(len(store)):
+            buffer += b'{"content":' + dumps(store.preview(i))
+            buffer += b',"metadata":{"source":' + dumps(store.source(agent_name, i))
+            buffer += b',"title":' + dumps(store.title(i)) + b',"index":'
+            offsets.append(len(buffer))
+        return cls(bytes(buffer), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets[len(self)] + memoryview(self.offsets).nbytes
+
+    def encode(self, local: int, position: int, doc_id: int, score: float) -> bytes:
+        """The full source entry for document ``local`` of the segment, hit at ``position``"""
+        prefix = self._view[self.offsets[local]:self.offsets[local + 1]]
+        return b"".join((prefix, b'%d,"id":%d},"relevance_score":' % (position, doc_id), dumps(round(score, 4)), b"}"))
+
@@ -0,0 +1,220 @@
+"""Dense retrieval: deterministic text embedder and a NumPy cosine index"""
+
+import zlib
+import itertools
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .lexical_index import tokenize
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder over word terms and character trigrams
+
+    A dependency-free stand-in for a learned embedding model: it is
+    deterministic across processes (crc32, not the salted built-in hash), so
+    persisted vectors stay valid. Any object with a ``dim`` attribute and an
+    ``embed(texts) -> float32 array`` method can be used in its place.
+    """
+
+    # Bound the term -> features cache so a long-running process cannot
+    # grow it without limit
+    MAX_CACHE_SIZE = 1_000_000
+
+    def __init__(self, dim: int = 256, trigram_weight: float = 0.5):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+        self._term_features: Dict[str, Tuple[Tuple[int, ...], Tuple[float, ...]]] = {}
+
+    @property
+    def cached_terms(self) -> int:
+        return len(self._term_features)
+
+    def _hash(self, feature: str, weight: float) -> Tuple[int, float]:
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.dim, weight if h & 0x80000000 else -weight
+
+    def _features(self, term: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        """Hashed (columns, signed weights) for a term and its character trigrams"""
+        features = self._term_features.get(term)
+        if features is None:
+            hashed = [self._hash(term, 1.0)]
+            padded = f"#{term}#"
+            hashed.extend(self._hash(padded[i:i + 3], self.trigram_weight) for i in range(len(padded) - 2))
+            features = (tuple(col for col, _ in hashed), tuple(val for _, val in hashed))
+            if len(self._term_features) >= self.MAX_CACHE_SIZE:
+                self._term_features.clear()
+            self._term_features[term] = features
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix (not normalised)"""
+        rows: List[int] = []
+        cols: List[int] = []
+        vals: List[float] = []
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                term_cols, term_vals = self._features(term)
+                rows.extend([row] * len(term_cols))
+                cols.extend(term_cols)
+                vals.extend(term_vals)
+
+        # bincount over flat cell ids sums repeated features in one C pass
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(cols, dtype=np.int64)
+        cells = np.bincount(flat, weights=np.asarray(vals, dtype=np.float64), minlength=len(texts) * self.dim)
+        return cells.astype(np.float32).reshape(len(texts), self.dim)
+
+
+# Documents are embedded this many at a time, so the embedder's per-feature
+# scratch lists stay small however large the corpus is
+EMBED_BATCH_SIZE = 4096
+
+
+def stack_rows(chunks: List[np.ndarray], dim: int) -> np.ndarray:
+    """Concatenate row chunks into one float32 matrix, releasing each chunk once copied
+
+    The output pages are only touched as rows are written, so peak memory
+    stays near one matrix rather than two.
+    """
+    if len(chunks) == 1:
+        return chunks.pop()
+    matrix = np.empty((sum(len(chunk) for chunk in chunks), dim), dtype=np.float32)
+    start = 0
+    chunks.reverse()
+    while chunks:
+        chunk = chunks.pop()
+        matrix[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    return matrix
+
+
+def embed_documents(embedder: HashingEmbedder, documents: Iterable[str],
+                    batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """Embed and L2-normalise documents batch by batch into one float32 matrix"""
+    iterator = iter(documents)
+    chunks = []
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        chunks.append(l2_normalize(embedder.embed(batch)))
+    if not chunks:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    return stack_rows(chunks, embedder.dim)
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """Return a C-contiguous float32 copy of matrix with unit-length rows"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # Leave empty rows at zero instead of dividing by zero
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+
+# Headroom over the worst-case float32 BLAS error of a dot product between
+# unit vectors; candidates are selected with BLAS and then rescored exactly
+SCORE_TOLERANCE = 1e-4
+RESCORE_MARGIN = 16
+
+
+def exact_scores(matrix: np.ndarray, rows: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Float64 dot products of selected rows with vector
+
+    einsum's plain loops give each row the same result however many rows or
+    queries are scored together, unlike BLAS, whose blocking depends on the
+    batch shape. That keeps single and batched queries bit-for-bit identical.
+    """
+    return np.einsum('ij,j->i', matrix[rows].astype(np.float64), vector.astype(np.float64))
+
+
+def rerank_top_k(matrix: np.ndarray, approx: np.ndarray, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Top-k (position, score) pairs, best first, from BLAS scores refined by exact rescoring
+
+    argpartition picks k + margin candidates from the approximate scores and
+    only those are sorted. If the best excluded approximate score is within
+    SCORE_TOLERANCE of the k-th exact score, every position that could still
+    qualify is rescored, so the result never depends on BLAS rounding. Ties
+    go to the lower position; excluded positions carry -inf.
+    """
+    n = approx.shape[0]
+    if k <= 0 or n == 0:
+        return []
+    fetch = min(n, k + RESCORE_MARGIN)
+    if fetch < n:
+        partition = np.argpartition(-approx, fetch)
+        candidates = partition[:fetch]
+        cutoff = approx[partition[fetch]]
+    else:
+        candidates = np.arange(n)
+        cutoff = -np.inf
+    candidates = candidates[np.isfinite(approx[candidates])]
+    scores = exact_scores(matrix, candidates, vector)
+    order = np.lexsort((candidates, -scores))[:k]
+
+    if np.isfinite(cutoff) and (len(order) < k or cutoff >= scores[order[-1]] - SCORE_TOLERANCE):
+        floor = scores[order[-1]] - SCORE_TOLERANCE if len(order) == k else -np.inf
+        candidates = np.flatnonzero(np.isfinite(approx) & (approx >= floor))
+        scores = exact_scores(matrix, candidates, vector)
+        order = np.lexsort((candidates, -scores))[:k]
+
+    return [(int(candidates[i]), float(scores[i])) for i in order if scores[i] > 0.0]
+
+
+class DenseVectorIndex:
+    """Exact cosine-similarity index over one contiguous float32 matrix"""
+
+    def __init__(self, embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._pending: List[np.ndarray] = []  # Batches added since the last finalize()
+
+    @property
+    def num_docs(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def build(self, documents: Iterable[str]):
+        """Embed and L2-normalise every document once, up front"""
+        self._pending = []
+        self.matrix = embed_documents(self.embedder, documents)
+
+    def add(self, documents: Iterable[str]):
+        """Embed a batch to append; it becomes searchable at finalize()"""
+        self._pending.append(embed_documents(self.embedder, documents))
+
+    def finalize(self):
+        """Append the batches added since the last finalize() to the matrix"""
+        if self._pending:
+            chunks = ([self.matrix] if self.num_docs else []) + self._pending
+            self._pending = []
+            self.matrix = stack_rows(chunks, self.embedder.dim)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def search_vectors(self, vectors: np.ndarray, k: int,
+                       exclude: Collection[int] = ()) -> List[List[Tuple[int, float]]]:
+        """Top-k (doc position, cosine similarity) pairs for each row of normalised query vectors"""
+        if self.num_docs == 0:
+            return [[] for _ in range(len(vectors))]
+        # One matrix-matrix product scores the whole batch against the whole corpus
+        scores = self.matrix @ np.ascontiguousarray(vectors, dtype=np.float32).T
+        if exclude:
+            scores[np.fromiter(exclude, dtype=np.int64, count=len(exclude))] = -np.inf
+        return [rerank_top_k(self.matrix, scores[:, i], vectors[i], k) for i in range(len(vectors))]
+
+    def search_vector(self, vector: np.ndarray, k: int, exclude: Collection[int] = ()) -> List[Tuple[int, float]]:
+        """Top-k (doc position, cosine similarity) pairs for one normalised query vector"""
+        return self.search_vectors(vector[None, :], k, exclude)[0]
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return l2_normalize(self.embedder.embed(queries))
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return the top-k (doc position, cosine similarity) pairs, best first"""
+        return self.search_vector(self.embed_query(query), k)
@@ -0,0 +1,136 @@
+"""Executor offload and bounded admission for CPU-bound request work"""
+
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+EXECUTOR_KINDS = ("thread", "process")
+
+DEFAULT_EXECUTOR_KIND = os.getenv("APEX_EXECUTOR", "thread")
+DEFAULT_EXECUTOR_WORKERS = int(os.getenv("APEX_EXECUTOR_WORKERS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+
+# Requests wait at most this long for a slot before being turned away
+DEFAULT_QUEUE_TIMEOUT = float(os.getenv("APEX_QUEUE_TIMEOUT", "2.0"))
+
+# Smoothing of the service-time average used for Retry-After estimates
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when a tier cannot take more work"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def create_executor(kind: str = DEFAULT_EXECUTOR_KIND, workers: int = DEFAULT_EXECUTOR_WORKERS) -> Executor:
+    """Thread pool (shares agents and caches) or process pool (sidesteps the GIL)
+
+    Process workers run their own copies of the agents, so functions sent to
+    them must be importable module-level callables taking picklable arguments.
+    """
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apex-work")
+
+
+class TierLimiter:
+    """Caps in-flight executor work for one agent tier and rejects early when backed up
+
+    At most ``max_in_flight`` calls run at once and at most ``max_queue``
+    wait behind them. A request that finds the queue full is rejected
+    immediately with 429; one that waits longer than ``queue_timeout`` gets
+    503. Both carry a Retry-After estimated from recent service times, so
+    the event loop never holds an unbounded backlog.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._service_seconds = 0.0
+
+    def _retry_after(self) -> int:
+        # Time for the work ahead of a new request to drain through the slots
+        backlog = self.waiting + self.in_flight
+        return max(1, math.ceil(backlog * self._service_seconds / self.max_in_flight))
+
+    async def run(self, executor: Executor, func: Callable, *args) -> Any:
+        """Run func(*args) on the executor once a slot is free"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        # Count admitted work rather than asking the semaphore, which only
+        # locks once acquirers have actually run
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_queue:
+            self.rejected_queue_full += 1
+            raise Overloaded(429, f"Too many queued {self.name} requests", self._retry_after())
+
+        self.waiting += 1
+        try:
+            if self._semaphore.locked():
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            else:
+                await self._semaphore.acquire()  # Free slot: no timer needed
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise Overloaded(503, f"{self.name} agents are overloaded", self._retry_after()) from None
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            job = executor.submit(func, *args)
+        except BaseException:
+            self._release(start)
+            raise
+        # The slot is held until the job itself finishes, not until this
+        # request stops waiting: a cancelled request (client gone) must not
+        # let new work in while its job still occupies an executor worker
+        def release_soon(_):
+            try:
+                loop.call_soon_threadsafe(self._release, start)
+            except RuntimeError:  # The loop closed at shutdown; nothing is waiting for the slot
+                pass
+
+        job.add_done_callback(release_soon)
+        return await asyncio.wrap_future(job)
+
+    def _release(self, start: float):
+        elapsed = time.perf_counter() - start
+        self._service_seconds += SERVICE_TIME_ALPHA * (elapsed - self._service_seconds)
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_service_ms": round(self._service_seconds * 1000, 3)
+        }
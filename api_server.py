@@ -1,31 +1,35 @@
 #!/usr/bin/env python3
 """NutraFuel AI API Server with Frontend and Backend Agent Separation"""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
 import uvicorn
 from dotenv import load_dotenv
 import os
 import asyncio
+import hmac
+import time
 
 # Load environment variables
 load_dotenv()
 
-# Import Frontend Agents (Customer-facing)
-from agents.intelligent_search import agent as intelligent_search_agent
-from agents.customer_service import agent as customer_service_agent
-from agents.rachel_nutrition import agent as rachel_nutrition_agent
-from agents.ramy_lifestyle import agent as ramy_lifestyle_agent
-
-# Import Backend Agents (Admin/Internal)
-from agents.client_acquisition import agent as customer_experience_agent
-from agents.marketing_analytics import agent as product_analytics_agent
-from agents.campaign_optimizer import agent as sales_optimizer_agent
-from agents.review_synthesis import agent as review_synthesis_agent
-from agents.financial_reports import agent as financial_reports_agent
-from agents.landing_page_generator import agent as landing_page_generator_agent
+# Agents are imported and indexed on first use (or via /warmup), not at startup
+from agents.registry import AGENT_SPECS, REGISTRY
+from agents.prefork import serve_prefork
+from agents.intent_router import IntentRouter
+from agents.mock_responses import AGENT_INTENTS
+from agents.work_pool import DEFAULT_EXECUTOR_KIND, DEFAULT_EXECUTOR_WORKERS, Overloaded, TierLimiter, create_executor
+from agents.serialization import JSON_MEDIA_TYPE, SSE_MEDIA_TYPE, dumps, json_object, split_chunks, sse_event
+from agents.single_flight import SingleFlight
+from agents.query_cache import normalize_query
+from agents.metrics import PROMETHEUS_MEDIA_TYPE, Metrics, TimingMiddleware, mark, set_agent
+from agents.process_memory import smaps_rollup
+from agents.profiler import DEFAULT_INTERVAL, MAX_SECONDS, ProfileInProgress, StackSampler
+from agents.http_cache import (CACHE_CONTROL_LIVE, CACHE_CONTROL_QUERY, CACHE_CONTROL_STATIC, content_version,
+                               etag_matches, make_etag)
 
 # Create FastAPI app
 app = FastAPI(title="NutraFuel AI API", version="2.0.0")
@@ -37,798 +41,202 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the per-stage timings
+    expose_headers=["Server-Timing"],
 )
 
-# Frontend Agents (Customer-facing)
-frontend_agents = {
-    "intelligent_search": intelligent_search_agent,
-    "customer_service": customer_service_agent,
-    "rachel_nutrition": rachel_nutrition_agent,
-    "ramy_lifestyle": ramy_lifestyle_agent
-}
+# Per-agent latency histograms and request counters, preallocated for every registered agent
+METRICS = Metrics(REGISTRY.ids())
+
+# Added last so it is outermost: its timings include CORS handling
+app.add_middleware(TimingMiddleware, metrics=METRICS)
 
-# Backend Agents (Admin/Internal)
-backend_agents = {
-    "customer_experience": customer_experience_agent,
-    "product_analytics": product_analytics_agent,
-    "sales_optimizer": sales_optimizer_agent,
-    "review_synthesis": review_synthesis_agent,
-    "financial_reports": financial_reports_agent,
-    "landing_page_generator": landing_page_generator_agent
+# Frontend Agents (Customer-facing) and Backend Agents (Admin/Internal).
+# Both are views of the registry: an agent is loaded when it is first looked up
+frontend_agents = REGISTRY.tier_view("frontend")
+backend_agents = REGISTRY.tier_view("backend")
+
+# Retrieval and response assembly run on this pool, never on the event loop
+EXECUTOR = create_executor(DEFAULT_EXECUTOR_KIND, DEFAULT_EXECUTOR_WORKERS)
+
+# Customer-facing traffic gets most of the pool; admin queries cannot starve it
+TIER_LIMITERS = {
+    "frontend": TierLimiter("frontend", int(os.getenv("APEX_FRONTEND_MAX_IN_FLIGHT", "16")),
+                            int(os.getenv("APEX_FRONTEND_MAX_QUEUE", "64"))),
+    "backend": TierLimiter("backend", int(os.getenv("APEX_BACKEND_MAX_IN_FLIGHT", "4")),
+                           int(os.getenv("APEX_BACKEND_MAX_QUEUE", "16")))
 }
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+# Every agent's intent keywords, compiled once into a single automaton
+INTENT_ROUTER = IntentRouter(AGENT_INTENTS)
+
 # Request/Response models
+# Upper bound on QueryRequest.k; every source costs retrieval work and payload
+MAX_SOURCES = 20
+
 class QueryRequest(BaseModel):
     query: str
     agent: str
-    k: int = 3
+    k: int = Field(3, ge=0, le=MAX_SOURCES)
 
 class QueryResponse(BaseModel):
     response: str
     agent: str
     sources: Optional[List[Dict]] = None
 
+# Upper bound on the number of items in one /query/batch request
+MAX_BATCH_SIZE = 50
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., max_length=MAX_BATCH_SIZE)
+
+class BatchItemError(BaseModel):
+    status_code: int
+    detail: str
+
+class BatchItemResult(BaseModel):
+    """A QueryResponse, or the agent plus an error for items that failed"""
+    response: Optional[str] = None
+    agent: str
+    sources: Optional[List[Dict]] = None
+    error: Optional[BatchItemError] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchItemResult]
+
+# Key of an agent's fallback response in CANNED_RESPONSE_JSON
+DEFAULT_INTENT = "default"
+
+def encode_canned_responses(router: IntentRouter) -> Dict[tuple, bytes]:
+    """Validate every canned response against QueryResponse once and pre-encode its JSON
+    
+    Requests then splice the stored bytes into the body instead of running
+    model validation and JSON encoding over the same large strings each time.
+    """
+    encoded = {}
+    for agent_name, table in router.agent_intents.items():
+        responses = [(intent.name, intent.response) for intent in table.intents] + [(DEFAULT_INTENT, table.default)]
+        for intent_name, text in responses:
+            QueryResponse(response=text, agent=agent_name, sources=[])
+            encoded[(agent_name, intent_name)] = dumps(text)
+    return encoded
+
+# (agent, intent) -> JSON-encoded response string, built at startup
+CANNED_RESPONSE_JSON = encode_canned_responses(INTENT_ROUTER)
+
+def encode_canned_stream_frames(router: IntentRouter) -> Dict[tuple, List[bytes]]:
+    """Pre-encode every canned response as the SSE "chunk" frames /query/stream sends"""
+    frames = {}
+    for agent_name, table in router.agent_intents.items():
+        responses = [(intent.name, intent.response) for intent in table.intents] + [(DEFAULT_INTENT, table.default)]
+        for intent_name, text in responses:
+            frames[(agent_name, intent_name)] = [sse_event("chunk", dumps(piece)) for piece in split_chunks(text)]
+    return frames
+
+# (agent, intent) -> ready-to-send SSE frames of the response text
+CANNED_RESPONSE_FRAMES = encode_canned_stream_frames(INTENT_ROUTER)
+
+# Fingerprint of everything besides the request that shapes a query body:
+# API version, agent table and every canned answer
+CONTENT_VERSION = content_version(app.version, repr(AGENT_SPECS),
+                                  *(b"%s/%s=" % (agent.encode(), intent.encode()) + body
+                                    for (agent, intent), body in sorted(CANNED_RESPONSE_JSON.items())))
+
+
+def encode_static(body: Dict) -> Tuple[bytes, str]:
+    """JSON body and strong ETag for a response that only changes on deploy"""
+    encoded = dumps(body)
+    return encoded, make_etag(encoded)
+
+# Route listings are derived from the registry, so they are encoded once
+ROOT_RESPONSE = encode_static({
+    "message": "NutraFuel AI API v2.0", 
+    "frontend_agents": list(frontend_agents.keys()),
+    "backend_agents": list(backend_agents.keys()),
+    "docs": "/docs"
+})
+FRONTEND_LISTING = encode_static({"agents": REGISTRY.listing("frontend")})
+BACKEND_LISTING = encode_static({"agents": REGISTRY.listing("backend")})
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def cacheable_response(http_request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """body with its validators, or an empty 304 if the client already holds this version"""
+    if etag_matches(http_request.headers.get("if-none-match", ""), etag):
+        return not_modified(etag, cache_control)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE,
+                    headers={"ETag": etag, "Cache-Control": cache_control})
+
 @app.get("/")
-async def root():
-    return {
-        "message": "NutraFuel AI API v2.0", 
-        "frontend_agents": list(frontend_agents.keys()),
-        "backend_agents": list(backend_agents.keys()),
-        "docs": "/docs"
-    }
+async def root(http_request: Request):
+    return cacheable_response(http_request, *ROOT_RESPONSE, CACHE_CONTROL_STATIC)
 
 @app.get("/agents/frontend")
-async def list_frontend_agents():
-    return {
-        "agents": [
-            {
-                "id": "intelligent_search",
-                "name": "Intelligent Search",
-                "description": "AI-powered product search and recommendations"
-            },
-            {
-                "id": "customer_service",
-                "name": "Customer Service",
-                "description": "Order tracking, returns, and customer support"
-            },
-            {
-                "id": "rachel_nutrition",
-                "name": "Rachel - Nutrition Coach",
-                "description": "Meal planning and nutrition guidance"
-            },
-            {
-                "id": "ramy_lifestyle",
-                "name": "Ramy - Lifestyle Coach", 
-                "description": "Style and lifestyle advice"
-            }
-        ]
-    }
+async def list_frontend_agents(http_request: Request):
+    return cacheable_response(http_request, *FRONTEND_LISTING, CACHE_CONTROL_STATIC)
 
 @app.get("/agents/backend")
-async def list_backend_agents():
-    return {
-        "agents": [
-            {
-                "id": "customer_experience",
-                "name": "Customer Experience Agent",
-                "description": "Advanced customer analytics and optimization"
-            },
-            {
-                "id": "product_analytics",
-                "name": "Product Analytics Agent",
-                "description": "Deep product performance and market insights"
-            },
-            {
-                "id": "sales_optimizer",
-                "name": "Sales Optimizer Agent",
-                "description": "Revenue optimization and pricing strategies"
-            },
-            {
-                "id": "review_synthesis",
-                "name": "Review Synthesis Engine",
-                "description": "Customer review analysis and insights"
-            },
-            {
-                "id": "financial_reports",
-                "name": "Financial Report Generator",
-                "description": "Financial analysis and reporting"
-            },
-            {
-                "id": "landing_page_generator",
-                "name": "Landing Page Generator",
-                "description": "Dynamic marketing page creation"
-            }
-        ]
-    }
+async def list_backend_agents(http_request: Request):
+    return cacheable_response(http_request, *BACKEND_LISTING, CACHE_CONTROL_STATIC)
 
 @app.post("/query/frontend", response_model=QueryResponse)
-async def query_frontend_agent(request: QueryRequest):
+async def query_frontend_agent(request: QueryRequest, http_request: Request):
     """Query a frontend (customer-facing) agent"""
     if request.agent not in frontend_agents:
         raise HTTPException(status_code=404, detail=f"Frontend agent '{request.agent}' not found")
     
-    return await process_agent_query(frontend_agents[request.agent], request)
+    return await process_agent_query(request, http_request)
 
 @app.post("/query/backend", response_model=QueryResponse)
-async def query_backend_agent(request: QueryRequest):
+async def query_backend_agent(request: QueryRequest, http_request: Request):
     """Query a backend (admin/internal) agent"""
     if request.agent not in backend_agents:
         raise HTTPException(status_code=404, detail=f"Backend agent '{request.agent}' not found")
     
-    return await process_agent_query(backend_agents[request.agent], request)
+    return await process_agent_query(request, http_request)
 
 @app.post("/query", response_model=QueryResponse)
-async def query_agent_legacy(request: QueryRequest):
+async def query_agent_legacy(request: QueryRequest, http_request: Request):
     """Legacy endpoint - tries frontend first, then backend"""
     # Try frontend agents first
     if request.agent in frontend_agents:
-        return await process_agent_query(frontend_agents[request.agent], request)
+        return await process_agent_query(request, http_request)
     
     # Try backend agents
     if request.agent in backend_agents:
-        return await process_agent_query(backend_agents[request.agent], request)
+        return await process_agent_query(request, http_request)
     
     raise HTTPException(status_code=404, detail=f"Agent '{request.agent}' not found")
 
-def generate_mock_response(agent_name: str, query: str, agent_data: list) -> str:
-    """Generate mock AI responses using hardcoded data"""
-    query_lower = query.lower()
-    
-    # Agent-specific response logic
-    if agent_name == "rachel_nutrition":
-        if any(word in query_lower for word in ["dinner", "meal", "cook", "recipe"]):
-            return """Hi! I'm Rachel, your nutrition coach! 🍎
-
-For muscle-building dinners, I love recommending:
-
-**🍗 Grilled Chicken Power Bowl**
-- 6oz grilled chicken breast (42g protein)
-- 1 cup jasmine rice (45g carbs)
-- Steamed broccoli and bell peppers
-- 1 tbsp olive oil (healthy fats)
-
-**🐟 Salmon Recovery Plate**
-- 5oz baked salmon (35g protein + omega-3s)
-- Sweet potato wedges (complex carbs)
-- Asparagus with garlic
-- Perfect post-workout meal!
-
-**⏰ Timing Tip:** Have this 1-2 hours after your workout, and it pairs perfectly with your Whey Protein shake for maximum muscle protein synthesis!
-
-Let's fuel your goals! 💪"""
-        
-        elif any(word in query_lower for word in ["breakfast", "morning", "pre-workout"]):
-            return """Good morning! I'm Rachel! 🌅
-
-Here are my favorite muscle-building breakfast ideas:
-
-**🥞 Protein Power Pancakes**
-- 2 whole eggs + 2 egg whites
-- 1/2 cup oats blended
-- 1 scoop vanilla protein powder
-- Topped with berries and Greek yogurt
-
-**🍳 Champion's Omelet**
-- 3 whole eggs + 2 egg whites
-- Spinach, mushrooms, bell peppers
-- 1 slice whole grain toast
-- Side of avocado
-
-**⚡ Pre-Workout Fuel (30-60 min before):**
-- Banana with almond butter
-- Or overnight oats with protein powder
-
-Nutrition made simple! What's your training schedule like? 💪"""
-        
-        else:
-            return """Hi there! I'm Rachel, your personal nutrition coach! 🍎
-
-I'm here to help you create delicious, healthy meals that support your fitness goals! Whether you're looking to:
-
-- 💪 Build lean muscle
-- 🔥 Burn fat while preserving muscle  
-- ⚡ Fuel your workouts
-- 🛌 Optimize recovery
-
-I can help you with meal planning, recipe ideas, and nutrition timing that works with your NutraFuel supplement routine.
-
-Ask me things like:
-- "What should I make for dinner for muscle building?"
-- "I need a quick post-workout meal"
-- "Help me meal prep for the week"
-
-Let's fuel your potential! What are your specific goals? 🎯"""
-
-    elif agent_name == "intelligent_search":
-        if any(word in query_lower for word in ["muscle", "build", "gain", "bulk"]):
-            return """🔍 **Perfect Muscle Building Stack Found!**
-
-Based on your goals, I recommend the **Lean Muscle Stack**:
-
-**🥇 Core Stack ($95 - Save $8!)**
-- **Whey Protein Isolate** - $49 (25g complete protein)
-- **Creatine Monohydrate** - $29 (strength & power gains)  
-- **Multivitamin Elite** - $25 (nutritional foundation)
-
-**💪 Why This Works:**
-- Whey + Creatine increases muscle protein synthesis by 40%
-- Perfect post-workout combination for lean gains
-- Multivitamin supports recovery and overall health
-
-**🚀 Upgrade Options:**
-- Add Pre-Workout Complex ($39) for intense training sessions
-- Add BCAA Recovery ($35) for enhanced endurance
-
-**📈 Expected Results:**
-- 2-4 lbs lean muscle gain in 8 weeks
-- 15-20% strength increase
-- Faster recovery between workouts
-
-Ready to build lean muscle? This stack has helped thousands achieve their goals! 💪"""
-
-        elif any(word in query_lower for word in ["fat", "burn", "lose", "cut", "lean"]):
-            return """🔥 **Ultimate Fat Burning Stack!**
-
-Perfect for preserving muscle while burning fat:
-
-**🥇 Fat Loss Stack ($108 - Save $8!)**
-- **Whey Protein Isolate** - $49 (preserve muscle)
-- **Fat Burner Pro** - $42 (boost metabolism)
-- **Multivitamin Elite** - $25 (support during deficit)
-
-**🎯 Why This Combination Works:**
-- Protein prevents muscle loss during fat loss
-- Fat Burner increases metabolism by 12-15%
-- Maintains energy levels during calorie deficit
-
-**⚡ Pro Tips:**
-- Take Fat Burner 30 minutes before meals
-- Whey protein between meals to stay full
-- Perfect for body recomposition goals
-
-**📊 Expected Results:**
-- 1-2 lbs fat loss per week
-- Muscle preservation during cut
-- Increased energy and focus
-
-This stack helps you burn fat while keeping your hard-earned muscle! 🔥"""
-
-        else:
-            return """🔍 **Welcome to NutraFuel Intelligent Search!**
-
-I'm here to help you find the perfect supplements for your goals! Tell me what you're looking for:
-
-**🎯 Popular Goals:**
-- "Help me build lean muscle"
-- "A stack to burn fat but keep muscle"
-- "Best supplements for strength training"
-- "What should I take for better recovery?"
-
-**💪 Current Bestsellers:**
-- **Lean Muscle Stack** - $95 (Whey + Creatine + Multi)
-- **Fat Loss Stack** - $108 (Whey + Fat Burner + Multi)  
-- **Performance Stack** - $105 (Pre-workout + BCAA + Recovery)
-
-**🏆 All Products Include:**
-- Third-party tested for purity
-- 30-day money-back guarantee
-- Free shipping on orders $75+
-
-What are your fitness goals? I'll recommend the perfect stack! 🚀"""
-
-    elif agent_name == "customer_service":
-        if "1439221" in query or "track" in query_lower:
-            return """🎧 **NutraFuel Customer Service - Order Update!**
-
-**Order #1439221 Status:** ✅ **SHIPPED!**
-
-**📦 Tracking Information:**
-- Tracking Number: 1Z999AA1234567890
-- Shipped Date: January 15, 2024
-- Carrier: UPS Ground
-- Expected Delivery: 2-3 business days
-
-**📋 Your Order:**
-- Whey Protein Isolate (Vanilla) - $49.00
-- Creatine Monohydrate - $29.00
-- **Total:** $78.00 (Free shipping applied!)
-
-**📍 Delivery Address:** [Your confirmed address]
-
-**🔔 Next Steps:**
-- You'll receive email updates on delivery progress
-- Track directly at: ups.com with your tracking number
-- Questions? Reply here or call (555) 123-FUEL
-
-Thanks for choosing NutraFuel! Your gains are on the way! 💪"""
-
-        elif any(word in query_lower for word in ["return", "refund", "exchange"]):
-            return """🎧 **NutraFuel Returns & Exchanges**
-
-**✅ 30-Day Money-Back Guarantee**
-
-**📝 Easy Return Process:**
-1. Contact us within 30 days of purchase
-2. We'll email you a prepaid return label
-3. Send back unused portion (even if opened!)
-4. Full refund processed in 3-5 business days
-
-**🔄 Exchange Options:**
-- Different flavor? No problem!
-- Wrong product? We'll swap it!
-- Size issues? Easy exchange!
-
-**💡 Common Solutions:**
-- **Taste concerns?** Try mixing with different liquids
-- **Texture issues?** Blend with ice or use shaker bottle
-- **Not seeing results?** Our nutrition team can help optimize your routine
-
-**📞 Need Help?**
-- Chat with us here 24/7
-- Call: (555) 123-FUEL
-- Email: support@nutrafuel.com
-
-We stand behind our products 100%! What can I help you with? 😊"""
-
-        else:
-            return """🎧 **Welcome to NutraFuel Customer Service!**
-
-I'm here to help with:
-
-**📦 Order Support:**
-- Track your order (just give me your order number!)
-- Shipping questions and delivery updates
-- Order modifications and cancellations
-
-**🔄 Returns & Exchanges:**
-- 30-day money-back guarantee
-- Easy return process with prepaid labels
-- Product exchanges and flavor swaps
+# GET forms of the query endpoints; unlike POST, CDNs and browsers cache them
 
-**💳 Account Management:**
-- Update billing and shipping information
-- Manage your subscription preferences
-- Pause or modify recurring orders
+@app.get("/query/frontend", response_model=QueryResponse)
+async def query_frontend_agent_get(http_request: Request, agent: str, query: str,
+                                   k: int = Query(3, ge=0, le=MAX_SOURCES)):
+    return await query_frontend_agent(QueryRequest(agent=agent, query=query, k=k), http_request)
 
-**❓ Product Questions:**
-- Usage instructions and timing
-- Ingredient information and allergens
-- Stack recommendations and combinations
+@app.get("/query/backend", response_model=QueryResponse)
+async def query_backend_agent_get(http_request: Request, agent: str, query: str,
+                                  k: int = Query(3, ge=0, le=MAX_SOURCES)):
+    return await query_backend_agent(QueryRequest(agent=agent, query=query, k=k), http_request)
 
-**🎯 Quick Help:**
-- Free shipping on orders over $75
-- 15% off with subscription orders
-- Same-day processing before 2 PM EST
-
-How can I help make your NutraFuel experience amazing? 😊"""
-
-    elif agent_name == "ramy_lifestyle":
-        return """👋 **Hey there! I'm Ramy, your lifestyle coach!**
-
-I'm all about helping you live your best life - from style tips to daily optimization! 
-
-**🎯 What I Help With:**
-- **Style & Fashion** - Look confident in and out of the gym
-- **Daily Routines** - Optimize your schedule for success
-- **Lifestyle Habits** - Build sustainable healthy practices
-- **Confidence Building** - Feel amazing inside and out
-
-**💡 Quick Tips:**
-- **Morning Routine:** Start with protein, hydration, and movement
-- **Gym Style:** Comfortable athletic wear that makes you feel powerful
-- **Recovery Days:** Active rest with walks, stretching, or light yoga
-- **Evening Wind-down:** Limit screens, prep for tomorrow, quality sleep
-
-**🔥 Popular Topics:**
-- "Help me build a morning routine"
-- "What should I wear to feel confident?"
-- "How do I stay motivated?"
-- "Lifestyle tips for busy professionals"
-
-What area of your lifestyle would you like to level up? Let's make it happen! ✨"""
-
-    # Backend Agents
-    elif agent_name == "review_synthesis":
-        if "whey" in query_lower or "protein" in query_lower:
-            return """📊 **Review Synthesis - Whey Protein Isolate Analysis**
-
-After analyzing 2,341 customer reviews for Whey Protein Isolate (last 90 days), customers report 96% satisfaction with an average 4.8/5 star rating. The most praised features are exceptional taste and mixability (mentioned in 89% of positive reviews), with customers consistently noting "no clumps" and "best-tasting protein I've ever had."
-
-**Key Highlights:**
-- **Taste & Texture**: 89% praise the flavor and smooth mixing
-- **Results**: 84% report visible muscle gains within 8 weeks
-- **Quality**: 91% specifically mention appreciation for third-party testing
-- **Value**: 73% consider it "worth the price" vs competitors
-
-**Top Customer Quotes:**
-- "Best tasting protein I've ever had!" - Sarah M.
-- "Mixes perfectly, no clumps" - Mike T.
-- "Finally found a protein that doesn't upset my stomach" - James K.
-
-**Minor Improvement Areas:**
-- 12% request larger container options (5lb vs 2lb)
-- 8% desire more flavor variety beyond vanilla/chocolate
-
-**Recommendation Impact:** 96% would recommend to friends, making it our highest-rated product."""
-
-        elif "creatine" in query_lower:
-            return """📊 **Review Synthesis - Creatine Monohydrate Analysis**
-
-After analyzing 1,892 customer reviews for Creatine Monohydrate (last 90 days), customers report 94% satisfaction with an average 4.7/5 star rating. The standout feature is rapid strength gains, with 87% reporting measurable improvements within just 2 weeks of consistent use.
-
-**Key Highlights:**
-- **Effectiveness**: 94% report strength improvements within 2-4 weeks
-- **Purity**: 92% praise the unflavored, pure formulation
-- **Value**: 81% consider it "best value" compared to competitors
-- **Mixability**: 88% note it dissolves easily in any beverage
-
-**Top Customer Quotes:**
-- "Strength gains in just 2 weeks!" - Alex R.
-- "Pure, effective, great value" - Jessica L.
-- "No bloating like other creatine products" - Marcus T.
-
-**Minor Improvement Areas:**
-- 6% would prefer flavored options
-- 4% suggest smaller serving size options
-
-**Recommendation Impact:** 94% would recommend to friends."""
-
-        elif "pre-workout" in query_lower or "preworkout" in query_lower:
-            return """📊 **Review Synthesis - Pre-Workout Complex Analysis**
-
-After analyzing 1,156 customer reviews for Ignite Pre-Workout (last 90 days), customers report 91% satisfaction with an average 4.6/5 star rating. The most valued benefit is sustained energy without the dreaded afternoon crash, mentioned by 78% of reviewers.
-
-**Key Highlights:**
-- **Energy**: 91% report excellent energy levels for 2-3 hour workouts
-- **Focus**: 84% mention improved mental clarity and workout focus
-- **No Crash**: 78% specifically praise "no crash" or jitters
-- **Taste**: 82% rate flavors positively (blue raspberry most popular)
-
-**Top Customer Quotes:**
-- "Perfect energy without the crash" - David P.
-- "Best focus I've had during workouts" - Emily R.
-- "Clean energy that lasts the whole session" - Brandon M.
-
-**Minor Improvement Areas:**
-- 18% desire more flavor options (tropical frequently requested)
-- 9% prefer lower caffeine alternative option
-
-**Recommendation Impact:** 91% would recommend to friends."""
-
-        elif "fat" in query_lower or "burn" in query_lower or "weight loss" in query_lower:
-            return """📊 **Review Synthesis - Fat Burner Pro Analysis**
-
-After analyzing 756 customer reviews for Burn Elite Fat Burner (last 90 days), customers report 87% satisfaction with an average 4.6/5 star rating. The most effective reported benefit is appetite control, with 76% noting reduced cravings and better portion control.
-
-**Key Highlights:**
-- **Appetite Control**: 76% report significant reduction in cravings
-- **Energy**: 69% mention sustained energy without jitters
-- **Results**: 67% report 8-15 lbs weight loss over 8 weeks
-- **No Jitters**: 71% specifically note "clean energy" feeling
-
-**Top Customer Quotes:**
-- "Finally controls my cravings!" - Lisa M.
-- "Lost 12 lbs in 6 weeks with diet and exercise" - Tom R.
-- "Energy without the jitters" - Amanda S.
-
-**Minor Improvement Areas:**
-- 13% note mild stomach sensitivity when taken on empty stomach
-- 11% prefer capsule form over powder
-
-**Recommendation Impact:** 87% would recommend to friends."""
-
-        else:
-            # Concise general overview - 2-3 sentences as requested
-            return """📊 **Review Synthesis Engine - Overall Summary**
-
-After analyzing 8,247 customer reviews across all products (last 90 days), APEX maintains a strong 4.6/5 star rating with 94% overall satisfaction. Customers consistently praise product quality, third-party testing transparency, and fast results, with top-rated products including Whey Protein Isolate (4.8/5 from 2,341 reviews) and Creatine Monohydrate (4.7/5 from 1,892 reviews). The most common improvement requests are expanded flavor options (23%) and larger container sizes (12%).
-
-Would you like me to dive deeper into a specific product's reviews? Just mention the product name."""
-
-    elif agent_name == "financial_reports":
-        if any(word in query_lower for word in ["q2", "q1", "quarter", "compare"]):
-            return """📈 **Q2 vs Q1 2024 Financial Performance**
-
-**🎯 Executive Summary:**
-Q2 2024 shows strong growth across all key metrics!
-
-**💰 Revenue Comparison:**
-- **Q1 2024:** $2.1M total revenue
-- **Q2 2024:** $2.8M total revenue  
-- **Growth:** +33.3% quarter-over-quarter 🚀
-
-**📊 Revenue Breakdown by Category:**
-- **Protein Products:** Q1: $847K → Q2: $1.12M (+32%)
-- **Performance Supplements:** Q1: $634K → Q2: $896K (+41%)
-- **Wellness & Recovery:** Q1: $419K → Q2: $542K (+29%)
-- **Bundles & Stacks:** Q1: $203K → Q2: $378K (+86%) 🔥
-
-**🎪 Subscription Performance:**
-- **Q1 Subscribers:** 3,247 active
-- **Q2 Subscribers:** 4,891 active (+51% growth!)
-- **Monthly Recurring Revenue:** Q1: $127K → Q2: $189K
-
-**🏆 Top Performers:**
-1. **Lean Muscle Stack** - $89K revenue (Q2)
-2. **Whey Protein Isolate** - $312K individual sales
-3. **New Customer Bundles** - 67% conversion rate
-
-**💡 Key Insights:**
-- Bundle strategy driving 86% growth in stack sales
-- Subscription model showing excellent retention (91%)
-- Summer fitness season boosted performance supplements
-
-**🎯 Q3 Projections:** $3.2M revenue target (+14% growth)
-
-Excellent momentum heading into Q3! 📈"""
-        else:
-            return """📊 **Financial Reports Dashboard**
-
-**Current Performance Metrics (YTD 2024):**
-
-**💰 Revenue Overview:**
-- **Total Revenue:** $8.7M (YTD)
-- **Monthly Growth Rate:** +12.4% average
-- **Top Revenue Month:** June 2024 ($1.1M)
-
-**📈 Key Performance Indicators:**
-- **Average Order Value:** $67.50 (+8% vs 2023)
-- **Customer Lifetime Value:** $247 (+15% vs 2023)
-- **Subscription Revenue:** 34% of total revenue
-- **Return Customer Rate:** 68%
-
-**🎯 Product Performance:**
-- **Best Seller:** Whey Protein Isolate ($2.1M YTD)
-- **Fastest Growing:** BCAA Recovery (+78% vs 2023)
-- **Highest Margin:** Bundle packages (42% margin)
-
-**💳 Payment & Subscription Metrics:**
-- **Active Subscriptions:** 4,891 customers
-- **Subscription Retention:** 91% (12-month)
-- **Average Subscription Value:** $38.60/month
-
-**🎪 Seasonal Trends:**
-- **Q1:** New Year fitness surge (+45%)
-- **Q2:** Summer prep momentum (+33%)
-- **Q3 Forecast:** Back-to-school athletes (+28%)
-
-What specific financial metrics would you like me to analyze? 📊"""
-
-    elif agent_name == "landing_page_generator":
-        if any(word in query_lower for word in ["collagen", "women", "40", "older"]):
-            return """# 🌟 Elite Collagen Matrix - Women Over 40 Landing Page
-
-## Hero Section
-**Headline:** "Finally, Collagen That Actually Works - Designed for Women Over 40"
-**Subheading:** "The Complete Beauty & Wellness Solution for Radiant Skin, Strong Joints & Lasting Energy"
-
-## Hero Offer
-**🌸 WOMEN'S WELLNESS TRANSFORMATION BUNDLE**
-- ✨ Elite Collagen Matrix (2 containers) - Premium hydrolyzed collagen
-- 💪 Whey Protein Isolate - Maintain muscle & metabolism  
-- 🌟 Peak Multivitamin - Complete nutrition for women 40+
-- 📖 "Ageless Beauty" nutrition guide
-- 🎁 FREE collagen recipe book
-
-**Pricing:** ~~$189 value~~ **TODAY ONLY $127**
-
-## Benefits for Women 40+
-- ✅ **Skin Elasticity** - Reduce fine lines in 6-8 weeks
-- ✅ **Joint Comfort** - Move freely without stiffness
-- ✅ **Hair & Nails** - Stronger, healthier growth
-- ✅ **Metabolism Support** - Maintain healthy weight
-- ✅ **Energy Boost** - Feel vibrant all day
-
-## Social Proof
-- 2,847 women over 40 transformed
-- 4.8/5 star rating from verified customers
-- "I look 10 years younger!" - Maria, age 47
-- "My joints feel amazing again!" - Susan, age 52
-
-## Scientific Backing
-- **10g Hydrolyzed Collagen** per serving
-- **Types I, II & III** collagen peptides
-- **Third-party tested** for purity
-- **Clinically studied** ingredients
-
-## Urgency & Guarantee
-- ⏰ **48-Hour Flash Sale** - Limited time pricing
-- 📦 Only 89 bundles remaining at this price
-- 🛡️ **60-Day Money-Back Guarantee**
-- 🚚 FREE shipping on all orders
-
-## Call-to-Action
-**🛒 SECURE YOUR TRANSFORMATION - ORDER NOW $127**
-*Transform your skin, joints & energy in 60 days or your money back!*
-
-*This landing page is optimized for women 40+ seeking comprehensive wellness solutions.*"""
-        else:
-            return """# 🚀 Dynamic Landing Page Generator
-
-## Current Template: High-Converting Supplement Landing Page
-
-**🎯 Key Elements Included:**
-- **Compelling Headline** with benefit-focused messaging
-- **Hero Offer** with bundle pricing and urgency
-- **Social Proof** with customer testimonials and ratings
-- **Scientific Backing** with ingredient details
-- **Risk Reversal** with money-back guarantee
-
-**📊 Conversion Optimization Features:**
-- Multiple call-to-action buttons
-- Scarcity elements (limited quantity/time)
-- Trust badges and certifications
-- Mobile-responsive design
-- Fast loading optimization
-
-**🎪 Popular Landing Page Types:**
-- **Weight Loss Focus** - "Transform Your Body in 90 Days"
-- **Muscle Building** - "Build Lean Muscle Without Fat"
-- **Women's Wellness** - "Look & Feel 10 Years Younger"
-- **Athletic Performance** - "Unlock Your Peak Potential"
-
-**💡 Best Practices Applied:**
-- Benefit-driven headlines
-- Emotional triggers and urgency
-- Clear value proposition
-- Strong guarantee and trust signals
-
-Specify your target audience and product focus for a customized landing page! 🎯"""
-
-    elif agent_name == "product_analytics":
-        return """📊 **Product Analytics Dashboard - Performance Insights**
-
-**🏆 Top Performing Products (Q2 2024):**
-
-**1. Whey Protein Isolate** ⭐
-- **Revenue:** $312K (28% of total)
-- **Units Sold:** 6,347 containers
-- **Customer Satisfaction:** 4.8/5 stars
-- **Repeat Purchase Rate:** 89%
-- **Trend:** +23% vs Q1
-
-**2. Creatine Monohydrate** 💪
-- **Revenue:** $187K (17% of total)  
-- **Units Sold:** 6,448 containers
-- **Customer Satisfaction:** 4.7/5 stars
-- **Repeat Purchase Rate:** 82%
-- **Trend:** +31% vs Q1
-
-**3. Pre-Workout Complex** ⚡
-- **Revenue:** $156K (14% of total)
-- **Units Sold:** 4,001 containers
-- **Customer Satisfaction:** 4.6/5 stars
-- **Repeat Purchase Rate:** 76%
-- **Trend:** +18% vs Q1
-
-**📈 Bundle Performance:**
-- **Lean Muscle Stack:** $89K revenue, 67% take rate
-- **Fat Loss Stack:** $73K revenue, 54% take rate
-- **Performance Stack:** $61K revenue, 48% take rate
-
-**🎯 Customer Insights:**
-- **Average Products per Order:** 2.3 items
-- **Bundle Customers** spend 73% more than single-product buyers
-- **Subscription Customers** have 4.2x higher lifetime value
-
-**🔥 Growth Opportunities:**
-- **BCAA Recovery:** +78% growth potential based on market trends
-- **Women's Collagen:** Underperforming segment with high demand
-- **Sleep Recovery:** Growing category, +45% search volume
-
-**💡 Recommendations:**
-- Expand bundle offerings for top-performing combinations
-- Increase marketing spend on high-growth categories
-- Consider premium product line for high-value customers
-
-What specific product metrics would you like me to analyze deeper? 📊"""
-
-    elif agent_name == "sales_optimizer":
-        return """💰 **Sales Optimization Engine - Revenue Maximization**
-
-**🎯 Current Pricing Strategy Performance:**
-
-**📊 Optimal Price Points (Based on Demand Analysis):**
-- **Whey Protein:** $49 (sweet spot - 31% margin, high volume)
-- **Creatine:** $29 (competitive advantage at this price)
-- **Pre-Workout:** $39 (premium positioning working well)
-- **Bundles:** 15-20% discount drives 73% higher AOV
-
-**🚀 Revenue Optimization Opportunities:**
-
-**1. Dynamic Bundle Pricing** 💡
-- **Current:** Fixed 15% bundle discount
-- **Optimized:** Tiered discounts based on cart value
-  - 2 products: 10% off
-  - 3 products: 15% off  
-  - 4+ products: 20% off
-- **Projected Impact:** +$47K monthly revenue
-
-**2. Subscription Optimization** 📈
-- **Current:** 15% subscription discount
-- **Optimized:** Graduated loyalty pricing
-  - Month 1-3: 15% off
-  - Month 4-12: 20% off
-  - 12+ months: 25% off
-- **Projected Impact:** +31% retention, +$89K LTV
-
-**3. Seasonal Pricing Strategy** 🎪
-- **January-March:** New Year bundles (+25% premium)
-- **May-July:** Summer shred stacks (+18% premium)
-- **September:** Back-to-school performance (+15% premium)
-- **November:** Holiday gift bundles (+20% premium)
-
-**💳 Payment Optimization:**
-- **Buy Now, Pay Later** option increases conversion by 34%
-- **Auto-refill discounts** boost subscription adoption by 67%
-- **First-time buyer** 20% discount converts 52% of consultations
-
-**🎯 Immediate Actions:**
-1. Implement tiered bundle pricing this week
-2. Test graduated subscription rewards
-3. Launch seasonal pricing for summer prep
-4. Add payment flexibility options
-
-**📈 Projected Revenue Impact:** +$127K monthly (+23% increase)
-
-Ready to implement these optimizations? 🚀"""
-
-    elif agent_name == "customer_experience":
-        return """🎯 **Customer Experience Analytics - Satisfaction Insights**
-
-**📊 Overall Experience Metrics:**
-- **Customer Satisfaction Score:** 4.6/5 ⭐
-- **Net Promoter Score:** 67 (Industry average: 31)
-- **Customer Retention Rate:** 89% (12-month)
-- **Support Resolution Time:** 2.3 hours average
-
-**🛍️ Customer Journey Analysis:**
-
-**Discovery Phase:**
-- **Top Traffic Sources:** Google (34%), Social Media (28%), Referrals (23%)
-- **Most Viewed Pages:** Product comparisons, ingredient guides
-- **Conversion Rate:** 12.4% (Industry average: 3.2%)
-
-**Purchase Experience:**
-- **Cart Abandonment Rate:** 23% (down from 31% last quarter)
-- **Checkout Completion:** 94% success rate
-- **Average Decision Time:** 4.7 days from first visit
-
-**Post-Purchase Satisfaction:**
-- **Delivery Experience:** 4.8/5 rating
-- **Product Quality:** 4.7/5 rating  
-- **Packaging:** 4.5/5 rating
-- **First Use Experience:** 4.6/5 rating
-
-**🎪 Customer Segments Performance:**
-
-**New Customers (0-3 months):**
-- Satisfaction: 4.4/5
-- Most Popular: Starter bundles
-- Key Need: Education and guidance
-
-**Established Customers (3-12 months):**
-- Satisfaction: 4.7/5
-- Most Popular: Individual products + subscriptions
-- Key Need: Variety and convenience
-
-**Loyal Customers (12+ months):**
-- Satisfaction: 4.9/5
-- Most Popular: Premium bundles, new releases
-- Key Need: Exclusive access and rewards
-
-**💡 Experience Enhancement Opportunities:**
-1. **Onboarding Program** for new customers (+0.3 satisfaction boost)
-2. **Loyalty Rewards** for established customers (+23% retention)
-3. **VIP Access** for loyal customers (+$89 average spend increase)
-
-**🔥 Success Stories:**
-- "Best customer service I've experienced!" - Mike R.
-- "Products arrived faster than expected!" - Sarah L.  
-- "Love the educational content!" - Alex M.
-
-What aspect of customer experience would you like to optimize? 🎯"""
+@app.get("/query", response_model=QueryResponse)
+async def query_agent_legacy_get(http_request: Request, agent: str, query: str,
+                                 k: int = Query(3, ge=0, le=MAX_SOURCES)):
+    return await query_agent_legacy(QueryRequest(agent=agent, query=query, k=k), http_request)
 
+def generate_mock_response(agent_name: str, query: str, agent_data: list) -> str:
+    """Generate mock AI responses from the agents' intent tables in one pass over the query"""
+    response = INTENT_ROUTER.respond(agent_name, query)
+    if response is not None:
+        return response
+    
     # Default response for any agent
     return f"""Hello! I'm your {agent_name.replace('_', ' ').title()} assistant! 
 
@@ -836,39 +244,98 @@ I'm here to help you with all your questions. Based on your query "{query}", I'd
 
 What specific information are you looking for today? 😊"""
 
-async def process_agent_query(agent, request: QueryRequest):
-    """Process query for any agent using mock data"""
+def encode_query_response(agent_name: str, query: str, sources_json: bytes) -> bytes:
+    """QueryResponse JSON for a mock answer from the pre-encoded response text and sources
+    
+    Marks the intent, generation and serialization stages when called for a
+    request (on the executor there is no request timer and marks do nothing).
+    """
+    intent = INTENT_ROUTER.match(agent_name, query)
+    mark("intent")
+    response_json = CANNED_RESPONSE_JSON.get((agent_name, intent.name if intent else DEFAULT_INTENT))
+    if response_json is None:
+        # Only the generic greeting depends on the query; encode it per request
+        response_json = dumps(generate_mock_response(agent_name, query, []))
+    mark("generation")
+    body = json_object([("response", response_json), ("agent", dumps(agent_name)), ("sources", sources_json)])
+    mark("serialization")
+    return body
+
+def answer_queries(agent_name: str, queries: List[str], k: int) -> List[bytes]:
+    """Retrieve sources and assemble QueryResponse bodies for one agent's queries
+    
+    Runs on the executor. It takes only picklable arguments and looks the
+    agent up itself, so it works in a process pool as well as a thread pool.
+    """
+    agent = find_agent(agent_name)
+    batch_sources = agent.retrieve_sources_json_many(queries, k)
+    return [encode_query_response(agent_name, query, sources_json)
+            for query, sources_json in zip(queries, batch_sources)]
+
+def query_etag(agent_name: str, fingerprint: str, query: str, k: int) -> str:
+    """Strong ETag of a query body: fixed by the deployed code, the corpus content and the request
+    
+    The corpus fingerprint rather than the generation, which restarts at the
+    same value in every process and after every deploy.
+    """
+    return make_etag(CONTENT_VERSION, agent_name, fingerprint, query, k)
+
+def retrieve_sources(agent_name: str, query: str, k: int) -> Tuple[str, bytes]:
+    """Executor entry point for the corpus fingerprint and sources JSON of one query"""
+    agent = find_agent(agent_name)
+    # Read the fingerprint first: a reload racing with retrieval can then only
+    # make an ETag stale (a miss later), never label an old body as new
+    fingerprint = agent.fingerprint
+    return fingerprint, agent.retrieve_sources_json(query, k)
+
+def agent_tier(agent_name: str) -> str:
+    return REGISTRY.tier(agent_name)
+
+async def run_agent_work(agent_name: str, func, *args):
+    """Run func on the executor under the agent tier's in-flight limit"""
+    return await TIER_LIMITERS[agent_tier(agent_name)].run(EXECUTOR, func, *args)
+
+# Bursts of the same query (campaign launches) share one retrieval
+QUERY_FLIGHTS = SingleFlight("queries")
+
+async def fetch_sources(agent_name: str, query: str, k: int) -> Tuple[str, bytes]:
+    """Corpus fingerprint and sources JSON for a query, joining an identical retrieval already in flight
+    
+    Only the leader takes an executor slot; followers wait on its result.
+    """
+    key = (agent_name, normalize_query(query), k)
+    return await QUERY_FLIGHTS.run(key, lambda: run_agent_work(agent_name, retrieve_sources, agent_name, query, k))
+
+async def process_agent_query(request: QueryRequest, http_request: Request):
+    """Process query for any agent: mock answer text, real retrieved sources"""
+    set_agent(request.agent)
+    mark("routing")
+    if_none_match = http_request.headers.get("if-none-match", "")
+    # A thread-pool server shares the agents, so a revalidation against a
+    # loaded agent is answered from its corpus fingerprint without any retrieval
+    if if_none_match and DEFAULT_EXECUTOR_KIND == "thread" and REGISTRY.is_loaded(request.agent):
+        etag = query_etag(request.agent, REGISTRY.get(request.agent).fingerprint, request.query, request.k)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, CACHE_CONTROL_QUERY)
     try:
-        # Get the agent's hardcoded data
-        agent_data = getattr(agent, 'documents', [])
-        
-        # Generate mock response
-        response_text = generate_mock_response(request.agent, request.query, agent_data)
-        
-        # Create mock sources from agent data
-        sources = []
-        if agent_data:
-            # Use first few documents as sources
-            for i, doc in enumerate(agent_data[:3]):
-                source = {
-                    "content": doc[:100] + "..." if len(doc) > 100 else doc,
-                    "metadata": {
-                        "source": f"{request.agent}_doc_{i+1}",
-                        "title": doc.split(':')[0] if ':' in doc else f"Document {i+1}",
-                        "index": i
-                    },
-                    "relevance_score": 0.95 - (i * 0.1)  # Mock relevance scores
-                }
-                sources.append(source)
-        
-        return QueryResponse(
-            response=response_text,
-            agent=request.agent,
-            sources=sources
-        )
+        # The agent's retriever ranks request.k documents and serves their
+        # pre-encoded source fragments (cached per query and corpus generation)
+        fingerprint, sources_json = await fetch_sources(request.agent, request.query, request.k)
+        mark("retrieval")
         
+        # Coalesced requests may differ in case and spacing, which the generic
+        # answer echoes, so each assembles its own body. That is a few byte
+        # joins of pre-validated, pre-encoded parts, returned as-is without
+        # response-model validation or re-encoding
+        body = encode_query_response(request.agent, request.query, sources_json)
+        etag = query_etag(request.agent, fingerprint, request.query, request.k)
+        return cacheable_response(http_request, body, etag, CACHE_CONTROL_QUERY)
+    
+    except Overloaded:
+        raise
     except Exception as e:
         print(f"Error in mock agent {request.agent}: {e}")
+        METRICS.record_error(request.agent)
         
         # Simple fallback response
         fallback_message = f"""Hello! I'm your {request.agent.replace('_', ' ').title()} assistant! 
@@ -877,25 +344,266 @@ I'm experiencing a brief issue, but I'm here to help! Your query was: "{request.
 
 Please try asking your question in a different way, and I'll provide you with detailed guidance and recommendations! 😊"""
         
-        return QueryResponse(
-            response=fallback_message,
-            agent=request.agent,
-            sources=[]
+        # Never let a CDN keep the fallback in place of the real answer
+        return JSONResponse(
+            content=QueryResponse(response=fallback_message, agent=request.agent, sources=[]).model_dump(),
+            headers={"Cache-Control": CACHE_CONTROL_LIVE}
         )
 
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_batch(request: BatchQueryRequest):
+    """Answer many queries (frontend and backend agents mixed) in one round trip
+    
+    Items are grouped by agent and k; each group is retrieved with one
+    batched call, so duplicate queries are scored once and shared terms are
+    walked once, and the groups run concurrently. Results come back in
+    request order; an item that fails carries an error instead of failing
+    the batch.
+    """
+    mark("routing")
+    results: List[Optional[bytes]] = [None] * len(request.queries)
+    groups: Dict[tuple, List[int]] = {}
+    for i, item in enumerate(request.queries):
+        if item.agent not in REGISTRY:
+            results[i] = encode_batch_error(item.agent, 404, f"Agent '{item.agent}' not found")
+        else:
+            groups.setdefault((item.agent, item.k), []).append(i)
+    
+    async def run_group(agent_name: str, k: int, slots: List[int]):
+        queries = [request.queries[i].query for i in slots]
+        try:
+            # Groups run concurrently on the executor, each under its tier's limit
+            bodies = await run_agent_work(agent_name, answer_queries, agent_name, queries, k)
+        except Overloaded as e:
+            for i in slots:
+                results[i] = encode_batch_error(agent_name, e.status_code, e.detail)
+            return
+        except Exception as e:
+            print(f"Error in batch query for {agent_name}: {e}")
+            METRICS.record_error(agent_name)
+            for i in slots:
+                results[i] = encode_batch_error(agent_name, 500, "Retrieval failed for this item")
+            return
+        for i, body in zip(slots, bodies):
+            results[i] = body
+    
+    await asyncio.gather(*(run_group(agent_name, k, slots) for (agent_name, k), slots in groups.items()))
+    mark("retrieval")
+    body = json_object([("results", b"[" + b",".join(results) + b"]")])
+    mark("serialization")
+    return Response(content=body, media_type=JSON_MEDIA_TYPE)
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest, http_request: Request):
+    """Stream an agent's answer as server-sent events
+    
+    Events: "sources" (JSON array) first, then "chunk" events whose
+    JSON-string payloads concatenate to the response, then "done"; a failed
+    retrieval sends a single "error" event instead. Work stops as soon as
+    the client goes away.
+    """
+    if request.agent not in REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Agent '{request.agent}' not found")
+    set_agent(request.agent)
+    mark("routing")
+    if await http_request.is_disconnected():
+        return Response(status_code=204)  # Nobody is listening; skip the retrieval
+    # Retrieval is admitted (or rejected with 429/503) before any bytes are sent
+    try:
+        _, sources_json = await fetch_sources(request.agent, request.query, request.k)
+        events = stream_agent_query(sources_json, request, http_request)
+    except Overloaded:
+        raise
+    except Exception as e:
+        print(f"Error streaming {request.agent}: {e}")
+        METRICS.record_error(request.agent)
+        events = stream_error(500, "Retrieval failed")
+    mark("retrieval")
+    return StreamingResponse(
+        events,
+        media_type=SSE_MEDIA_TYPE,
+        # Proxies (nginx, Render) must pass events through instead of buffering the body
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/query/stream")
+async def query_stream_get(http_request: Request, agent: str, query: str, k: int = Query(3, ge=0, le=MAX_SOURCES)):
+    """GET form of /query/stream for browser EventSource clients"""
+    return await query_stream(QueryRequest(agent=agent, query=query, k=k), http_request)
+
+async def stream_error(status_code: int, detail: str):
+    yield sse_event("error", dumps({"status_code": status_code, "detail": detail}))
+
+async def stream_agent_query(sources_json: bytes, request: QueryRequest, http_request: Request):
+    yield sse_event("sources", sources_json)
+    
+    intent = INTENT_ROUTER.match(request.agent, request.query)
+    frames = CANNED_RESPONSE_FRAMES.get((request.agent, intent.name if intent else DEFAULT_INTENT))
+    if frames is None:
+        frames = [sse_event("chunk", dumps(piece))
+                  for piece in split_chunks(generate_mock_response(request.agent, request.query, []))]
+    for frame in frames:
+        # Starlette also cancels this generator once it sees the disconnect
+        if await http_request.is_disconnected():
+            return
+        yield frame
+    yield sse_event("done", json_object([("agent", dumps(request.agent)), ("chunks", dumps(len(frames)))]))
+
+def find_agent(agent_name: str):
+    """Look an agent up by name, loading it on first use; None for unknown names"""
+    return REGISTRY.get(agent_name) if agent_name in REGISTRY else None
+
+def encode_batch_error(agent_name: str, status_code: int, detail: str) -> bytes:
+    return json_object([("agent", dumps(agent_name)),
+                        ("error", dumps({"status_code": status_code, "detail": detail}))])
+
 @app.get("/health")
-async def health_check():
+async def health_check(response: Response):
+    response.headers["Cache-Control"] = CACHE_CONTROL_LIVE
     return {
         "status": "healthy", 
         "api_key_set": bool(os.getenv("OPENAI_API_KEY")),
         "frontend_agents": len(frontend_agents),
-        "backend_agents": len(backend_agents)
+        "backend_agents": len(backend_agents),
+        "loaded_agents": list(REGISTRY.loaded()),
+        "concurrency": {tier: limiter.stats() for tier, limiter in TIER_LIMITERS.items()},
+        "coalescing": QUERY_FLIGHTS.stats()
     }
 
+@app.get("/cache/stats")
+async def cache_stats(response: Response):
+    """Per-agent retrieval cache statistics for sizing the cache from real traffic
+    
+    Only agents that have been loaded are reported; this never loads one.
+    """
+    response.headers["Cache-Control"] = CACHE_CONTROL_LIVE
+    return {
+        "agents": {
+            agent_id: dict(agent.cache.stats(), generation=agent.generation)
+            for agent_id, agent in REGISTRY.loaded().items()
+        }
+    }
+
+def metric_samples():
+    """Scrape-time samples from the caches, limiters, coalescer and registry"""
+    for agent_id, agent in REGISTRY.loaded().items():
+        stats = agent.cache.stats()
+        labels = {"agent": agent_id}
+        yield "apex_retrieval_cache_hits_total", "counter", "Retrieval cache hits", labels, stats["hits"]
+        yield "apex_retrieval_cache_misses_total", "counter", "Retrieval cache misses", labels, stats["misses"]
+        yield "apex_retrieval_cache_evictions_total", "counter", "Retrieval cache evictions", labels, stats["evictions"]
+        yield "apex_retrieval_cache_entries", "gauge", "Retrieval cache entries", labels, stats["size"]
+        yield "apex_retrieval_cache_bytes", "gauge", "Estimated retrieval cache size", labels, stats["bytes"]
+        yield "apex_corpus_generation", "gauge", "Corpus generation", labels, agent.generation
+    for agent_id, seconds in REGISTRY.load_times().items():
+        yield "apex_agent_load_seconds", "gauge", "Time to import and index the agent", {"agent": agent_id}, seconds
+    for tier, limiter in TIER_LIMITERS.items():
+        stats = limiter.stats()
+        labels = {"tier": tier}
+        yield "apex_tier_in_flight", "gauge", "Executor calls running", labels, stats["in_flight"]
+        yield "apex_tier_waiting", "gauge", "Requests queued for an executor slot", labels, stats["waiting"]
+        yield "apex_tier_completed_total", "counter", "Executor calls completed", labels, stats["completed"]
+        for reason in ("queue_full", "timeout"):
+            yield ("apex_tier_rejected_total", "counter", "Requests turned away with 429/503",
+                   dict(labels, reason=reason), stats[f"rejected_{reason}"])
+    flights = QUERY_FLIGHTS.stats()
+    yield "apex_query_retrievals_total", "counter", "Retrievals started for queries", {}, flights["computations"]
+    yield "apex_query_coalesced_total", "counter", "Queries that joined a retrieval in flight", {}, flights["coalesced"]
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(content=METRICS.render(metric_samples()), media_type=PROMETHEUS_MEDIA_TYPE,
+                    headers={"Cache-Control": CACHE_CONTROL_LIVE})
+
 @app.get("/warmup")
-async def warmup():
-    """Warmup endpoint to prevent cold starts"""
-    return {"status": "warmed", "message": "Server is ready"}
+async def warmup(response: Response,
+                 agents: Optional[str] = Query(None, description="Comma-separated agent ids; all agents when omitted")):
+    """Load agents ahead of traffic and report how long each took
+    
+    Loading imports the agent module and builds its corpus and indexes, so
+    it runs on a worker thread and the event loop keeps serving meanwhile.
+    With APEX_EXECUTOR=process the pool workers still load agents on their
+    own first use.
+    """
+    agent_ids = None
+    if agents:
+        agent_ids = [agent_id.strip() for agent_id in agents.split(",") if agent_id.strip()]
+        unknown = [agent_id for agent_id in agent_ids if agent_id not in REGISTRY]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown agents: {', '.join(unknown)}")
+    
+    response.headers["Cache-Control"] = CACHE_CONTROL_LIVE
+    start = time.perf_counter()
+    loaded = await asyncio.to_thread(REGISTRY.load, agent_ids)
+    return {
+        "status": "warmed",
+        "message": "Server is ready",
+        "agents": loaded,
+        "total_seconds": round(time.perf_counter() - start, 4)
+    }
+
+# /debug endpoints answer only requests bearing this token, and do not exist without it
+ADMIN_TOKEN = os.getenv("APEX_ADMIN_TOKEN", "")
+
+def require_admin(authorization: str = Header("")):
+    """Dependency guarding admin-only endpoints"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+PROFILER = StackSampler()
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def debug_profile(seconds: float = Query(10.0, gt=0, le=MAX_SECONDS),
+                        interval_ms: float = Query(DEFAULT_INTERVAL * 1000, ge=1, le=1000),
+                        idle: bool = Query(False, description="Keep samples of threads waiting for work")):
+    """Sample every thread of this worker for a while and return collapsed stacks
+    
+    The output feeds flamegraph.pl or speedscope as-is. Under the prefork
+    server only the worker that takes the request is profiled, and with
+    APEX_EXECUTOR=process the pool processes are not sampled.
+    """
+    try:
+        # The sampler blocks for the whole profile, so it gets a thread of its own
+        profile = await asyncio.to_thread(PROFILER.profile, seconds, interval_ms / 1000, idle)
+    except ProfileInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(StackSampler.collapsed(profile["stacks"]), headers={
+        "Cache-Control": CACHE_CONTROL_LIVE,
+        "X-Profile-Samples": str(profile["samples"]),
+        "X-Profile-Seconds": f"{profile['seconds']:.3f}",
+    })
+
+MB = 1024 * 1024
+
+@app.get("/debug/memory", dependencies=[Depends(require_admin)])
+async def debug_memory(response: Response):
+    """Where this worker's memory goes: per-agent corpus, index and cache bytes plus process RSS
+    
+    Agent figures come from sizes the structures track, so the report is
+    cheap enough to poll. Only loaded agents are reported; this never loads
+    one. unaccounted_mb is RSS not explained by agent data: the interpreter,
+    libraries, request handling and allocator slack.
+    """
+    response.headers["Cache-Control"] = CACHE_CONTROL_LIVE
+    agents = {agent_id: agent.memory_usage() for agent_id, agent in REGISTRY.loaded().items()}
+    agents_bytes = sum(usage["total_bytes"] for usage in agents.values())
+    process = smaps_rollup()
+    return {
+        "pid": os.getpid(),
+        # rss, pss, shared (with the prefork parent and other workers), private, swap; None off Linux
+        "process": process,
+        "agents": agents,
+        "totals": {
+            "agents_mb": round(agents_bytes / MB, 1),
+            "mapped_mb": round(sum(usage["mapped_bytes"] for usage in agents.values()) / MB, 1),
+            "cache_mb": round(sum(usage["cache_bytes"] for usage in agents.values()) / MB, 1),
+            "unaccounted_mb": round(process["rss_mb"] - agents_bytes / MB, 1) if process else None
+        }
+    }
 
 if __name__ == "__main__":
     print("💪 Starting NutraFuel AI API Server...")
@@ -905,4 +613,12 @@ if __name__ == "__main__":
     print("🔧 Backend Agents: http://localhost:8000/agents/backend")
     # Use PORT environment variable for Render deployment
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port) 
\ No newline at end of file
+    workers = int(os.getenv("APEX_WORKERS", "1"))
+    if workers > 1:
+        # Agents are built once in the parent and shared copy-on-write with the
+        # forked workers; APEX_PRELOAD=0 leaves each worker to load its own
+        preload = REGISTRY.load if os.getenv("APEX_PRELOAD", "1") != "0" else None
+        print(f"🧩 Prefork mode: {workers} workers, preload {'on' if preload else 'off'}")
+        serve_prefork(app, "0.0.0.0", port, workers, preload=preload)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port) 
\ No newline at end of file
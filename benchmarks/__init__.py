@@ -0,0 +1,4 @@
+"""Benchmarks for the API server and the retrieval paths behind it
+
+Run from the repository root, e.g. ``python -m benchmarks.load_test``.
+"""
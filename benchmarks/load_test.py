@@ -0,0 +1,349 @@
+"""In-process load test for the API server
+
+Drives ``api_server.app`` through httpx's ASGI transport, so the whole
+request path (middleware, routing, validation, retrieval on the executor,
+response assembly) is exercised without sockets or a separate server
+process. A query mix is replayed against the tier endpoint of each agent at
+a fixed concurrency, in two scenarios:
+
+- ``repeat``: the mix as written, so after the first pass retrieval is
+  served from the agents' caches and the time goes to
+  ``process_agent_query`` and response assembly
+- ``unique``: every query made unique, so each one is a retrieval and the
+  generic answers are built by ``generate_mock_response``
+
+Each scenario reports throughput and p50/p95/p99 latency from a timed
+pass, then allocation figures from a separate sequential pass under
+tracemalloc (which would otherwise distort the timings): the peak bytes
+allocated while serving a request and the memory blocks left behind per
+request. Results can be written to a JSON baseline and later runs checked
+against it:
+
+    python -m benchmarks.load_test --output     # record benchmarks/baseline.json
+    python -m benchmarks.load_test --baseline   # check against it
+
+A check is refused when the run parameters (request counts, concurrency,
+query mix, cache size) differ from the baseline's: how full the caches get
+changes both the timings and the blocks retained per request.
+
+Absolute numbers depend on the machine; compare runs from the same box.
+"""
+
+import argparse
+import asyncio
+import gc
+import hashlib
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import httpx
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DEFAULT_REQUESTS = 2000
+DEFAULT_CONCURRENCY = 16
+DEFAULT_ALLOCATION_REQUESTS = 200
+
+# A run regresses when a metric is this much worse than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Metrics checked against the baseline, and whether higher is better
+COMPARED_METRICS = {
+    "requests_per_second": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_bytes_per_request": False,
+    "retained_blocks_per_request": False,
+}
+
+# Retained blocks hover around zero, where a relative tolerance means nothing
+RETAINED_BLOCKS_SLACK = 2.0
+
+# Environment entries that must match the baseline's for a comparison to mean anything
+RUN_PARAMETERS = ("requests", "concurrency", "allocation_requests", "mix", "query_cache_size", "executor")
+
+
+class QueryCase(NamedTuple):
+    agent: str
+    query: str
+    k: int = 3
+
+
+def default_mix() -> List[QueryCase]:
+    """One query per intent of every agent plus one that matches no intent
+
+    Built from the intent keywords so the mix exercises every canned answer
+    and every agent's generic answer, frontend and backend alike.
+    """
+    from agents.mock_responses import AGENT_INTENTS
+    from agents.registry import AGENT_SPECS
+
+    mix = []
+    for spec in AGENT_SPECS:
+        intents = AGENT_INTENTS[spec.id].intents
+        for intent in intents:
+            mix.append(QueryCase(spec.id, f"what do you recommend about {intent.keywords[0]} this week"))
+        mix.append(QueryCase(spec.id, "hello, what can you help me with today"))
+    return mix
+
+
+def load_mix(paths: Iterable[str]) -> List[QueryCase]:
+    """Query cases from JSONL files with one ``{"agent", "query", "k"}`` object per line"""
+    mix = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                try:
+                    mix.append(QueryCase(record["agent"], record["query"], int(record.get("k", 3))))
+                except KeyError as e:
+                    raise ValueError(f"{path}:{line_number}: missing {e.args[0]!r}") from None
+    return mix
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(fraction * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+class LoadTest:
+    """Replays a query mix against an ASGI app"""
+
+    def __init__(self, app, mix: Sequence[QueryCase]):
+        from agents.registry import REGISTRY
+
+        if not mix:
+            raise ValueError("The query mix is empty")
+        unknown = sorted({case.agent for case in mix if case.agent not in REGISTRY})
+        if unknown:
+            raise ValueError(f"Unknown agents in the query mix: {', '.join(unknown)}")
+        self.app = app
+        self.mix = list(mix)
+        # Each agent is queried through its own tier's endpoint
+        self.paths = {case.agent: f"/query/{REGISTRY.tier(case.agent)}" for case in self.mix}
+        self._sequence = itertools.count()
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://apex")
+
+    def next_request(self, unique: bool):
+        i = next(self._sequence)
+        case = self.mix[i % len(self.mix)]
+        # A run-wide sequence number keeps unique queries unique across passes
+        query = f"{case.query} #{i}" if unique else case.query
+        return case.agent, self.paths[case.agent], {"agent": case.agent, "query": query, "k": case.k}
+
+    async def timed_pass(self, client: httpx.AsyncClient, requests: int, concurrency: int,
+                         unique: bool) -> Dict:
+        latencies: Dict[str, List[float]] = {agent: [] for agent in self.paths}
+        statuses: Counter = Counter()
+        remaining = itertools.count()
+
+        async def worker():
+            while next(remaining) < requests:
+                agent, path, payload = self.next_request(unique)
+                start = time.perf_counter()
+                response = await client.post(path, json=payload)
+                latencies[agent].append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        summary = latency_summary([latency for values in latencies.values() for latency in values])
+        summary["requests_per_second"] = round(requests / elapsed, 1)
+        summary["seconds"] = round(elapsed, 3)
+        summary["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+        summary["agents"] = {agent: latency_summary(values) for agent, values in latencies.items() if values}
+        return summary
+
+    async def allocation_pass(self, client: httpx.AsyncClient, requests: int, unique: bool) -> Dict:
+        """Allocation figures from serving requests one at a time under tracemalloc"""
+        peaks = []
+        gc.collect()
+        tracemalloc.start()
+        blocks_before = sys.getallocatedblocks()
+        try:
+            for _ in range(requests):
+                _, path, payload = self.next_request(unique)
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                await client.post(path, json=payload)
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            gc.collect()
+            retained = sys.getallocatedblocks() - blocks_before
+        finally:
+            tracemalloc.stop()
+        peaks.sort()
+        return {
+            "peak_bytes_per_request": percentile(peaks, 0.50),
+            "retained_blocks_per_request": round(retained / requests, 2),
+        }
+
+    async def run(self, requests: int, concurrency: int, allocation_requests: int,
+                  scenarios: Sequence[str] = ("repeat", "unique")) -> Dict:
+        from agents.registry import REGISTRY
+
+        start = time.perf_counter()
+        await asyncio.to_thread(REGISTRY.load, sorted(self.paths))
+        results = {"load_seconds": round(time.perf_counter() - start, 3), "scenarios": {}}
+
+        async with self.client() as client:
+            for scenario in scenarios:
+                unique = scenario == "unique"
+                # One pass over the mix first: connection-free as the transport
+                # is, the first requests still fill caches and lazy imports
+                await self.timed_pass(client, len(self.mix), concurrency, unique)
+                summary = await self.timed_pass(client, requests, concurrency, unique)
+                if allocation_requests:
+                    summary.update(await self.allocation_pass(client, allocation_requests, unique))
+                results["scenarios"][scenario] = summary
+        return results
+
+
+def mix_digest(mix: Sequence[QueryCase]) -> str:
+    return hashlib.blake2b(json.dumps(mix).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def environment(args: argparse.Namespace, mix: Sequence[QueryCase]) -> Dict:
+    from agents.query_cache import DEFAULT_CACHE_SIZE
+    from agents.work_pool import DEFAULT_EXECUTOR_KIND, DEFAULT_EXECUTOR_WORKERS
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "executor": f"{DEFAULT_EXECUTOR_KIND}x{DEFAULT_EXECUTOR_WORKERS}",
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "allocation_requests": args.allocation_requests,
+        "mix": mix_digest(mix),
+        "mix_size": len(mix),
+        "query_cache_size": DEFAULT_CACHE_SIZE,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def parameter_mismatches(run_environment: Dict, baseline: Dict) -> List[str]:
+    """Run parameters that differ from the baseline's, which make its numbers incomparable"""
+    recorded = baseline.get("environment", {})
+    return [f"{name} {run_environment.get(name)} vs baseline {recorded.get(name)}"
+            for name in RUN_PARAMETERS if run_environment.get(name) != recorded.get(name)]
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of results against baseline"""
+    found = []
+    for scenario, summary in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(scenario)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in summary or metric not in reference:
+                continue
+            value, expected = summary[metric], reference[metric]
+            if metric == "retained_blocks_per_request":
+                worse = value > expected + RETAINED_BLOCKS_SLACK
+            elif higher_is_better:
+                worse = value < expected * (1 - tolerance)
+            else:
+                worse = value > expected * (1 + tolerance)
+            if worse:
+                found.append(f"{scenario}: {metric} {value} vs baseline {expected}")
+        failed = sum(count for status, count in summary["statuses"].items() if not status.startswith("2"))
+        if failed:
+            found.append(f"{scenario}: {failed} non-2xx responses {summary['statuses']}")
+    return found
+
+
+def format_results(results: Dict) -> str:
+    lines = [f"agents loaded in {results['load_seconds']:.3f}s",
+             f"{'scenario':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+             f"{'peak B/req':>11} {'kept blk/req':>13}"]
+    for scenario, summary in results["scenarios"].items():
+        lines.append(f"{scenario:<10} {summary['requests_per_second']:>9.1f} {summary['p50_ms']:>9.3f} "
+                     f"{summary['p95_ms']:>9.3f} {summary['p99_ms']:>9.3f} "
+                     f"{summary.get('peak_bytes_per_request', 0):>11} "
+                     f"{summary.get('retained_blocks_per_request', 0):>13}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test", description=__doc__.split("\n")[0])
+    parser.add_argument("--mix", nargs="*", default=(), metavar="JSONL",
+                        help="query mix files (default: one query per intent of every agent)")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--allocation-requests", type=int, default=DEFAULT_ALLOCATION_REQUESTS,
+                        help="requests in the tracemalloc pass (0 to skip it)")
+    parser.add_argument("--scenario", choices=("repeat", "unique"), action="append",
+                        help="run only these scenarios")
+    parser.add_argument("--output", nargs="?", const=BASELINE_PATH, metavar="JSON",
+                        help="write the results here (the checked-in baseline when no file is given)")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE_PATH, metavar="JSON",
+                        help="fail if the results regress against this file (default: the checked-in baseline)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown before a metric counts as regressed")
+    args = parser.parse_args(argv)
+
+    mix = load_mix(args.mix) if args.mix else default_mix()
+    run_environment = environment(args, mix)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatches = parameter_mismatches(run_environment, baseline)
+        if mismatches:
+            print(f"not comparing against {args.baseline}, recorded with other run parameters: "
+                  f"{'; '.join(mismatches)}")
+            return 2
+
+    from api_server import app
+
+    load_test = LoadTest(app, mix)
+    results = asyncio.run(load_test.run(args.requests, args.concurrency, args.allocation_requests,
+                                        args.scenario or ("repeat", "unique")))
+    results["environment"] = run_environment
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"results written to {args.output}")
+    if baseline is not None:
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
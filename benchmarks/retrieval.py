@@ -0,0 +1,235 @@
+"""Retrieval microbenchmarks across corpus sizes and backends
+
+Builds a ``BaseRAGAgent`` per (backend, corpus size) over a synthetic
+corpus shaped like the review and financial strings in the agent modules,
+and measures:
+
+- build: seconds to stream the corpus in through ``load_batches`` (store,
+  indexes and source fragments), and documents per second
+- memory: resident memory the built agent adds, and the peak during the
+  build, both above the process baseline
+- latency: p50/p95 of single ``search`` calls and the per-query cost of
+  ``search_many`` batches (no retrieval cache is involved)
+- quality: hit@k, the share of queries whose source document is in the
+  top k. Every query is a handful of words drawn from one document, so all
+  backends are judged against the same known answer. FAISS backends also
+  report recall@k against exact dense search over the same vectors,
+  which isolates what the approximation loses.
+
+Each case runs in a fresh process so memory figures are not skewed by
+earlier cases. The default sizes finish in minutes on one core; 1M
+documents are supported but take a while for the vector backends:
+
+    python -m benchmarks.retrieval
+    python -m benchmarks.retrieval --sizes 10000 1000000 --backends lexical faiss_ivf_flat
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000)
+DEFAULT_QUERIES = 200
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_K = 10
+DEFAULT_SEED = 7
+
+# Backend name -> BaseRAGAgent retrieval_mode and index_params. FAISS
+# indexes are built in memory only (index_path None), never persisted
+BACKENDS: Dict[str, Tuple[str, Dict]] = {
+    "lexical": ("lexical", {}),
+    "dense": ("dense", {}),
+    "faiss_hnsw": ("faiss", {"index_type": "hnsw", "index_path": None}),
+    "faiss_ivf_flat": ("faiss", {"index_type": "ivf_flat", "index_path": None}),
+    "hybrid": ("hybrid", {}),
+}
+
+# Vocabulary of the synthetic corpus, taken from the agents' own data
+PRODUCTS = ("Whey Protein", "Whey Protein Isolate", "Creatine Monohydrate", "Creatine HCL Pro", "Pre-Workout",
+            "Pre-Workout Complex", "Fat Burner Pro", "Recovery BCAA+", "Elite Collagen Matrix", "Plant Protein",
+            "Electrolyte Hydration", "Mass Gainer", "Omega-3 Softgels", "Sleep Support", "Greens Superfood")
+ASPECTS = ("taste", "mixability", "energy boost", "focus enhancement", "powder texture", "value for money",
+           "shipping speed", "packaging design", "customer service", "strength gains", "appetite control",
+           "recovery", "flavor variety", "digestion", "no crash", "third-party testing")
+FLAVORS = ("vanilla", "chocolate", "blue raspberry", "tropical", "strawberry", "unflavored", "cookies and cream",
+           "watermelon", "salted caramel", "mango")
+REGIONS = ("West Coast", "Northeast", "Midwest", "Southeast", "Texas", "Pacific Northwest", "Canada",
+           "United Kingdom", "Florida", "Mountain states")
+CHANNELS = ("subscription", "one-time purchase", "Amazon", "retail", "affiliate", "email", "influencer",
+            "paid social")
+FINANCIAL_METRICS = ("revenue", "gross margin", "customer acquisition cost", "lifetime value", "ROAS",
+                     "monthly churn", "retention rate", "average order value", "fulfillment cost",
+                     "marketing spend")
+TRENDS = ("increase", "decrease", "growth", "decline")
+
+
+def synthetic_document(seed: int, doc_id: int) -> str:
+    """Document doc_id of the synthetic corpus; the same seed and id always give the same text"""
+    rng = random.Random(seed * 1_000_003 + doc_id)
+    product = rng.choice(PRODUCTS)
+    if rng.random() < 0.6:
+        aspect, other = rng.sample(ASPECTS, 2)
+        return (f"{product} Reviews: {rng.randint(60, 99)}% {aspect} satisfaction from "
+                f"{rng.randint(50, 9000):,} reviews, {rng.randint(2, 90)}% mention {other}, "
+                f"customers in the {rng.choice(REGIONS)} prefer {rng.choice(FLAVORS)} "
+                f"({rng.randint(20, 95)}% preference), {rng.choice(CHANNELS)} buyers rate it "
+                f"{rng.randint(35, 50) / 10}/5")
+    quarter = rng.randint(1, 4)
+    year = rng.randint(2021, 2025)
+    metric = rng.choice(FINANCIAL_METRICS)
+    return (f"Q{quarter} {year} {product} {metric}: ${rng.randint(40, 2900)}K from {rng.choice(CHANNELS)}, "
+            f"{rng.randint(2, 80)}% {rng.choice(TRENDS)} from Q{quarter - 1 if quarter > 1 else 4}, "
+            f"{rng.choice(REGIONS)} {rng.randint(5, 60)}% of sales, {rng.randint(30, 60)}% margin on "
+            f"{rng.choice(FLAVORS)}")
+
+
+def synthetic_records(seed: int, num_docs: int) -> Iterator[Tuple[int, str]]:
+    for doc_id in range(1, num_docs + 1):
+        yield doc_id, synthetic_document(seed, doc_id)
+
+
+def synthetic_queries(seed: int, num_docs: int, num_queries: int) -> List[Tuple[int, str]]:
+    """(source doc id, query) pairs; each query is four to six words of its source document"""
+    from agents.lexical_index import TOKEN_PATTERN
+
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(num_queries):
+        doc_id = rng.randint(1, num_docs)
+        words = TOKEN_PATTERN.findall(synthetic_document(seed, doc_id).lower())
+        queries.append((doc_id, " ".join(rng.sample(words, min(len(words), rng.randint(4, 6))))))
+    return queries
+
+
+def percentile_ms(seconds: List[float], fraction: float) -> float:
+    ordered = sorted(seconds)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 4)
+
+
+def current_rss_mb() -> Optional[float]:
+    from agents.process_memory import smaps_rollup
+
+    rollup = smaps_rollup()
+    return rollup["rss_mb"] if rollup else None
+
+
+def run_case(backend: str, num_docs: int, num_queries: int, batch_size: int, k: int, seed: int) -> Dict:
+    """Build one agent and measure it; meant to run in a process of its own"""
+    from agents import faiss_index
+    from agents.base_agent import BaseRAGAgent
+    from agents.ingest import batched, peak_rss_mb
+
+    retrieval_mode, index_params = BACKENDS[backend]
+    queries = synthetic_queries(seed, num_docs, num_queries)
+    texts = [query for _, query in queries]
+    rss_before = current_rss_mb()
+    peak_before = peak_rss_mb()
+
+    agent = BaseRAGAgent(f"bench_{backend}", "", retrieval_mode=retrieval_mode, index_params=index_params)
+    start = time.perf_counter()
+    agent.load_batches(batched(synthetic_records(seed, num_docs), 2000))
+    build_seconds = time.perf_counter() - start
+    rss_after = current_rss_mb()
+    peak_after = peak_rss_mb()
+
+    agent.search(texts[0], k)  # First-call setup (FAISS threads, lazy tables) is not query latency
+    single = []
+    results = []
+    for query in texts:
+        start = time.perf_counter()
+        results.append(agent.search(query, k))
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        agent.search_many(texts[i:i + batch_size], k)
+    batched_seconds = time.perf_counter() - start
+
+    snapshot = agent.snapshot()
+    hits = sum(doc_id in {snapshot.doc_id(position) for position, _ in ranked}
+               for (doc_id, _), ranked in zip(queries, results))
+
+    result = {
+        "backend": backend,
+        "docs": num_docs,
+        "build_seconds": round(build_seconds, 3),
+        "docs_per_second": round(num_docs / build_seconds, 1) if build_seconds > 0 else None,
+        "rss_mb": round(rss_after - rss_before, 1) if rss_after is not None else None,
+        "peak_build_mb": round(peak_after - peak_before, 1) if peak_after is not None else None,
+        "single_p50_ms": percentile_ms(single, 0.50),
+        "single_p95_ms": percentile_ms(single, 0.95),
+        "batched_ms_per_query": round(batched_seconds / len(texts) * 1000, 4),
+        "k": k,
+        "hit_at_k": round(hits / len(queries), 4),
+        "recall_vs_exact": None,
+    }
+    if retrieval_mode == "faiss" and faiss_index.faiss is not None:
+        result["recall_vs_exact"] = round(agent.retrieval_report(texts, k)[f"recall_at_{k}"], 4)
+    return result
+
+
+def run_isolated(backend: str, num_docs: int, num_queries: int, batch_size: int, k: int, seed: int) -> Dict:
+    # spawn, not fork: a forked child would inherit the parent's heap and
+    # report memory it did not allocate
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, backend, num_docs, num_queries, batch_size, k, seed).result()
+
+
+COLUMNS = (("backend", "{:<15}", "{:<15}"), ("build s", "{:>9}", "{:>9.2f}"), ("docs/s", "{:>10}", "{:>10,.0f}"),
+           ("rss MB", "{:>8}", "{:>8.1f}"), ("peak MB", "{:>8}", "{:>8.1f}"), ("p50 ms", "{:>8}", "{:>8.3f}"),
+           ("p95 ms", "{:>8}", "{:>8.3f}"), ("batch ms/q", "{:>11}", "{:>11.3f}"), ("hit@k", "{:>7}", "{:>7.3f}"),
+           ("recall", "{:>7}", "{:>7.3f}"))
+COLUMN_KEYS = ("backend", "build_seconds", "docs_per_second", "rss_mb", "peak_build_mb", "single_p50_ms",
+               "single_p95_ms", "batched_ms_per_query", "hit_at_k", "recall_vs_exact")
+
+
+def format_table(results: Sequence[Dict]) -> str:
+    """One table per corpus size, one row per backend"""
+    lines = []
+    for num_docs in sorted({result["docs"] for result in results}):
+        lines.append(f"\n{num_docs:,} documents (k={results[0]['k']})")
+        lines.append(" ".join(header.format(title) for title, header, _ in COLUMNS))
+        for result in results:
+            if result["docs"] != num_docs:
+                continue
+            cells = []
+            for (_, header, cell), key in zip(COLUMNS, COLUMN_KEYS):
+                value = result.get(key)
+                cells.append(header.format("-") if value is None else cell.format(value))
+            lines.append(" ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.retrieval", description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, metavar="DOCS")
+    parser.add_argument("--backends", nargs="+", choices=tuple(BACKENDS), default=tuple(BACKENDS))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="queries per search_many call")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", metavar="JSON", help="also write the results here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for num_docs in args.sizes:
+        for backend in args.backends:
+            print(f"[bench] {backend} over {num_docs:,} documents", file=sys.stderr)
+            results.append(run_isolated(backend, num_docs, args.queries, args.batch_size, args.k, args.seed))
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "queries": args.queries, "batch_size": args.batch_size, "seed": args.seed,
+                       "results": results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Shared fixtures: a small fixed corpus that every retrieval test ranks, and an in-process API client"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from agents.base_agent import BaseRAGAgent
+
+# Distinct lengths and term mixes, so BM25 scores do not tie
+DOCS = {
+    1: "Whey Protein: vanilla whey isolate with 25g protein per scoop",
+    2: "Creatine Monohydrate: strength and power gains for lifters, creatine loading optional",
+    3: "Pre-Workout Complex: energy and focus before training",
+    4: "Plant Protein: pea and rice protein blend for vegans",
+    5: "Fat Burner Pro: metabolism support during a cut",
+    6: "Recovery BCAA+: amino acids for recovery after training sessions",
+    7: "Mass Gainer: calories and whey protein for hard gainers",
+}
+
+QUERIES = ["whey protein", "creatine strength", "training energy", "protein for vegans", "recovery after training",
+           "gainers calories whey", "no matching words here"]
+
+
+def build_agent(docs=DOCS, name="test_agent", **kwargs) -> BaseRAGAgent:
+    agent = BaseRAGAgent(name, "", **kwargs)
+    agent.add_documents(list(docs.values()), ids=list(docs))
+    return agent
+
+
+def ranked_ids(agent: BaseRAGAgent, query: str, k: int = 5):
+    """(doc id, score) pairs, which unlike snapshot positions survive merges"""
+    snapshot = agent.snapshot()
+    return [(snapshot.doc_id(position), round(score, 6)) for position, score in agent.search(query, k)]
+
+
+@pytest.fixture
+def agent() -> BaseRAGAgent:
+    return build_agent()
+
+
+class Client:
+    """Synchronous facade over one event loop, which the tier limiters and executor futures stay bound to"""
+
+    def __init__(self, app):
+        self.loop = asyncio.new_event_loop()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://apex")
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return self.loop.run_until_complete(self.client.request(method, url, **kwargs))
+
+    def close(self):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    import api_server
+
+    client = Client(api_server.app)
+    yield client
+    client.close()
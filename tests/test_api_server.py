@@ -0,0 +1,150 @@
+"""HTTP behaviour of the query endpoints, driven in process like benchmarks/load_test.py"""
+
+import json
+
+import pytest
+
+import api_server
+from agents.http_cache import etag_matches, make_etag
+from agents.serialization import STREAM_CHUNK_CHARS, split_chunks
+
+FRONTEND_AGENT = "customer_service"
+BACKEND_AGENT = "review_synthesis"
+
+
+QUERY_ENDPOINTS = [
+    ("POST", "/query", FRONTEND_AGENT),
+    ("POST", "/query/frontend", FRONTEND_AGENT),
+    ("POST", "/query/backend", BACKEND_AGENT),
+    ("GET", "/query", BACKEND_AGENT),
+    ("GET", "/query/frontend", FRONTEND_AGENT),
+    ("GET", "/query/backend", BACKEND_AGENT),
+]
+
+
+def query(client, method, path, agent, text, k=2, **kwargs):
+    fields = {"agent": agent, "query": text, "k": k}
+    if method == "GET":
+        return client.request(method, path, params=fields, **kwargs)
+    return client.request(method, path, json=fields, **kwargs)
+
+
+def test_batch_reports_errors_per_item(client, monkeypatch):
+    real_answer_queries = api_server.answer_queries
+
+    def answer_queries(agent_name, queries, k):
+        if agent_name == BACKEND_AGENT:
+            raise RuntimeError("index unavailable")
+        return real_answer_queries(agent_name, queries, k)
+
+    monkeypatch.setattr(api_server, "answer_queries", answer_queries)
+    items = [
+        {"agent": FRONTEND_AGENT, "query": "track my order", "k": 1},
+        {"agent": "no_such_agent", "query": "hello"},
+        {"agent": BACKEND_AGENT, "query": "whey reviews"},
+        {"agent": FRONTEND_AGENT, "query": "return a product", "k": 2},
+    ]
+    response = client.request("POST", "/query/batch", json={"queries": items})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["agent"] for result in results] == [item["agent"] for item in items]
+
+    assert "error" not in results[0] and len(results[0]["sources"]) == 1
+    assert results[1]["error"] == {"status_code": 404, "detail": "Agent 'no_such_agent' not found"}
+    assert results[2]["error"]["status_code"] == 500 and "response" not in results[2]
+    single = query(client, "POST", "/query", FRONTEND_AGENT, "return a product")
+    assert results[3] == single.json()
+
+
+def test_batch_size_is_limited(client):
+    items = [{"agent": FRONTEND_AGENT, "query": "hi"}] * (api_server.MAX_BATCH_SIZE + 1)
+    assert client.request("POST", "/query/batch", json={"queries": items}).status_code == 422
+
+
+def test_unknown_agent_is_404(client):
+    assert query(client, "POST", "/query", "no_such_agent", "hi").status_code == 404
+    assert query(client, "GET", "/query/frontend", BACKEND_AGENT, "hi").status_code == 404
+
+
+def sse_events(body: bytes):
+    """(event, decoded data) pairs of a server-sent event stream"""
+    events = []
+    for frame in body.split(b"\n\n"):
+        if not frame:
+            continue
+        event_line, data_line = frame.split(b"\n")
+        assert event_line.startswith(b"event: ") and data_line.startswith(b"data: ")
+        events.append((event_line[7:].decode(), json.loads(data_line[6:])))
+    return events
+
+
+@pytest.mark.parametrize("agent, text", [
+    (FRONTEND_AGENT, "where can I track my order"),            # Canned intent answer
+    (BACKEND_AGENT, "hello, what can you help me with today"),  # Default answer
+    ("ramy_lifestyle", "weekend plans"),                        # Generic answer, no intent table
+])
+def test_stream_frames_sources_then_chunks_then_done(client, agent, text):
+    response = query(client, "POST", "/query/stream", agent, text)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.content)
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"chunk"}
+    assert events[-1][1] == {"agent": agent, "chunks": len(names) - 2}
+
+    answer = query(client, "POST", "/query", agent, text).json()
+    assert events[0][1] == answer["sources"]
+    assert "".join(data for name, data in events if name == "chunk") == answer["response"]
+    assert all(len(data) <= STREAM_CHUNK_CHARS for name, data in events if name == "chunk")
+
+    assert query(client, "GET", "/query/stream", agent, text).content == response.content
+
+
+def test_split_chunks_round_trips():
+    text = "First line\n" + "word " * 200 + "\n" + "x" * 700
+    pieces = split_chunks(text, 100)
+    assert "".join(pieces) == text
+    assert all(0 < len(piece) <= 100 for piece in pieces)
+    assert split_chunks("") == []
+
+
+def test_stream_of_unknown_agent_is_404(client):
+    assert query(client, "POST", "/query/stream", "no_such_agent", "hi").status_code == 404
+
+
+@pytest.mark.parametrize("method, path, agent", QUERY_ENDPOINTS)
+def test_if_none_match_gives_304(client, method, path, agent):
+    first = query(client, method, path, agent, "protein tracking options")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.json()["agent"] == agent
+
+    revalidated = query(client, method, path, agent, "protein tracking options", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    other = query(client, method, path, agent, "protein tracking options", k=1, headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["etag"] != etag
+
+
+def test_corpus_change_invalidates_etag(client):
+    first = query(client, "POST", "/query", FRONTEND_AGENT, "refund policy")
+    etag = first.headers["etag"]
+    agent = api_server.REGISTRY.get(FRONTEND_AGENT)
+    agent.upsert({90_001: "Refund Policy: refunds within 60 days for unopened items"})
+    try:
+        after = query(client, "POST", "/query", FRONTEND_AGENT, "refund policy", headers={"If-None-Match": etag})
+        assert after.status_code == 200
+        assert after.headers["etag"] != etag
+    finally:
+        agent.delete([90_001])
+
+
+def test_etags():
+    assert make_etag("ab", "c") != make_etag("a", "bc")
+    etag = make_etag("body")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_matches(etag, etag) and etag_matches(f'"other", W/{etag}', etag) and etag_matches("*", etag)
+    assert not etag_matches('"other"', etag) and not etag_matches("", etag)
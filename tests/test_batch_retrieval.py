@@ -0,0 +1,32 @@
+"""Batched retrieval gives exactly what one call per query would"""
+
+import pytest
+
+from .conftest import QUERIES, build_agent
+
+RETRIEVAL_MODES = ["lexical", "dense", "hybrid"]
+
+
+@pytest.mark.parametrize("mode", RETRIEVAL_MODES)
+def test_search_many_matches_single_queries(mode):
+    agent = build_agent(retrieval_mode=mode)
+    batch = agent.search_many(QUERIES + QUERIES[:2], k=3)
+    assert batch == [agent.search(query, k=3) for query in QUERIES + QUERIES[:2]]
+
+
+def test_retrieve_many_matches_single_queries(agent):
+    batch = agent.retrieve_many(QUERIES, k=3)
+    agent.cache.invalidate()
+    assert batch == [agent.retrieve_context_with_sources(query, k=3) for query in QUERIES]
+
+
+def test_duplicate_queries_are_scored_once(agent):
+    results = agent.retrieve_many(["whey protein", "Whey  Protein", "creatine"], k=2)
+    assert results[0] is results[1]
+    assert agent.cache.stats()["misses"] == 3 and len(agent.cache) == 2
+
+
+def test_empty_corpus_and_k_zero():
+    empty = build_agent({})
+    assert empty.retrieve_many(QUERIES[:2], k=3) == [("", []), ("", [])]
+    assert build_agent().search_many(QUERIES[:2], k=0) == [[], []]
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from agents import corpus_file
+from agents.document_store import DocumentStore
+
+from .conftest import DOCS, QUERIES, build_agent, ranked_ids
+
+RECORDS = [(10, "Whey Protein: 25g per scoop"), (-3, "untitled note about crème brûlée 🍮"), (7, ""),
+           (2**40, "Whey Protein: chocolate, a second document with a shared title")]
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = str(tmp_path / f"records{corpus_file.CORPUS_EXTENSION}")
+    assert corpus_file.write_corpus(path, RECORDS) == len(RECORDS)
+    return path
+
+
+def test_round_trip_through_mmap(corpus_path):
+    store = corpus_file.open_corpus(corpus_path)
+    assert store.mapped
+    assert len(store) == len(RECORDS)
+    assert [(store.doc_id(i), store.text(i)) for i in range(len(store))] == RECORDS
+    assert list(store) == [text for _, text in RECORDS]
+    assert [store.title(i) for i in range(len(store))] == ["Whey Protein", "Document -3", "Document 7",
+                                                           "Whey Protein"]
+    assert store.titles == ["Whey Protein"]
+
+
+def test_mapped_store_matches_in_memory_store(corpus_path):
+    mapped = corpus_file.open_corpus(corpus_path)
+    in_memory = DocumentStore.from_documents([doc_id for doc_id, _ in RECORDS], [text for _, text in RECORDS])
+    assert not in_memory.mapped
+    for i in range(len(RECORDS)):
+        assert mapped.preview(i) == in_memory.preview(i)
+        assert mapped.source("agent", i) == in_memory.source("agent", i)
+    assert mapped.text_nbytes == in_memory.text_nbytes
+
+
+def test_failed_write_leaves_no_file(tmp_path):
+    path = str(tmp_path / "broken.corpus")
+    with pytest.raises(RuntimeError):
+        with corpus_file.CorpusWriter(path) as writer:
+            writer.add(1, "half a corpus")
+            raise RuntimeError("interrupted")
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("content", [b"", b"short", b"NOTACORP" + bytes(200)])
+def test_rejects_other_files(tmp_path, content):
+    path = tmp_path / "other.corpus"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        corpus_file.open_corpus(str(path))
+
+
+def test_agent_serves_a_mapped_corpus_like_the_original(tmp_path):
+    original = build_agent()
+    path = str(tmp_path / "agent.corpus")
+    assert original.save_corpus_file(path) == len(DOCS)
+
+    loaded = build_agent({})
+    loaded.load_corpus_file(path)
+    assert loaded.snapshot().segments[0].store.mapped
+    for query in QUERIES:
+        assert ranked_ids(loaded, query) == ranked_ids(original, query)
+        assert loaded.retrieve_sources_json(query) == original.retrieve_sources_json(query)
+
+
+def test_mapped_corpus_has_the_fingerprint_of_the_original(tmp_path):
+    original = build_agent()
+    path = str(tmp_path / "agent.corpus")
+    original.save_corpus_file(path)
+    loaded = build_agent({})
+    loaded.load_corpus_file(path)
+    assert loaded.fingerprint == original.fingerprint
+
@@ -0,0 +1,31 @@
+import pytest
+
+from agents.fusion import RRF_K, reciprocal_rank_fusion
+
+from .conftest import QUERIES, build_agent
+
+
+def test_fuses_ranks_not_scores():
+    lexical = [(1, 12.0), (2, 3.0), (3, 0.5)]
+    vector = [(3, 0.99), (1, 0.98)]
+    fused = dict(reciprocal_rank_fusion([lexical, vector], k=3))
+    best = 2 / (RRF_K + 1)
+    assert fused[1] == pytest.approx((1 / (RRF_K + 1) + 1 / (RRF_K + 2)) / best)
+    assert fused[3] == pytest.approx((1 / (RRF_K + 3) + 1 / (RRF_K + 1)) / best)
+    assert fused[2] == pytest.approx(1 / (RRF_K + 2) / best)
+    assert [doc for doc, _ in reciprocal_rank_fusion([lexical, vector], k=2)] == [1, 3]
+
+
+def test_first_in_every_list_scores_one():
+    assert reciprocal_rank_fusion([[(7, 1.0)], [(7, 0.1)], [(7, 5.0)]], k=1) == [(7, 1.0)]
+
+
+def test_ties_go_to_the_earlier_document():
+    assert reciprocal_rank_fusion([[(5, 1.0)], [(4, 1.0)]], k=2) == [(4, 0.5), (5, 0.5)]
+
+
+def test_hybrid_relevance_scores_are_normalized():
+    agent = build_agent(retrieval_mode="hybrid")
+    scores = [score for query in QUERIES for _, score in agent.search(query, k=5)]
+    assert scores and all(0 < score <= 1 for score in scores)
+    assert max(score for _, score in agent.search("whey protein", k=5)) > 0.9
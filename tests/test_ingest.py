@@ -0,0 +1,108 @@
+"""Streaming ingestion: readers, their error messages and load_batches"""
+
+import pytest
+
+from agents import faiss_index
+from agents.base_agent import BaseRAGAgent
+from agents.ingest import batched, corpus_path_env, ingest_file, load_corpus, read_csv, read_jsonl, read_records
+
+RECORDS = [(doc_id, f"Review {doc_id}: whey protein flavor {doc_id % 13} and strength {doc_id % 7}")
+           for doc_id in range(1, 1201)]
+
+
+@pytest.mark.skipif(faiss_index.faiss is None, reason="faiss-cpu is not installed")
+@pytest.mark.parametrize("index_type", faiss_index.FAISS_INDEX_TYPES)
+def test_load_batches_reuses_a_persisted_faiss_index(tmp_path, index_type):
+    params = {"index_type": index_type, "index_path": str(tmp_path / f"corpus.{index_type}.faiss")}
+    results = []
+    for _ in range(2):
+        agent = BaseRAGAgent("ingest_test", "", retrieval_mode="faiss", index_params=params)
+        agent.load_batches(batched(RECORDS, 250))
+        results.append((agent.snapshot().segments[0].vector_index.loaded_from_disk,
+                        agent.search("whey flavor 3 strength 2", 5)))
+    (first_loaded, first_hits), (second_loaded, second_hits) = results
+    assert not first_loaded and second_loaded
+    assert second_hits == first_hits
+
+    changed = BaseRAGAgent("ingest_test", "", retrieval_mode="faiss", index_params=params)
+    changed.load_batches(batched(RECORDS[:-1], 250))
+    assert not changed.snapshot().segments[0].vector_index.loaded_from_disk
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_records_without_ids_are_numbered_by_line(tmp_path):
+    path = write(tmp_path, "plain.jsonl", '{"text": "first"}\n\n{"text": "second", "title": "Whey"}\n')
+    assert list(read_jsonl(path)) == [(1, "first"), (3, "Whey: second")]
+
+
+@pytest.mark.parametrize("lines, line", [
+    (['{"text": "no id"}', '{"id": 1, "text": "explicit"}'], 2),
+    (['{"id": 1, "text": "explicit"}', '{"text": "no id"}'], 2),
+    (['{"id": 5, "text": "explicit"}', '{"text": ""}', '{"id": "", "text": "blank id"}'], 3),
+])
+def test_mixing_records_with_and_without_ids_is_rejected(tmp_path, lines, line):
+    path = write(tmp_path, "mixed.jsonl", "\n".join(lines) + "\n")
+    with pytest.raises(ValueError, match=f"mixed.jsonl:{line}: "):
+        list(read_jsonl(path))
+
+
+def test_csv_errors_point_at_the_file_line(tmp_path):
+    path = write(tmp_path, "reviews.csv", 'id,title,text\n1,Whey,"two\nlines"\n2,Creatine,fine\nx3,Bad,id\n')
+    records = read_csv(path)
+    assert next(records) == (1, "Whey: two\nlines")
+    assert next(records) == (2, "Creatine: fine")
+    with pytest.raises(ValueError, match=r"reviews\.csv:5: id must be an integer, got 'x3'"):
+        next(records)
+
+
+def test_unsupported_extension(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported corpus format"):
+        read_records(write(tmp_path, "corpus.txt", "text"))
+
+
+@pytest.mark.parametrize("content, message", [
+    ('{"id": 1, "text": "ok"}\n{"id": 2, "text": \n', r"bad\.jsonl:2: invalid JSON"),
+    ('{"id": 1, "text": "ok"}\n\n{"id": "seven", "text": "x"}\n', r"bad\.jsonl:3: id must be an integer, got 'seven'"),
+])
+def test_jsonl_errors_name_file_and_line(tmp_path, content, message):
+    with pytest.raises(ValueError, match=message):
+        list(read_jsonl(write(tmp_path, "bad.jsonl", content)))
+
+
+def test_load_batches_replaces_the_corpus_and_later_copies_win():
+    agent = BaseRAGAgent("ingest_test", "")
+    agent.add_documents(["old corpus"])
+    seen = []
+    loaded = agent.load_batches([[(1, "whey v1"), (2, "creatine")], [], [(1, "whey v2"), (3, "pre-workout")]],
+                                on_batch=seen.append)
+    assert loaded == 3 and seen == [2, 2]
+    assert sorted(agent.documents) == ["creatine", "pre-workout", "whey v2"]
+    hits = agent.search("whey", 3)
+    assert [(agent.snapshot().doc_id(position), agent.snapshot().document(position)) for position, _ in hits] == \
+        [(1, "whey v2")]
+
+
+def test_ingest_file_streams_in_batches(tmp_path):
+    path = write(tmp_path, "reviews.jsonl", "".join(f'{{"id": {doc_id}, "text": "{text}"}}\n'
+                                                     for doc_id, text in RECORDS[:25]))
+    agent = BaseRAGAgent("ingest_test", "")
+    stats = ingest_file(agent, path, batch_size=10)
+    assert (stats["documents"], stats["records"], stats["batches"], stats["path"]) == (25, 25, 3, path)
+    assert list(agent.documents) == [text for _, text in RECORDS[:25]]
+
+
+def test_load_corpus_follows_the_corpus_path_variable(tmp_path, monkeypatch):
+    agent = BaseRAGAgent("ingest_test", "")
+    load_corpus(agent, ["built-in document"])
+    assert list(agent.documents) == ["built-in document"]
+
+    path = write(tmp_path, "export.csv", "id,text\n4,from the export\n")
+    monkeypatch.setenv(corpus_path_env(agent.name), path)
+    load_corpus(agent, ["built-in document"])
+    assert list(agent.documents) == ["from the export"]
+    assert agent.snapshot().doc_id(0) == 4
@@ -0,0 +1,76 @@
+"""IntentRouter against the if/elif chain of substring checks it replaced"""
+
+import random
+
+import pytest
+
+from agents.intent_router import AgentIntents, Intent, IntentRouter, KeywordAutomaton
+from agents.mock_responses import AGENT_INTENTS
+
+
+def if_elif_chain(table: AgentIntents, query: str) -> str:
+    """What generate_mock_response used to do: the first intent with a keyword in the query wins"""
+    query_lower = query.lower()
+    for intent in table.intents:
+        if any(keyword in query_lower for keyword in intent.keywords):
+            return intent.response
+    return table.default
+
+
+@pytest.fixture(scope="module")
+def router() -> IntentRouter:
+    return IntentRouter(AGENT_INTENTS)
+
+
+def random_queries(seed: int, count: int):
+    """Queries mixing keywords of every agent (overlapping, cased, glued to other words) with filler"""
+    keywords = sorted({keyword for table in AGENT_INTENTS.values()
+                       for intent in table.intents for keyword in intent.keywords})
+    filler = ["what", "about", "my", "order", "this", "week", "please", "x", "best", "price"]
+    rng = random.Random(seed)
+    for _ in range(count):
+        words = rng.sample(filler, rng.randint(0, 4)) + rng.sample(keywords, rng.randint(0, 3))
+        rng.shuffle(words)
+        query = rng.choice([" ", "", "-"]).join(words)
+        yield query.upper() if rng.random() < 0.2 else query
+
+
+def test_matches_the_if_elif_chain(router):
+    for query in random_queries(seed=11, count=3000):
+        for agent_name, table in AGENT_INTENTS.items():
+            assert router.respond(agent_name, query) == if_elif_chain(table, query), (agent_name, query)
+
+
+@pytest.mark.parametrize("agent_name, query, intent", [
+    ("review_synthesis", "fat burner vs whey protein reviews", "whey_reviews"),  # The earlier intent wins
+    ("review_synthesis", "PREWORKOUT ratings", "pre_workout_reviews"),
+    ("customer_service", "where is order 1439221", "order_status"),
+    ("rachel_nutrition", "pre-workout meal ideas", "meal_ideas"),
+])
+def test_priority_order(router, agent_name, query, intent):
+    assert router.match(agent_name, query).name == intent
+
+
+def test_unknown_agent_and_no_match(router):
+    assert router.respond("no_such_agent", "whey") is None
+    assert router.match("review_synthesis", "hello there") is None
+    assert router.respond("review_synthesis", "hello there") == AGENT_INTENTS["review_synthesis"].default
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton(["pre", "pre-workout", "workout", "out", "he"])
+    found = {automaton.keywords[i] for i in automaton.find("the pre-workout")}
+    assert found == {"pre", "pre-workout", "workout", "out", "he"}
+    assert automaton.find("nothing") == set()
+    with pytest.raises(ValueError):
+        KeywordAutomaton(["ok", ""])
+
+
+def test_keywords_shared_between_agents():
+    router = IntentRouter({
+        "a": AgentIntents([Intent("first", ("protein",), "A1")], "A0"),
+        "b": AgentIntents([Intent("other", ("fat",), "B1"), Intent("second", ("protein",), "B2")], "B0"),
+    })
+    assert router.respond("a", "Protein") == "A1"
+    assert router.respond("b", "protein and fat") == "B1"
+    assert router.respond("b", "protein") == "B2"
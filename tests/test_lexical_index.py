@@ -0,0 +1,67 @@
+import pytest
+
+from agents.lexical_index import LexicalIndex, bm25_idf, tokenize
+
+from .conftest import DOCS
+
+
+def reference_bm25(documents, query, k1=1.5, b=0.75):
+    """Textbook BM25 over every document, written out term by term"""
+    tokenized = [tokenize(doc) for doc in documents]
+    avgdl = sum(len(tokens) for tokens in tokenized) / len(tokenized)
+    scores = []
+    for tokens in tokenized:
+        score = 0.0
+        for term in set(tokenize(query)):
+            tf = tokens.count(term)
+            if not tf:
+                continue
+            df = sum(term in other for other in tokenized)
+            score += bm25_idf(len(tokenized), df) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+        scores.append(score)
+    return scores
+
+
+@pytest.fixture(params=[False, True], ids=["building", "frozen"])
+def index(request) -> LexicalIndex:
+    index = LexicalIndex()
+    index.build(DOCS.values())
+    if request.param:
+        index.freeze()
+    return index
+
+
+def test_tokenize_keeps_compounds_and_drops_stopwords():
+    assert tokenize("The Pre-Workout is 4.7 stars") == ["pre-workout", "pre", "workout", "preworkout", "4.7",
+                                                        "stars"]
+
+
+@pytest.mark.parametrize("query", ["whey protein", "protein", "creatine", "training recovery", "pre-workout"])
+def test_scores_match_reference_bm25(index, query):
+    expected = reference_bm25(list(DOCS.values()), query)
+    hits = index.search(query, k=len(DOCS))
+    assert {position for position, _ in hits} == {i for i, score in enumerate(expected) if score > 0}
+    for position, score in hits:
+        assert score == pytest.approx(expected[position])
+
+
+def test_ranking_on_fixed_corpus(index):
+    # Doc 1 has both terms twice, doc 7 both once, doc 4 only "protein" (twice)
+    assert [position for position, _ in index.search("whey protein", k=4)] == [0, 6, 3]
+    assert [position for position, _ in index.search("creatine", k=3)] == [1]
+    assert index.search("no matching words", k=3) == []
+    assert index.search("whey", k=0) == []
+
+
+def test_ties_go_to_the_earlier_document():
+    index = LexicalIndex()
+    index.build(["alpha beta", "beta alpha", "gamma"])
+    index.freeze()
+    first, second = index.search("alpha", k=2)
+    assert first[0] == 0 and second[0] == 1 and first[1] == second[1]
+
+
+def test_frozen_index_rejects_additions(index):
+    index.freeze()
+    with pytest.raises(ValueError):
+        index.add(["more text"])
@@ -0,0 +1,73 @@
+import pytest
+
+import api_server
+from agents import faiss_index
+from agents.base_agent import BaseRAGAgent
+from agents.ingest import batched
+
+from .conftest import DOCS, build_agent
+from .test_api_server import FRONTEND_AGENT, query
+
+PARTS = ("text_bytes", "metadata_bytes", "source_fragments_bytes", "lexical_index_bytes", "vector_index_bytes",
+         "id_map_bytes", "cache_bytes")
+
+
+def test_parts_add_up_to_the_total(agent):
+    agent.retrieve_sources_json("whey protein")
+    usage = agent.memory_usage()
+    assert usage["text_bytes"] == sum(len(text.encode("utf-8")) for text in DOCS.values())
+    assert usage["lexical_index_bytes"] > 0
+    assert usage["cache_bytes"] > 0 and usage["cache_entries"] == 1
+    assert usage["mapped_bytes"] == 0
+    assert usage["total_bytes"] == sum(usage[part] for part in PARTS)
+    assert (usage["documents"], usage["segments"]) == (len(DOCS), 1)
+
+
+def test_mapped_corpus_is_left_out_of_the_total(tmp_path):
+    path = str(tmp_path / "agent.corpus")
+    build_agent().save_corpus_file(path)
+    agent = build_agent({})
+    agent.load_corpus_file(path)
+    usage = agent.memory_usage()
+    assert usage["mapped_bytes"] == agent.snapshot().segments[0].store.nbytes
+    assert usage["total_bytes"] == sum(usage[part] for part in PARTS) - usage["mapped_bytes"]
+
+
+@pytest.mark.skipif(faiss_index.faiss is None, reason="faiss-cpu is not installed")
+def test_only_the_flat_vectors_of_a_loaded_faiss_index_are_mapped(tmp_path):
+    params = {"index_type": "hnsw", "index_path": str(tmp_path / "corpus.hnsw.faiss")}
+    records = [(doc_id, f"Review {doc_id}: whey protein flavor {doc_id % 13}") for doc_id in range(1, 301)]
+    usages = []
+    for _ in range(2):
+        agent = BaseRAGAgent("memory_test", "", retrieval_mode="faiss", index_params=params)
+        agent.load_batches(batched(records, 100))
+        usages.append((agent.memory_usage(), agent.snapshot().segments[0].vector_index.index))
+    (built, _), (loaded, index) = usages
+    assert built["mapped_bytes"] == 0
+    assert loaded["mapped_bytes"] == index.ntotal * index.d * 4
+    # The HNSW graph is read into memory, so it still counts
+    assert loaded["vector_index_bytes"] > loaded["mapped_bytes"]
+    assert loaded["total_bytes"] == sum(loaded[part] for part in PARTS) - loaded["mapped_bytes"]
+
+
+def test_memory_endpoint_is_hidden_without_admin_token(client, monkeypatch):
+    monkeypatch.setattr(api_server, "ADMIN_TOKEN", "")
+    assert client.request("GET", "/debug/memory").status_code == 404
+
+
+def test_memory_endpoint_breaks_usage_down_by_agent(client, monkeypatch):
+    monkeypatch.setattr(api_server, "ADMIN_TOKEN", "secret")
+    assert client.request("GET", "/debug/memory", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    query(client, "POST", "/query", FRONTEND_AGENT, "where is my order")
+    response = client.request("GET", "/debug/memory", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    report = response.json()
+    usage = report["agents"][FRONTEND_AGENT]
+    assert set(PARTS) <= set(usage)
+    assert usage["documents"] > 0
+    assert set(report["agents"]) == set(api_server.REGISTRY.loaded())
+    total = sum(agent["total_bytes"] for agent in report["agents"].values())
+    assert report["totals"]["agents_mb"] == round(total / api_server.MB, 1)
+    if report["process"] is not None:
+        assert report["process"]["rss_mb"] > 0
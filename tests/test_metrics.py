@@ -0,0 +1,72 @@
+import re
+
+from agents.metrics import PROMETHEUS_MEDIA_TYPE, Histogram, Metrics, RequestTimer
+
+from .test_api_server import FRONTEND_AGENT, query
+
+
+def test_histogram_buckets_are_cumulated_on_export():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.01, 0.05, 0.5, 2.0):
+        histogram.observe(seconds)
+    assert list(histogram.counts) == [2, 1, 1, 1]
+    assert histogram.cumulative() == [2, 3, 4, 5]
+    assert histogram.count == 5
+    assert histogram.sum == sum((0.005, 0.01, 0.05, 0.5, 2.0))
+
+
+def test_server_timing_lists_stages_then_total():
+    timer = RequestTimer()
+    timer.mark("routing")
+    timer.mark("retrieval")
+    value = timer.server_timing().decode("latin-1")
+    names = [part.split(";")[0] for part in value.split(", ")]
+    assert names == ["routing", "retrieval", "total"]
+    assert all(re.fullmatch(r"\w+;dur=\d+\.\d{3}", part) for part in value.split(", "))
+
+
+def test_render_counts_requests_and_stages_per_agent():
+    metrics = Metrics(["a"])
+    timer = RequestTimer()
+    timer.agent = "a"
+    timer.mark("routing")
+    metrics.record_request("/query", "POST", 200, 0.002, timer)
+    metrics.record_request("/query", "POST", 500, 0.002, timer)
+    metrics.record_error("unknown")
+    text = metrics.render([("apex_extra", "gauge", "Extra", {"kind": "x"}, 1.5)]).decode("utf-8")
+    assert 'apex_requests_total{route="/query",method="POST",status="200"} 1' in text
+    assert 'apex_requests_total{route="/query",method="POST",status="500"} 1' in text
+    assert 'apex_agent_errors_total{agent="a"} 1' in text
+    assert 'apex_agent_errors_total{agent=""} 1' in text
+    assert 'apex_request_duration_seconds_count{agent="a"} 2' in text
+    assert 'apex_stage_duration_seconds_count{agent="a",stage="routing"} 2' in text
+    # Stages that never ran are left out rather than exported as zeros
+    assert 'stage="generation"' not in text
+    assert 'apex_request_duration_seconds_bucket{agent="a",le="+Inf"} 2' in text
+    assert '# TYPE apex_extra gauge\napex_extra{kind="x"} 1.5' in text
+
+
+def test_responses_carry_server_timing(client):
+    response = query(client, "POST", "/query", FRONTEND_AGENT, "where is my order")
+    assert response.status_code == 200
+    names = [part.split(";")[0] for part in response.headers["server-timing"].split(", ")]
+    assert names[0] == "routing"
+    assert {"retrieval", "serialization"} <= set(names)
+    assert names[-1] == "total"
+    # Routes without stages still report the total
+    assert client.request("GET", "/metrics").headers["server-timing"].startswith("total;dur=")
+
+
+def test_metrics_endpoint_counts_requests(client):
+    def count():
+        text = client.request("GET", "/metrics").text
+        match = re.search(r'apex_requests_total\{route="/query",method="POST",status="200"\} (\d+)', text)
+        return int(match.group(1)) if match else 0
+
+    before = count()
+    query(client, "POST", "/query", FRONTEND_AGENT, "where is my order")
+    response = client.request("GET", "/metrics")
+    assert response.headers["content-type"] == PROMETHEUS_MEDIA_TYPE
+    assert "# TYPE apex_uptime_seconds gauge" in response.text
+    assert f'apex_request_duration_seconds_count{{agent="{FRONTEND_AGENT}"}}' in response.text
+    assert count() == before + 1
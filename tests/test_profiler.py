@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+import api_server
+from agents.profiler import MAX_SECONDS, ProfileInProgress, StackSampler
+
+
+def busy(agent_name, stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy, args=("whey", stop), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_stacks_are_rooted_at_agent_and_thread(busy_thread):
+    profile = StackSampler().profile(0.1, interval=0.005)
+    assert profile["samples"] > 0
+    busy_stacks = [stack for stack in profile["stacks"] if "thread:busy" in stack]
+    assert busy_stacks
+    assert all(stack.startswith("agent:whey;thread:busy;") for stack in busy_stacks)
+    assert any(f"{__name__}.busy" in stack for stack in busy_stacks)
+
+    lines = StackSampler.collapsed(profile["stacks"]).splitlines()
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert counts == sorted(counts, reverse=True)
+    assert sum(counts) == sum(profile["stacks"].values())
+
+
+def test_idle_threads_are_dropped_unless_asked_for():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, name="idle")
+    thread.start()
+    try:
+        sampler = StackSampler()
+        assert not any("thread:idle" in stack for stack in sampler.profile(0.05)["stacks"])
+        assert any("thread:idle" in stack for stack in sampler.profile(0.05, include_idle=True)["stacks"])
+    finally:
+        stop.set()
+        thread.join()
+
+
+@pytest.mark.parametrize("seconds", [0, -1, MAX_SECONDS + 1])
+def test_profile_length_is_bounded(seconds):
+    with pytest.raises(ValueError):
+        StackSampler().profile(seconds)
+
+
+def test_one_profile_at_a_time():
+    sampler = StackSampler()
+    running = threading.Thread(target=sampler.profile, args=(0.2,))
+    running.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ProfileInProgress):
+            sampler.profile(0.05)
+    finally:
+        running.join()
+    assert sampler.profile(0.01)["samples"] >= 1
+
+
+def test_profile_endpoint_is_hidden_without_admin_token(client, monkeypatch):
+    monkeypatch.setattr(api_server, "ADMIN_TOKEN", "")
+    assert client.request("GET", "/debug/profile", params={"seconds": 0.05}).status_code == 404
+
+
+def test_profile_endpoint_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(api_server, "ADMIN_TOKEN", "secret")
+    for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "Basic secret"}):
+        response = client.request("GET", "/debug/profile", params={"seconds": 0.05}, headers=headers)
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"] == "Bearer"
+
+    response = client.request("GET", "/debug/profile", params={"seconds": 0.05},
+                              headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_profile_endpoint_validates_seconds(client, monkeypatch):
+    monkeypatch.setattr(api_server, "ADMIN_TOKEN", "secret")
+    response = client.request("GET", "/debug/profile", params={"seconds": MAX_SECONDS + 1},
+                              headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 422
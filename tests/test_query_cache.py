@@ -0,0 +1,68 @@
+from agents.query_cache import QueryCache, normalize_query
+
+from .conftest import build_agent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_of_an_older_generation_are_not_served():
+    cache = QueryCache(maxsize=4)
+    cache.put("q", 1, "old", nbytes=10)
+    assert cache.get("q", 1) == "old"
+    assert cache.get("q", 2) is None
+    assert cache.get("q", 1) is None  # Dropped, not kept for the old generation
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["size"], stats["bytes"]) == (1, 2, 1, 0, 0)
+
+
+def test_ttl_expires_entries():
+    clock = FakeClock()
+    cache = QueryCache(maxsize=4, ttl=30, clock=clock)
+    cache.put("q", 1, "value")
+    clock.now += 30
+    assert cache.get("q", 1) == "value"
+    clock.now += 0.5
+    assert cache.get("q", 1) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(maxsize=2)
+    cache.put("a", 1, "A", nbytes=1)
+    cache.put("b", 1, "B", nbytes=2)
+    cache.get("a", 1)
+    cache.put("c", 1, "C", nbytes=4)
+    assert cache.get("b", 1) is None
+    assert (cache.get("a", 1), cache.get("c", 1)) == ("A", "C")
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 5
+
+
+def test_zero_size_disables_caching():
+    cache = QueryCache(maxsize=0)
+    cache.put("q", 1, "value")
+    assert cache.get("q", 1) is None and len(cache) == 0
+
+
+def test_normalize_query():
+    assert normalize_query("  Whey   PROTEIN\tprice ") == "whey protein price"
+
+
+def test_agent_writes_invalidate_cached_results():
+    agent = build_agent()
+    first = agent.retrieve_context_with_sources("creatine", k=2)
+    assert agent.retrieve_context_with_sources("  CREATINE ", k=2) is first
+    assert agent.cache.stats()["hits"] == 1
+
+    agent.upsert({9: "Creatine Gummies: creatine in a chewable"})
+    context, sources = agent.retrieve_context_with_sources("creatine", k=2)
+    assert "Creatine Gummies" in context
+    assert agent.cache.stats()["invalidations"] == 1
+
+    agent.add_documents(["unrelated"])
+    assert len(agent.cache) == 0
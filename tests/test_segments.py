@@ -0,0 +1,94 @@
+"""Incremental updates and merges against fresh builds"""
+
+import pytest
+
+from .conftest import DOCS, QUERIES, build_agent, ranked_ids
+
+RETRIEVAL_MODES = ["lexical", "dense", "hybrid"]
+
+UPSERTS = {2: "Creatine HCL: creatine without loading, strength gains", 8: "Electrolyte Hydration: training in heat"}
+DELETES = [4, 6]
+
+
+def updated_docs():
+    docs = dict(DOCS)
+    docs.update(UPSERTS)
+    for doc_id in DELETES:
+        del docs[doc_id]
+    return docs
+
+
+def merged(agent):
+    """Wait out any background merge the writes started, then merge what is left"""
+    if agent._merge_thread is not None:
+        agent._merge_thread.join()
+    agent.merge_segments()
+    assert len(agent.snapshot().segments) == 1 and not agent.snapshot().deleted
+    return agent
+
+
+@pytest.mark.parametrize("mode", RETRIEVAL_MODES)
+def test_inserts_rank_like_a_fresh_build_before_merging(mode):
+    agent = build_agent(retrieval_mode=mode)
+    agent.upsert({8: UPSERTS[8]})
+    assert len(agent.snapshot().segments) == 2
+    fresh = build_agent({**DOCS, 8: UPSERTS[8]}, retrieval_mode=mode)
+    for query in QUERIES:
+        assert ranked_ids(agent, query) == ranked_ids(fresh, query), query
+
+
+@pytest.mark.parametrize("mode", RETRIEVAL_MODES)
+def test_upsert_delete_and_merge_rank_like_a_fresh_build(mode):
+    # Before the merge tombstoned copies still count towards BM25 document
+    # frequencies; afterwards nothing may differ from building the end state
+    agent = build_agent(retrieval_mode=mode)
+    agent.upsert(UPSERTS)
+    agent.delete(DELETES)
+    merged(agent)
+    fresh = build_agent(updated_docs(), retrieval_mode=mode)
+    for query in QUERIES:
+        assert ranked_ids(agent, query) == ranked_ids(fresh, query), query
+    assert sorted(agent.documents) == sorted(fresh.documents)
+
+
+def test_delete_returns_how_many_existed(agent):
+    assert agent.delete([1, 2, 999]) == 2
+    assert agent.delete([1]) == 0
+    snapshot = agent.snapshot()
+    assert sorted(snapshot.doc_id(position) for position in snapshot.live_positions()) == [3, 4, 5, 6, 7]
+    assert all(agent.snapshot().doc_id(position) not in (1, 2) for position, _ in agent.search("whey creatine", 7))
+
+
+def test_upsert_replaces_by_id_and_last_write_wins(agent):
+    assert agent.upsert([(1, "first draft"), (1, "Whey Protein: chocolate whey isolate")]) == 1
+    assert sorted(agent.documents).count("Whey Protein: chocolate whey isolate") == 1
+    assert len(agent.documents) == len(DOCS)
+    hits = agent.search("chocolate", 3)
+    assert [agent.snapshot().doc_id(position) for position, _ in hits] == [1]
+
+
+def test_readers_keep_their_snapshot(agent):
+    before = agent.snapshot()
+    agent.upsert(UPSERTS)
+    agent.delete(DELETES)
+    assert before.live_count == len(before.segments[0]) == 7
+    assert [before.doc_id(position) for position, _ in agent.search("power gains", 2, snapshot=before)] == [2]
+
+
+def test_writes_bump_generation_and_fingerprint(agent):
+    generation, fingerprint = agent.generation, agent.fingerprint
+    agent.upsert(UPSERTS)
+    assert agent.generation > generation and agent.fingerprint != fingerprint
+    generation, fingerprint = agent.generation, agent.fingerprint
+    assert agent.delete([999]) == 0
+    assert (agent.generation, agent.fingerprint) == (generation, fingerprint)
+    merged(agent)
+    assert agent.fingerprint == fingerprint
+
+
+def test_fingerprint_depends_only_on_content():
+    assert build_agent().fingerprint == build_agent(name="other").fingerprint
+    twice = build_agent()
+    twice.add_documents(list(DOCS.values()), ids=list(DOCS))
+    assert twice.fingerprint == build_agent().fingerprint
+    assert build_agent(updated_docs()).fingerprint != build_agent().fingerprint
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from agents.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def scenario():
+        same = [flight.run("a", lambda: compute(1)) for _ in range(5)]
+        return await asyncio.gather(*same, flight.run("b", lambda: compute(10)))
+
+    assert asyncio.run(scenario()) == [2, 2, 2, 2, 2, 20]
+    assert calls == [1, 10]
+    stats = flight.stats()
+    assert (stats["computations"], stats["coalesced"], stats["in_flight"]) == (2, 4, 0)
+
+
+def test_key_is_released_once_the_computation_finishes():
+    flight = SingleFlight("test")
+    counter = iter(range(100))
+
+    async def compute():
+        await asyncio.sleep(0)
+        return next(counter)
+
+    async def scenario():
+        first = await flight.run("a", compute)
+        return first, await flight.run("a", compute)
+
+    assert asyncio.run(scenario()) == (0, 1)
+    assert len(flight) == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise LookupError("index unavailable")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("a", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, LookupError) for result in results)
+    assert flight.stats()["failures"] == 1 and len(flight) == 0
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_computation():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.run("a", compute))
+        follower = asyncio.ensure_future(flight.run("a", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+    assert flight.stats()["cancelled_waiters"] == 1
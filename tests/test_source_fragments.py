@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from agents.serialization import dumps
+
+from .conftest import QUERIES, build_agent
+
+LONG_DOCS = {1: "Whey Protein: " + "creamy vanilla whey " * 20, 2: "untitled note with \"quotes\", \\ and ünïcode ✓",
+             3: "Creatine: creatine"}
+
+
+@pytest.mark.parametrize("mode", ["lexical", "dense", "hybrid"])
+def test_sources_json_matches_encoded_sources(mode):
+    agent = build_agent(retrieval_mode=mode)
+    agent.upsert({2: "Creatine HCL: creatine without loading", 8: "Electrolytes: training in heat"})
+    for query in QUERIES:
+        _, sources = agent.retrieve_context_with_sources(query, k=4)
+        assert agent.retrieve_sources_json(query, k=4) == dumps(sources), query
+
+
+def test_previews_titles_and_escaping():
+    agent = build_agent(LONG_DOCS)
+    for query in ("vanilla whey", "quotes unicode", "creatine"):
+        encoded = agent.retrieve_sources_json(query, k=3)
+        _, sources = agent.retrieve_context_with_sources(query, k=3)
+        assert json.loads(encoded) == sources
+    (source,) = json.loads(agent.retrieve_sources_json("vanilla", k=1))
+    assert source["content"].endswith("...") and len(source["content"]) == 103
+    assert source["metadata"] == {"source": "test_agent_doc_1", "title": "Whey Protein", "index": 0, "id": 1}
+
+
+def test_no_hits_is_an_empty_array():
+    assert build_agent().retrieve_sources_json("nothing matches this", k=3) == b"[]"
+    assert build_agent({}).retrieve_sources_json("whey", k=3) == b"[]"
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import api_server
+from agents.work_pool import Overloaded, TierLimiter, create_executor
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_full_queue_is_rejected_with_429(executor):
+    release = threading.Event()
+
+    async def scenario():
+        limiter = TierLimiter("frontend", max_in_flight=1, max_queue=1, queue_timeout=5)
+        running = asyncio.ensure_future(limiter.run(executor, release.wait))
+        queued = asyncio.ensure_future(limiter.run(executor, lambda: "queued"))
+        await asyncio.sleep(0.05)
+        assert (limiter.in_flight, limiter.waiting) == (1, 1)
+        with pytest.raises(Overloaded) as rejected:
+            await limiter.run(executor, lambda: "rejected")
+        release.set()
+        assert await running is True and await queued == "queued"
+        return limiter, rejected.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 429 and error.retry_after >= 1
+    assert limiter.stats()["rejected_queue_full"] == 1 and limiter.stats()["completed"] == 2
+    assert (limiter.in_flight, limiter.waiting) == (0, 0)
+
+
+def test_queue_timeout_is_rejected_with_503(executor):
+    release = threading.Event()
+
+    async def scenario():
+        limiter = TierLimiter("backend", max_in_flight=1, max_queue=4, queue_timeout=0.05)
+        running = asyncio.ensure_future(limiter.run(executor, release.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as rejected:
+            await limiter.run(executor, lambda: "late")
+        release.set()
+        await running
+        return limiter, rejected.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 503 and error.retry_after >= 1
+    assert limiter.stats()["rejected_timeout"] == 1 and limiter.waiting == 0
+
+
+def test_cancelled_request_keeps_its_slot_until_the_job_ends(executor):
+    release = threading.Event()
+
+    async def scenario():
+        limiter = TierLimiter("frontend", max_in_flight=1, max_queue=0)
+        request = asyncio.ensure_future(limiter.run(executor, release.wait))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1
+        with pytest.raises(Overloaded):
+            await limiter.run(executor, lambda: None)
+        release.set()
+        for _ in range(100):
+            if not limiter.in_flight:
+                break
+            await asyncio.sleep(0.01)
+        return await limiter.run(executor, lambda: "admitted")
+
+    assert asyncio.run(scenario()) == "admitted"
+
+
+def test_errors_release_the_slot(executor):
+    def fail():
+        raise KeyError("boom")
+
+    async def scenario():
+        limiter = TierLimiter("frontend", max_in_flight=1, max_queue=0)
+        with pytest.raises(KeyError):
+            await limiter.run(executor, fail)
+        await asyncio.sleep(0.01)
+        return limiter
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_create_executor_rejects_unknown_kinds():
+    with pytest.raises(ValueError):
+        create_executor("fiber")
+
+
+def test_overloaded_tier_answers_with_retry_after(client, monkeypatch):
+    full = TierLimiter("frontend", max_in_flight=1, max_queue=0)
+    full.in_flight = 1  # Stands in for a request still running
+    monkeypatch.setitem(api_server.TIER_LIMITERS, "frontend", full)
+    response = client.request("POST", "/query/frontend", json={"agent": "customer_service", "query": "fresh query"})
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many queued frontend requests"}
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_stream_reports_a_failed_retrieval_as_an_error_event(client, monkeypatch):
+    async def fail(agent_name, query, k):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(api_server, "fetch_sources", fail)
+    errors = api_server.METRICS.errors["customer_service"]
+    response = client.request("POST", "/query/stream", json={"agent": "customer_service", "query": "hi"})
+    assert response.status_code == 200
+    assert response.content == b'event: error\ndata: {"status_code":500,"detail":"Retrieval failed"}\n\n'
+    assert api_server.METRICS.errors["customer_service"] == errors + 1